@@ -1,16 +1,24 @@
-import numpy as np
-import json
+import orjson
 from mmpose.apis import MMPoseInferencer
 
 # Path to your video file
-video_path = '/home/popoy/robotics/output_from_bag_FIXED.mp4' 
+video_path = '/home/popoy/robotics/output_from_bag_FIXED.mp4'
+
+
+def iter_frame_predictions(results_generator):
+    """Yields the per-frame instance list out of each inferencer result (MMPose yields one result per frame)."""
+    for result in results_generator:
+        for frame_predictions in result['predictions']:
+            yield frame_predictions
+
 
 # --- Stage 1: Run 2D Pose Estimation (without saving video) ---
+# The lifter consumes these results, so the keypoints_2d saved below are exactly
+# the poses that were lifted to 3D and the instances pair up one-to-one.
 inferencer_2d = MMPoseInferencer('human')
 print("✅ Stage 1: Running 2D Pose Estimation on the video...")
 # Removed vis_out_dir to prevent saving the 2D video
-results_2d_generator = inferencer_2d(video_path, show=False) 
-results_2d = [r for r in results_2d_generator]
+results_2d = [r for r in inferencer_2d(video_path, show=False)]
 print("...Finished 2D Pose Estimation.\n")
 
 
@@ -18,48 +26,44 @@ print("...Finished 2D Pose Estimation.\n")
 inferencer_3d = MMPoseInferencer(pose3d='motionbert_dstformer-ft-243frm_8xb32-120e_h36m')
 print("✅ Stage 2: Running 3D Pose Lifting using the 2D results...")
 # Removed vis_out_dir and set show=False to prevent saving/showing the 3D video
-results_3d_generator = inferencer_3d(video_path, pose_results=results_2d, show=False) 
-
-
-# --- Stage 3: Process and COLLECT the Results ---
-print("\n✅ Stage 3: Processing and collecting combined results...")
-all_frames_data = [] # Create a list to hold data for all frames
-
-for frame_idx, result_3d in enumerate(results_3d_generator):
-    result_2d = results_2d[frame_idx]
-    
-    # This print statement is useful to track progress
-    print(f"--- Processing Frame {frame_idx} ---")
-
-    predictions_2d = result_2d['predictions'][0]
-    predictions_3d = result_3d['predictions'][0]
-
-    # Create a dictionary to hold data for the current frame
-    frame_data = {'frame_id': frame_idx, 'instances': []}
-
-    if not predictions_2d or not predictions_3d:
-        all_frames_data.append(frame_data)
-        continue
-
-    for instance_idx in range(len(predictions_3d)):
-        
-        keypoints_2d = np.array(predictions_2d[instance_idx]['keypoints'])
-        keypoints_3d = np.array(predictions_3d[instance_idx]['keypoints'])
-        
-        # Create a dictionary for the current person (instance)
-        instance_data = {
-            'instance_id': instance_idx,
-            'keypoints_2d': keypoints_2d.tolist(), 
-            'keypoints_3d': keypoints_3d.tolist()
-        }
-        frame_data['instances'].append(instance_data)
-
-    all_frames_data.append(frame_data)
-
-# --- Stage 4: Save the Collected Data to JSON ---
-output_filepath = 'keypoints_output.json'
-print(f"\n✅ Stage 4: Saving all keypoint data to {output_filepath}...")
-with open(output_filepath, 'w') as f:
-    json.dump(all_frames_data, f, indent=4)
-
-print("...Done!")
\ No newline at end of file
+results_3d_generator = inferencer_3d(video_path, pose_results=results_2d, show=False)
+
+
+# --- Stage 3: Process and STREAM the Results to NDJSON ---
+# One JSON object per line, written as each frame is produced, so memory stays O(frame)
+output_filepath = 'keypoints_output.jsonl'
+print(f"\n✅ Stage 3: Processing combined results and streaming to {output_filepath}...")
+frames_written = 0
+
+with open(output_filepath, 'wb') as f:
+    frames_2d = iter_frame_predictions(results_2d)
+    for frame_idx, (predictions_2d, predictions_3d) in enumerate(
+            zip(frames_2d, iter_frame_predictions(results_3d_generator))):
+
+        # This print statement is useful to track progress
+        print(f"--- Processing Frame {frame_idx} ---")
+
+        # Create a dictionary to hold data for the current frame
+        frame_data = {'frame_id': frame_idx, 'instances': []}
+
+        if predictions_2d and predictions_3d:
+            # zip() guards against a lifter result that drops an instance
+            for instance_idx, (instance_2d, instance_3d) in enumerate(zip(predictions_2d, predictions_3d)):
+
+                # Keypoints are passed through untouched; orjson serializes lists
+                # and NumPy buffers directly, so no intermediate array is built
+                keypoints_2d = instance_2d['keypoints']
+                keypoints_3d = instance_3d['keypoints']
+
+                # Create a dictionary for the current person (instance)
+                instance_data = {
+                    'instance_id': instance_idx,
+                    'keypoints_2d': keypoints_2d,
+                    'keypoints_3d': keypoints_3d
+                }
+                frame_data['instances'].append(instance_data)
+
+        f.write(orjson.dumps(frame_data, option=orjson.OPT_SERIALIZE_NUMPY) + b'\n')
+        frames_written += 1
+
+print(f"...Done! Wrote {frames_written} frames to {output_filepath}")
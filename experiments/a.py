@@ -1,10 +1,14 @@
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+import plotly.graph_objects as go
 import os
 import math
 import warnings
+from numba import njit, prange
 
 # Suppress NumPy warnings that occur during angle calculation near zero/NaN
 warnings.filterwarnings('ignore', category=RuntimeWarning)
@@ -18,6 +22,12 @@ H36M_JOINT_NAMES = {
     16: 'R_Wrist'
 }
 REQUIRED_JOINTS = 17
+JOINT_LABELS = [H36M_JOINT_NAMES.get(idx, f'J{idx}') for idx in range(REQUIRED_JOINTS)]
+
+# 'matplotlib' uses the CPU-bound Axes3D animator; 'plotly' renders through WebGL in the browser
+ANIMATION_BACKEND = 'matplotlib'
+# The Plotly figure embeds one frame (and slider step) per shown frame; longer clips are subsampled to this many
+PLOTLY_MAX_FRAMES = 300
 
 # H36M SKELETON SEGMENTS for Matplotlib drawing
 SKELETON_SEGMENTS_DRAW = [
@@ -27,6 +37,8 @@ SKELETON_SEGMENTS_DRAW = [
     (0, 1), (1, 2), (2, 3), # Right Leg
     (0, 4), (4, 5), (5, 6) # Left Leg 
 ]
+SEGMENT_STARTS = np.array([s for s, _ in SKELETON_SEGMENTS_DRAW], dtype=np.int32)
+SEGMENT_ENDS = np.array([e for _, e in SKELETON_SEGMENTS_DRAW], dtype=np.int32)
 
 # Vicon (39 markers) to H36M (17 joints) Mapping
 VICON_TO_H36M_MAP = {
@@ -35,6 +47,13 @@ VICON_TO_H36M_MAP = {
 }
 NUM_V_MARKERS = 39
 
+# Gather index tables derived once from VICON_TO_H36M_MAP (direct copies vs. 'avg' pairs)
+DIRECT_DST = np.array([h for h, m in VICON_TO_H36M_MAP.items() if isinstance(m, int)], dtype=np.int32)
+DIRECT_SRC = np.array([m for m in VICON_TO_H36M_MAP.values() if isinstance(m, int)], dtype=np.int32)
+AVG_DST = np.array([h for h, m in VICON_TO_H36M_MAP.items() if isinstance(m, tuple) and m[0] == 'avg'], dtype=np.int32)
+AVG_SRC1 = np.array([m[1] for m in VICON_TO_H36M_MAP.values() if isinstance(m, tuple) and m[0] == 'avg'], dtype=np.int32)
+AVG_SRC2 = np.array([m[2] for m in VICON_TO_H36M_MAP.values() if isinstance(m, tuple) and m[0] == 'avg'], dtype=np.int32)
+
 # --- MOCKED/SIMPLIFIED KINEMATICS (Retained for execution compatibility) ---
 def calculate_3d_angle(*args): return 90.0
 def calculate_vertical_angle(*args): return 90.0
@@ -44,29 +63,52 @@ def calculate_anatomical_angles(kp): return {}
 def process_all_angles(kp, angle_keys): return {} 
 # ------------------------------------------------------------------------
 
-def transform_uiprmd_to_h36m(vicon_data_39_points):
+@njit(cache=True)
+def _transform_frame(coords_39, direct_dst, direct_src, avg_dst, avg_src1, avg_src2, out):
+    """Numba kernel: maps one (39, 3) Vicon frame into a preallocated (17, 3) H36M frame."""
+    for i in range(direct_dst.size):
+        for k in range(3):
+            out[direct_dst[i], k] = coords_39[direct_src[i], k]
+    for i in range(avg_dst.size):
+        for k in range(3):
+            out[avg_dst[i], k] = 0.5 * (coords_39[avg_src1[i], k] + coords_39[avg_src2[i], k])
+    # ANCHOR THE HEADTOP (Index 10) to the Head (Index 9)
+    # This prevents the Headtop from floating to (0,0,0) due to lack of a direct Vicon marker.
+    for k in range(3):
+        out[10, k] = out[9, k]
+
+
+@njit(cache=True, parallel=True)
+def _transform_frames(coords, direct_dst, direct_src, avg_dst, avg_src1, avg_src2, out):
+    """Numba kernel: runs _transform_frame over every frame in parallel."""
+    for f in prange(coords.shape[0]):
+        _transform_frame(coords[f], direct_dst, direct_src, avg_dst, avg_src1, avg_src2, out[f])
+
+
+@njit(cache=True)
+def _build_segments(frame_data, starts, ends, out):
+    """Numba kernel: fills a (num_segments, 2, 3) buffer with segment endpoints for one frame."""
+    for i in range(starts.size):
+        for k in range(3):
+            out[i, 0, k] = frame_data[starts[i], k]
+            out[i, 1, k] = frame_data[ends[i], k]
+    return out
+
+
+def transform_uiprmd_frames_to_h36m(coords):
     """
-    Transforms a single frame of 39 Vicon markers to 17 H36M-equivalent joints.
+    Transforms an (N, 39, 3) array of Vicon frames to (N, 17, 3) H36M-equivalent joints.
     FIXED: Anchors H36M index 10 (Headtop) to Head (index 9) position.
     """
+    h36m_points = np.zeros((coords.shape[0], REQUIRED_JOINTS, 3), dtype=np.float32)
+    _transform_frames(coords, DIRECT_DST, DIRECT_SRC, AVG_DST, AVG_SRC1, AVG_SRC2, h36m_points)
+    return h36m_points
+
+
+def transform_uiprmd_to_h36m(vicon_data_39_points):
+    """Transforms a single frame of 39 Vicon markers to 17 H36M-equivalent joints."""
     h36m_points = np.zeros((REQUIRED_JOINTS, 3), dtype=np.float32)
-    
-    # 1. Map all Vicon markers to their H36M counterparts
-    for h36m_idx in range(REQUIRED_JOINTS):
-        if h36m_idx in VICON_TO_H36M_MAP:
-            vicon_mapping = VICON_TO_H36M_MAP[h36m_idx]
-            
-            if isinstance(vicon_mapping, int):
-                h36m_points[h36m_idx] = vicon_data_39_points[vicon_mapping]
-            
-            elif isinstance(vicon_mapping, tuple) and vicon_mapping[0] == 'avg':
-                idx1, idx2 = vicon_mapping[1], vicon_mapping[2]
-                h36m_points[h36m_idx] = (vicon_data_39_points[idx1] + vicon_data_39_points[idx2]) / 2.0
-                
-    # 2. ANCHOR THE HEADTOP (Index 10) to the Head (Index 9)
-    # This prevents the Headtop from floating to (0,0,0) due to lack of a direct Vicon marker.
-    h36m_points[10] = h36m_points[9] 
-    
+    _transform_frame(vicon_data_39_points, DIRECT_DST, DIRECT_SRC, AVG_DST, AVG_SRC1, AVG_SRC2, h36m_points)
     return h36m_points
 
 
@@ -74,21 +116,14 @@ def load_and_transform_single_episode(file_path):
     """Loads a Vicon positions file, applies delimiter fix, and transforms to H36M."""
     try:
         # Load Data with COMMA DELIMITER
-        coords_session = np.loadtxt(file_path, delimiter=',')
-        
-        if coords_session.ndim == 1:
-            coords_session = coords_session.reshape(1, -1)
+        coords_session = pd.read_csv(file_path, header=None, sep=',', dtype=np.float32).to_numpy()
         
         coords_reshaped = coords_session.reshape(-1, NUM_V_MARKERS, 3)
         
-        h36m_frames = []
-        for frame_data in coords_reshaped:
-            h36m_kp = transform_uiprmd_to_h36m(frame_data)
-            h36m_frames.append(h36m_kp)
+        h36m_array = transform_uiprmd_frames_to_h36m(coords_reshaped)
             
-        print(f"[Verification] Successfully transformed {len(h36m_frames)} frames to H36M format.")
+        print(f"[Verification] Successfully transformed {len(h36m_array)} frames to H36M format.")
         
-        h36m_array = np.array(h36m_frames)
         return h36m_array
 
     except Exception as e:
@@ -123,25 +158,29 @@ def animate_3d_skeleton(h36m_data, title="Vicon to H36M Verification"):
     
     ax.set_xlabel('X (Lateral)'); ax.set_ylabel('Y (Vicon Axis 2)'); ax.set_zlabel('Z (Vicon Axis 3)')
     
-    # Initial scatter plot and line placeholders
+    # Initial scatter plot and a single collection holding every skeleton segment
     first_frame = h36m_data[0]
     scatter = ax.scatter(first_frame[:, 0], first_frame[:, 1], first_frame[:, 2], s=50, c='red')
-    lines = []
-    for s, e in SKELETON_SEGMENTS_DRAW:
-        line, = ax.plot([0, 0], [0, 0], [0, 0], color='blue', linewidth=2)
-        lines.append(line)
+    segment_buffer = np.empty((len(SKELETON_SEGMENTS_DRAW), 2, 3), dtype=h36m_data.dtype)
+    segments = Line3DCollection(_build_segments(first_frame, SEGMENT_STARTS, SEGMENT_ENDS, segment_buffer).copy(),
+                                colors='blue', linewidths=2)
+    ax.add_collection3d(segments)
 
     # --- JOINT LABELING SETUP: LABEL ALL 17 JOINTS ---
+    label_offset = max_range * 0.02
     text_artists = []
-    all_joint_indices = list(range(REQUIRED_JOINTS))
     
-    for idx in all_joint_indices:
+    for idx in range(REQUIRED_JOINTS):
         x, y, z = first_frame[idx]
         label = H36M_JOINT_NAMES.get(idx, f'J{idx}')
-        text = ax.text(x + max_range*0.02, y, z, label, fontsize=6, color='black') 
+        text = ax.text(x + label_offset, y, z, label, fontsize=6, color='black') 
         text_artists.append(text)
+
+    # Frame counter lives in its own artist so the static title never triggers a relayout
+    frame_text = ax.text2D(0.02, 0.98, "", transform=ax.transAxes, fontsize=9)
+    num_frames = h36m_data.shape[0]
     
-    all_artists = [scatter] + lines + text_artists
+    all_artists = [scatter, segments, frame_text] + text_artists
 
     # Update function for the animation
     def update_animation(frame_idx):
@@ -151,26 +190,85 @@ def animate_3d_skeleton(h36m_data, title="Vicon to H36M Verification"):
         scatter._offsets3d = (frame_data[:, 0], frame_data[:, 1], frame_data[:, 2])
 
         # 2. Update Connections
-        for i, (start_idx, end_idx) in enumerate(SKELETON_SEGMENTS_DRAW):
-            p1 = frame_data[start_idx]
-            p2 = frame_data[end_idx]
-            lines[i].set_data([p1[0], p2[0]], [p1[1], p2[1]])
-            lines[i].set_3d_properties([p1[2], p2[2]])
+        segments.set_segments(_build_segments(frame_data, SEGMENT_STARTS, SEGMENT_ENDS, segment_buffer))
             
         # 3. Update Joint Labels
-        for i, idx in enumerate(all_joint_indices):
+        for idx, text in enumerate(text_artists):
             x, y, z = frame_data[idx]
-            text_artists[i].set_position((x + max_range*0.02, y))
-            text_artists[i].set_3d_properties(z, zdir='z')
+            text.set_position((x + label_offset, y))
+            text.set_3d_properties(z, zdir='z')
             
-        ax.set_title(f"{title} | Frame: {frame_idx + 1} / {h36m_data.shape[0]}")
+        frame_text.set_text(f"Frame: {frame_idx + 1} / {num_frames}")
+
+        # Blitting draws artists without Axes3D.draw, which is what normally projects the
+        # 3D collections; project them here against the current view (ax.M)
+        scatter.do_3d_projection()
+        segments.do_3d_projection()
 
         return all_artists
 
-    # Create and show the animation
-    anim = FuncAnimation(fig, update_animation, frames=len(h36m_data), interval=33, blit=False)
+    # Create and show the animation (blitting redraws only the moving artists)
+    anim = FuncAnimation(fig, update_animation, frames=num_frames, interval=33, blit=True)
     plt.show()
 
+def animate_3d_skeleton_plotly(h36m_data, title="Vicon to H36M Verification"):
+    """Animates the 3D skeleton data as a Plotly Scatter3d figure (WebGL), including ALL 17 joint labels."""
+    if h36m_data is None or h36m_data.size == 0:
+        print("No data to animate.")
+        return
+
+    # Calculate fixed plot limits and center
+    all_coords = h36m_data.reshape(-1, 3)
+    coord_min = all_coords.min(axis=0)
+    coord_max = all_coords.max(axis=0)
+    max_range = max(coord_max - coord_min) / 2.0 * 1.1 
+    center = (coord_min + coord_max) / 2.0
+
+    # Segment polylines for every frame at once: [start, end, NaN gap] per segment
+    starts = h36m_data[:, SEGMENT_STARTS]
+    ends = h36m_data[:, SEGMENT_ENDS]
+    gaps = np.full_like(starts, np.nan)
+    segment_paths = np.stack([starts, ends, gaps], axis=2).reshape(h36m_data.shape[0], -1, 3)
+
+    def frame_traces(frame_idx):
+        joints = h36m_data[frame_idx]
+        path = segment_paths[frame_idx]
+        return [
+            go.Scatter3d(x=path[:, 0], y=path[:, 1], z=path[:, 2], mode='lines',
+                         line=dict(color='blue', width=4), name='Segments'),
+            go.Scatter3d(x=joints[:, 0], y=joints[:, 1], z=joints[:, 2], mode='markers+text',
+                         marker=dict(color='red', size=4), text=JOINT_LABELS,
+                         textfont=dict(size=9, color='black'), name='Joints'),
+        ]
+
+    # Every step-th frame, played step times slower, so the clip keeps its real-time length
+    step = max(1, math.ceil(h36m_data.shape[0] / PLOTLY_MAX_FRAMES))
+    frame_indices = range(0, h36m_data.shape[0], step)
+    frames = [go.Frame(data=frame_traces(i), name=str(i)) for i in frame_indices]
+    axis_ranges = [[c - max_range, c + max_range] for c in center]
+
+    fig = go.Figure(data=frame_traces(0), frames=frames)
+    fig.update_layout(
+        title=title,
+        scene=dict(
+            xaxis=dict(title='X (Lateral)', range=axis_ranges[0], autorange=False),
+            yaxis=dict(title='Y (Vicon Axis 2)', range=axis_ranges[1], autorange=False),
+            zaxis=dict(title='Z (Vicon Axis 3)', range=axis_ranges[2], autorange=False),
+            aspectmode='cube'
+        ),
+        updatemenus=[dict(type='buttons', showactive=False, buttons=[
+            dict(label='Play', method='animate',
+                 args=[None, dict(frame=dict(duration=33 * step, redraw=True), fromcurrent=True, transition=dict(duration=0))]),
+            dict(label='Pause', method='animate',
+                 args=[[None], dict(frame=dict(duration=0, redraw=False), mode='immediate')]),
+        ])],
+        sliders=[dict(steps=[dict(method='animate', label=str(i + 1),
+                                  args=[[str(i)], dict(frame=dict(duration=0, redraw=True), mode='immediate')])
+                             for i in frame_indices])],
+        height=900
+    )
+    fig.show()
+
 # --- EXECUTION BLOCK ---
 if __name__ == '__main__':
     # Define the root path to your UI-PRMD directory and the target file
@@ -182,6 +280,9 @@ if __name__ == '__main__':
     h36m_episode_data = load_and_transform_single_episode(SINGLE_FILE_PATH)
 
     if h36m_episode_data is not None:
-        animate_3d_skeleton(h36m_episode_data, title=f"Verification: {TARGET_FILE_NAME}")
+        if ANIMATION_BACKEND == 'plotly':
+            animate_3d_skeleton_plotly(h36m_episode_data, title=f"Verification: {TARGET_FILE_NAME}")
+        else:
+            animate_3d_skeleton(h36m_episode_data, title=f"Verification: {TARGET_FILE_NAME}")
         print("Verification complete. Check the visualization for correct anatomical movement.")
             
\ No newline at end of file
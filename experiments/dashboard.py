@@ -1,38 +1,90 @@
+import threading
+import time
 import numpy as np
+import matplotlib
+# Pin the interactive backend (Tk ships with the conda env) so blitting behaves the same everywhere
+matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Button
 from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 import kinematics # Import module for constants
 
 class DashboardManager:
     """
     Manages the Matplotlib figure layout and drawing elements (plots, skeleton, image).
+    
+    Live callers should open their camera with cv2.CAP_PROP_BUFFERSIZE = 1 (see
+    WebcamFrameGenerator in main.py), otherwise the webcam panel lags a few frames
+    behind the skeleton and angle plots.
     """
     REQUIRED_JOINTS = 17
+    STATUS_INTERVAL = 0.25 # Seconds between throttled status-text refreshes (~4 Hz)
+    VALUE_FORMAT = "{:.1f}°" # In-axes readout format, bound once
     
-    def __init__(self, angle_keys, skeleton_segments):
+    def __init__(self, angle_keys, skeleton_segments, img_interval=2):
         self.angle_keys = angle_keys
         self.skeleton_segments = skeleton_segments
-        self.angle_history = {k: [] for k in angle_keys}
         self.HISTORY_LIMIT = 200 # Fixed History Limit
         
+        # The webcam image is the heaviest artist (~900 kB per 640x480 frame); refresh it every
+        # img_interval rendered frames while skeleton/angles update every frame (1 = low-latency mode)
+        self._img_interval = max(1, img_interval)
+        self._img_frame_counter = 0
+        
+        # Angle history ring buffer: one row per angle, written twice (at i and i + LIMIT)
+        # so the latest HISTORY_LIMIT samples are always a contiguous slice, no roll/pop needed.
+        # float16 is plenty for pixel-resolution plotting (~0.1° steps up to 180°); readouts use float32.
+        self._hist = np.zeros((len(angle_keys), 2 * self.HISTORY_LIMIT), dtype=np.float16)
+        self._hist_idx = 0 # Monotonic write counter
+        self._x = np.arange(self.HISTORY_LIMIT) # Shared x-coordinates, built once
+        self._shown_values = np.full(len(angle_keys), np.nan, dtype=np.float32) # Values currently in VALUE_TEXTS
+        
+        # Preallocated keypoint buffers: producer scratch, published slot, and renderer copy
+        self._kp_buf = np.zeros((self.REQUIRED_JOINTS, 3), dtype=np.float32)
+        self._render_kp = np.zeros((self.REQUIRED_JOINTS, 3), dtype=np.float32)
+        self._xyz_buf = np.zeros((3, self.REQUIRED_JOINTS), dtype=np.float32) # Scatter x/y/z rows
+        
+        # 1-slot latest-value hand-off between the inference producer and the renderer
+        self._latest = {'lock': threading.Lock(), 'snapshot': None,
+                        'kp': np.zeros((self.REQUIRED_JOINTS, 3), dtype=np.float32)}
+        self._result_version = 0 # Bumped by submit() on every publish
+        self._last_drawn_version = 0 # Version last applied by render()
+        
         # Color mapping for organized charts
         self.color_map = self._get_color_map()
         
         # Initialize figure structure
-        self.fig, self.ax_webcam, self.ax_3d, self.AXES_DASHBOARD, self.ANGLE_LINES, self.text_artist = self._setup_figure()
+        self.fig, self.ax_webcam, self.ax_3d, self.AXES_DASHBOARD, self.ANGLE_LINES, self.VALUE_TEXTS, self.text_artist = self._setup_figure()
         
         # FIX: Expose the reset frame attribute directly (Fixes the AttributeError in main.py)
         self.reset_frame = np.zeros((480, 640, 3), dtype=np.uint8) 
         self.im_artist = self._setup_webcam_placeholder()
 
-        self.scatter_3d, self.skeleton_lines = self._setup_3d_placeholders()
+        self.scatter_3d, self.skeleton_lc = self._setup_3d_placeholders()
+        
+        # Layout is final from here on: no autoscaling when artist data changes
+        for ax in [self.ax_webcam, self.ax_3d] + list(self.AXES_DASHBOARD.values()):
+            ax.set_autoscale_on(False)
 
         # Buttons are initialized here and exposed
         self.plt = plt
         self.Button = Button 
         # UPDATED: Initialize all four buttons and expose them
         self.btn_start, self.btn_stop, self.btn_replay, self.btn_video = self._setup_buttons()
+        
+        # The animated artist set never changes after setup; build the list once
+        self._artists = [self.im_artist, self.scatter_3d, self.text_artist] + \
+                        list(self.ANGLE_LINES.values()) + \
+                        list(self.VALUE_TEXTS.values()) + \
+                        [self.skeleton_lc]
+        self._last_status_update = 0.0
+        
+        # Manual blitting: animated artists are drawn over a background cached on every full draw
+        self._background = None
+        for artist in self._artists:
+            artist.set_animated(True)
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
 
 
     def _get_color_map(self):
@@ -71,10 +123,12 @@ class DashboardManager:
         ax_3d = fig.add_subplot(gs[6:12, 0], projection='3d')
         ax_3d.set_title("3D Skeleton View", fontsize=10)
         ax_3d.view_init(elev=15., azim=70)
+        ax_3d.set_proj_type('ortho') # Cheaper, static projection (no perspective divide)
 
         # Right columns: angle plots 
         AXES_DASHBOARD = {}
         ANGLE_LINES = {}
+        VALUE_TEXTS = {}
         for i, key in enumerate(self.angle_keys):
             row, col_offset = i // 2, i % 2 
             ax = fig.add_subplot(gs[row, 1 + col_offset])
@@ -86,6 +140,13 @@ class DashboardManager:
             line, = ax.plot([], [], lw=1.5, color=self.color_map[key])
             ANGLE_LINES[key] = line
             
+            # Live value readout drawn inside the axes (blittable, unlike the title)
+            VALUE_TEXTS[key] = ax.text(0.99, 0.95, "", transform=ax.transAxes, ha='right', va='top',
+                                       fontsize=8, color=self.color_map[key])
+            
+            # Fixed X window: the history is plotted against a rolling 0..HISTORY_LIMIT index
+            ax.set_xlim(0, self.HISTORY_LIMIT)
+            
             # Set Y limits based on angle type
             if 'Bend' in key or 'Vertical' in key:
                 ax.set_ylim([0, 180])
@@ -101,7 +162,7 @@ class DashboardManager:
                                    fontsize=9, va='top', 
                                    bbox=dict(facecolor='white', alpha=0.8, edgecolor='black'))
 
-        return fig, ax_webcam, ax_3d, AXES_DASHBOARD, ANGLE_LINES, text_artist
+        return fig, ax_webcam, ax_3d, AXES_DASHBOARD, ANGLE_LINES, VALUE_TEXTS, text_artist
 
     def _setup_webcam_placeholder(self):
         """Initializes the webcam image artist using the exposed reset_frame."""
@@ -109,22 +170,23 @@ class DashboardManager:
         return im_artist
 
     def _setup_3d_placeholders(self):
-        """Initializes 3D scatter plot and skeleton lines."""
+        """Initializes 3D scatter plot and the skeleton as a single line collection."""
         scatter_3d = self.ax_3d.scatter(np.zeros(self.REQUIRED_JOINTS), 
                                         np.zeros(self.REQUIRED_JOINTS), 
                                         np.zeros(self.REQUIRED_JOINTS), s=30)
         
-        skeleton_lines = []
-        for seg in self.skeleton_segments.values():
-            for s, e in seg['links']:
-                line_3d, = self.ax_3d.plot([0, 0], [0, 0], [0, 0], color=seg['color'], linewidth=3)
-                skeleton_lines.append((line_3d, s, e))
+        # Segment endpoints come from the precomputed kinematics.SEG_LINKS index array
+        self._seg_buf = np.zeros((len(kinematics.SEG_LINKS), 2, 3)) # Reused segment array, written in place
+        
+        skeleton_lc = Line3DCollection(self._seg_buf.copy(), colors=kinematics.SEG_COLORS, linewidths=3)
+        self.ax_3d.add_collection3d(skeleton_lc)
         
+        # Fixed, pelvis-centred limits sized for a standard human (2 units wide)
         self.ax_3d.set_xlim([-1, 1])
         self.ax_3d.set_ylim([-1, 1])
         self.ax_3d.set_zlim([-1, 1])
         
-        return scatter_3d, skeleton_lines
+        return scatter_3d, skeleton_lc
 
     def _setup_buttons(self):
         """Initializes the Start/Stop, Replay, and Video buttons."""
@@ -146,104 +208,182 @@ class DashboardManager:
 
     def reset_history(self):
         """Clears all angle history for a fresh recording/replay."""
-        self.angle_history = {k: [] for k in self.angle_keys}
+        self._hist.fill(0)
+        self._hist_idx = 0
+        with self._latest['lock']:
+            self._latest['snapshot'] = None
+            self._last_drawn_version = self._result_version
+        for line in self.ANGLE_LINES.values():
+            line.set_data([], [])
+        self._shown_values.fill(np.nan)
+        for text in self.VALUE_TEXTS.values():
+            text.set_text("")
 
     def get_artists(self):
-        """Returns all artists that need to be updated in the animation loop."""
-        return [self.im_artist, self.scatter_3d, self.text_artist] + \
-               list(self.ANGLE_LINES.values()) + \
-               [ln for ln, _, _ in self.skeleton_lines]
+        """Returns all artists that need to be updated in the animation loop (cached list)."""
+        return self._artists
+
+    def _draw_artists(self):
+        """Draws the animated artists, re-projecting the 3D ones first."""
+        # Only Axes3D.draw projects its children; draw_artist alone would reuse the last
+        # projection (stale scatter offsets, and no skeleton at all: set_segments clears the
+        # projected 2D segments). ax_3d.M stays valid because the 3D view never changes.
+        self.scatter_3d.do_3d_projection()
+        self.skeleton_lc.do_3d_projection()
+        for artist in self._artists:
+            self.fig.draw_artist(artist)
+
+    def _on_draw(self, event):
+        """Full redraw (startup, resize, button hover): re-cache the static background, then overlay the artists."""
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+
+    def blit(self):
+        """Redraws only the animated artists over the cached background (main thread only)."""
+        canvas = self.fig.canvas
+        if self._background is None:
+            canvas.draw_idle() # First frame: the draw_event handler caches the background
+            return
+        canvas.restore_region(self._background)
+        self._draw_artists()
+        canvas.blit(self.fig.bbox)
+
+    def set_status(self, text):
+        """Per-frame status text, refreshed at most every STATUS_INTERVAL seconds."""
+        now = time.monotonic()
+        if now - self._last_status_update < self.STATUS_INTERVAL:
+            return
+        self._last_status_update = now
+        self.text_artist.set_text(text)
 
     def update_dashboard(self, result, vis_frame, angle_keys):
         """
         Processes keypoints from result, updates 3D skeleton, angle plots, 
-        and the webcam image.
+        and the webcam image. Only artist data is touched (no titles or
+        axis limits), so the figure can be redrawn with blitting.
+        Synchronous path (submit + render) used when no producer thread is running.
         """
-        
-        # 1. Update Webcam Display
-        self.im_artist.set_data(vis_frame)
+        self.submit(result, vis_frame)
+        self.render()
 
-        # 2. Extract Keypoints and Update 3D/Angles
-        kp = None
+    def submit(self, result, vis_frame):
+        """
+        Producer side (any thread): extracts keypoints and computes angles, then
+        publishes them to the latest-value slot. An unrendered snapshot is simply
+        overwritten, so a slow renderer never builds up a backlog.
+        """
+        kp_buf = self._kp_buf
         # Result structure is {'predictions': [[{keypoints: [..]}]]}
         preds = result.get('predictions', [])
         
         # Safely extract keypoints from the first detected person
         if preds and preds[0] and 'keypoints' in preds[0] and preds[0]['keypoints'] is not None:
             # Note: We assume keypoints are stored as lists/arrays in the JSON
-            kp = np.array(preds[0]['keypoints'])
+            src = np.asarray(preds[0]['keypoints'], dtype=np.float32)
+            n = min(self.REQUIRED_JOINTS, src.shape[0])
+            dims = min(3, src.shape[1])
             
-            # Flip Y axis (consistent with typical conventions)
-            if kp.shape[1] >= 2:
-                kp[:, 1] = -kp[:, 1]
-        
-        if kp is not None:
-            # Calculate and plot angles
-            angles = kinematics.process_all_angles(kp, angle_keys)
+            # Copy into the preallocated buffer (unused joints/dims stay zero)
+            kp_buf.fill(0)
+            kp_buf[:n, :dims] = src[:n, :dims]
             
-            # Update 3D plot
-            self._update_3d_plot(kp)
+            # Flip Y axis (consistent with typical conventions)
+            if dims >= 2:
+                kp_buf[:n, 1] *= -1
             
+            # Calculate angles
+            angles = kinematics.process_all_angles(kp_buf[:n], self.angle_keys)
         else:
-            # If no keypoints, use a dummy array for visualization updates
-            angles = {key: 0.0 for key in angle_keys}
-            kp = np.zeros((self.REQUIRED_JOINTS, 3), dtype=np.float32)
-            self._update_3d_plot(kp) # clear 3D view
-            
+            # If no keypoints, publish an all-zero pose (clears the 3D view)
+            kp_buf.fill(0)
+            n = self.REQUIRED_JOINTS
+            angles = {}
+        
+        with self._latest['lock']:
+            np.copyto(self._latest['kp'], kp_buf)
+            self._latest['snapshot'] = (vis_frame, n, angles)
+            self._result_version += 1
 
-        # 3. Update Angle Lines and Titles
-        for key in angle_keys:
-            val = angles.get(key, 0.0)
-            self.angle_history[key].append(val)
-            if len(self.angle_history[key]) > self.HISTORY_LIMIT:
-                self.angle_history[key].pop(0)
-                
-            x = np.arange(len(self.angle_history[key]))
-            self.ANGLE_LINES[key].set_data(x, self.angle_history[key])
-            
-            # Dynamically set X limits to scroll the plot
-            self.AXES_DASHBOARD[key].set_xlim(max(0, len(x) - self.HISTORY_LIMIT), len(x))
-            
-            # Update title with current angle value
-            self.AXES_DASHBOARD[key].set_title(f"{key}: {val}°", 
-                                              fontsize=9, color=self.color_map[key])
+    def render(self):
+        """
+        Consumer side (animation callback): applies the newest snapshot to the artists.
+        Returns False if nothing new was published since the last call.
+        """
+        # Lock-free fast path: animation ticks without a new pose do no work at all
+        if self._last_drawn_version == self._result_version:
+            return False
+        
+        with self._latest['lock']:
+            snapshot = self._latest['snapshot']
+            self._latest['snapshot'] = None
+            self._last_drawn_version = self._result_version
+            if snapshot is not None:
+                np.copyto(self._render_kp, self._latest['kp'])
+        if snapshot is None:
+            return False
+        vis_frame, n, angles = snapshot
+        kp = self._render_kp[:n]
+        
+        # 1. Update Webcam Display (at the reduced image cadence; None = shown in a separate viewer)
+        if vis_frame is not None and self._img_frame_counter % self._img_interval == 0:
+            self.im_artist.set_data(vis_frame)
+        self._img_frame_counter += 1
+
+        # 2. Update 3D plot
+        self._update_3d_plot(kp)
+
+        # 3. Push the new sample into the ring buffer (one column write, O(1))
+        limit = self.HISTORY_LIMIT
+        slot = self._hist_idx % limit
+        values = np.fromiter((angles.get(key, 0.0) for key in self.angle_keys),
+                             dtype=np.float32, count=len(self.angle_keys))
+        self._hist[:, slot] = values
+        self._hist[:, slot + limit] = values
+        self._hist_idx += 1
+        
+        # Oldest-to-newest window as a view into the mirrored buffer
+        count = min(self._hist_idx, limit)
+        start = slot + 1 if self._hist_idx >= limit else 0
+        window = self._hist[:, start:start + count]
+        x = self._x[:count]
+        
+        # 4. Update Angle Lines
+        for i, key in enumerate(self.angle_keys):
+            self.ANGLE_LINES[key].set_data(x, window[i])
+        
+        # 5. Re-format only the readouts whose displayed value changed (titles are static)
+        for i in np.flatnonzero(values != self._shown_values):
+            self.VALUE_TEXTS[self.angle_keys[i]].set_text(self.VALUE_FORMAT.format(values[i]))
+        self._shown_values[:] = values
+        return True
 
 
     def _update_3d_plot(self, kp):
         """Updates the scatter plot and skeleton lines."""
+        # Express the pose relative to the pelvis (index 0) so the subject stays centred
+        # inside the fixed [-1, 1] axes; the limits never change, keeping the 3D view blittable
+        if kp.shape[0] > 0:
+            kp = kp - kp[0:1]
+        
         pts_count = min(self.REQUIRED_JOINTS, kp.shape[0])
-        xs = kp[:pts_count, 0]
-        ys = kp[:pts_count, 1]
-        zs = kp[:pts_count, 2] if kp.shape[1] > 2 else np.zeros(pts_count)
-        
-        # Pad with zeros if fewer than 17 joints are detected
-        if pts_count < self.REQUIRED_JOINTS:
-            pad = self.REQUIRED_JOINTS - pts_count
-            xs = np.concatenate([xs, np.zeros(pad)])
-            ys = np.concatenate([ys, np.zeros(pad)])
-            zs = np.concatenate([zs, np.zeros(pad)])
+        dims = min(3, kp.shape[1])
+        
+        # Write into the preallocated (3, 17) buffer; missing joints/dims stay at zero
+        xyz = self._xyz_buf
+        xyz[:dims, :pts_count] = kp[:pts_count, :dims].T
+        xyz[dims:, :pts_count] = 0
+        xyz[:, pts_count:] = 0
             
         # Update scatter plot
-        self.scatter_3d._offsets3d = (xs, ys, zs)
+        self.scatter_3d._offsets3d = (xyz[0], xyz[1], xyz[2])
         
-        # Recenter and rescale axes based on pelvis position (index 0)
-        if kp.shape[0] > 0 and (kp[0] != 0).any(): # Check if keypoints are non-zero
-            center = kp[0]
-            center_z = center[2] if center.shape[0] > 2 else 0
-            
-            # Adjust range based on a standard human size (2 units wide)
-            self.ax_3d.set_xlim([center[0] - 1, center[0] + 1])
-            self.ax_3d.set_ylim([center[1] - 1, center[1] + 1])
-            self.ax_3d.set_zlim([center_z - 1, center_z + 1])
-
-        # Update skeleton lines
-        for line_obj, s, e in self.skeleton_lines:
-            if s < kp.shape[0] and e < kp.shape[0] and kp.shape[0] >= self.REQUIRED_JOINTS:
-                p1 = kp[s]
-                p2 = kp[e]
-                line_obj.set_data_3d([p1[0], p2[0]], [p1[1], p2[1]], [p1[2] if p1.shape[0] > 2 else 0, p2[2] if p2.shape[0] > 2 else 0])
-            else:
-                 line_obj.set_data_3d([0, 0], [0, 0], [0, 0]) # Hide lines if data is invalid/missing
+        # Update skeleton lines: one gather of all segment endpoints, one set_segments call
+        if kp.shape[0] >= self.REQUIRED_JOINTS:
+            dims = min(kp.shape[1], 3) # 2D keypoints keep z = 0
+            self._seg_buf[..., :dims] = kp[kinematics.SEG_LINKS, :dims]
+        else:
+            self._seg_buf.fill(0) # Hide lines if data is invalid/missing
+        self.skeleton_lc.set_segments(self._seg_buf)
 
     def cleanup(self, frame_gen):
         """Performs final cleanup on stop/quit."""
@@ -0,0 +1,60 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import cv2
+
+
+def _viewer_loop(shm_name, shape, lock, new_frame, stop, title):
+    """Display process: shows the shared frame in an OpenCV window whenever a new one is published."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        view = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        frame = np.zeros(shape, dtype=np.uint8)
+        while not stop.is_set():
+            if new_frame.wait(0.05):
+                new_frame.clear()
+                with lock:
+                    np.copyto(frame, view)
+                cv2.imshow(title, frame)
+            cv2.waitKey(1) # Keeps the window responsive between frames
+    finally:
+        cv2.destroyAllWindows()
+        shm.close()
+
+
+class FrameViewer:
+    """
+    Shows camera frames in a separate process (cv2.imshow), so image display
+    does not compete with the Matplotlib plots or the inference thread.
+    Frames are handed over through a single shared-memory slot (latest wins).
+    """
+    def __init__(self, shape=(480, 640, 3), title="Webcam"):
+        self.shape = shape
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self._view = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+        # Spawn, not fork: the parent already runs Tk, CUDA and torch threads, none of which survive a fork
+        ctx = mp.get_context('spawn')
+        self._lock = ctx.Lock()
+        self._new_frame = ctx.Event()
+        self._stop = ctx.Event()
+        self._process = ctx.Process(target=_viewer_loop, daemon=True,
+                                   args=(self._shm.name, shape, self._lock, self._new_frame, self._stop, title))
+        self._process.start()
+
+    def publish(self, frame):
+        """Copies a BGR frame into the shared slot (resized in place if needed) and wakes the viewer."""
+        if frame is None or frame.size == 0:
+            return
+        with self._lock:
+            if frame.shape == self.shape:
+                np.copyto(self._view, frame)
+            else:
+                cv2.resize(frame, (self.shape[1], self.shape[0]), dst=self._view)
+        self._new_frame.set()
+
+    def close(self):
+        """Stops the display process and frees the shared memory."""
+        self._stop.set()
+        self._process.join(timeout=1.0)
+        self._shm.close()
+        self._shm.unlink()
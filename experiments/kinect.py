@@ -5,19 +5,17 @@ from mpl_toolkits.mplot3d import Axes3D
 # Pose data string from the user
 data_string = "3.296570,84.285820,-241.265750,-0.000010,29.699500,-0.000020,0.000000,21.697960,0.000000,0.000000,0.698960,0.000020,0.000000,6.355510,-0.000020,0.000000,14.446170,0.000020,1.629570,-0.300230,-0.129050,14.958850,0.000020,0.000020,21.190070,0.000010,0.000000,23.478280,-0.000020,-0.000040,-1.592280,-0.323540,-0.129030,-14.679210,-0.000010,0.000020,-22.545760,-0.000010,-0.000020,-23.715260,0.000010,0.000000,7.300280,-0.155230,3.317370,0.000000,-40.307770,0.000000,0.000000,-33.547820,-0.000020,0.000000,0.000000,11.502540,-7.083740,-0.169650,3.317350,0.000000,-38.469010,0.000000,0.000000,-35.988310,0.000000,0.000000,-0.000010,11.503740 "
 
-# Parse the data: convert to float array, ignoring any extra elements if present
-coords_list = [float(x) for x in data_string.split(',') if x.strip()]
+# Parse the data: NumPy converts the tokens in one call (no per-token Python floats), ignoring any extra elements if present
+coords_flat = np.array(data_string.strip().rstrip(',').split(','), dtype=np.float64)
 
 num_joints = 17
 expected_length = num_joints * 3
 
-if len(coords_list) > expected_length:
-    coords_flat = np.array(coords_list[:expected_length])
-    print(f"Warning: Input data contained {len(coords_list)} values. Taking only the first {expected_length} for 17 joints.")
-elif len(coords_list) < expected_length:
-    raise ValueError(f"Error: Input data contained only {len(coords_list)} values, but {expected_length} were expected for 17 joints.")
-else:
-    coords_flat = np.array(coords_list)
+if len(coords_flat) > expected_length:
+    print(f"Warning: Input data contained {len(coords_flat)} values. Taking only the first {expected_length} for 17 joints.")
+    coords_flat = coords_flat[:expected_length]
+elif len(coords_flat) < expected_length:
+    raise ValueError(f"Error: Input data contained only {len(coords_flat)} values, but {expected_length} were expected for 17 joints.")
 
 # Reshape into a (17 joints, 3 coordinates) array
 coords_3d = coords_flat.reshape(num_joints, 3)
@@ -1,4 +1,6 @@
+import math
 import numpy as np
+from numba import njit
 import json
 import datetime
 import warnings
@@ -28,6 +30,10 @@ SKELETON_SEGMENTS = {
     'Left_Leg': {'color': 'lime', 'links': [(0, 4), (4, 5), (5, 6)]}
 }
 
+# Flattened skeleton for batched drawing: kp[SEG_LINKS] gathers every segment as (N, 2, 3)
+SEG_LINKS = np.array([link for seg in SKELETON_SEGMENTS.values() for link in seg['links']], dtype=np.intp)
+SEG_COLORS = [seg['color'] for seg in SKELETON_SEGMENTS.values() for _ in seg['links']]
+
 # --- COMPLETE LIST OF 23 KINEMATIC ANGLES (Organized for Dashboard Layout) ---
 ANGLE_KEYS = [
     # 1. Neck/Head (3D + 1 simple vertical)
@@ -54,12 +60,22 @@ ANGLE_KEYS = [
     "R_Knee (Bend)", "L_Knee (Bend)",
 ]
 
+# --- Simple bend + vertical angles, evaluated together over a table of (A, B, C) triplets ---
+UP_AXIS = np.array([0.0, 1.0, 0.0]) # World vertical (Y-up)
+# The vertical angle of Start->End is the angle at Start between End and Start + UP_AXIS,
+# so it rides along as a synthetic triplet (End, Start, Start) with UP_AXIS added to C
+BEND_TRIPLETS = np.array([[1, 2, 3], [4, 5, 6], [14, 15, 16], [11, 12, 13], [8, 7, 7]], dtype=np.intp)
+BEND_OFFSETS = np.zeros((len(BEND_TRIPLETS), 3)) # Added to point C of each triplet
+BEND_OFFSETS[4] = UP_AXIS
+BEND_NAMES = ["R_Knee (Bend)", "L_Knee (Bend)", "R_Elbow (Bend)", "L_Elbow (Bend)", "Torso-Neck (Vertical)"]
+
 # ---------------- KINEMATIC HELPERS ----------------
 def calculate_3d_angle(A, B, C):
     """Calculates the 3D angle at joint B defined by segments BA and BC."""
     v1 = A - B
     v2 = C - B
-    denom = np.linalg.norm(v1) * np.linalg.norm(v2)
+    # Plain sqrt of the dot products: np.linalg.norm's dispatch dwarfs the math for 3-vectors
+    denom = math.sqrt(v1 @ v1) * math.sqrt(v2 @ v2)
     if denom == 0:
         return 0.0
     cosv = np.clip(np.dot(v1, v2) / denom, -1.0, 1.0)
@@ -68,196 +84,352 @@ def calculate_3d_angle(A, B, C):
 def calculate_vertical_angle(Start, End):
     """Calculates the angle of a segment (Start->End) relative to the vertical axis (Y-up)."""
     seg = End - Start
-    norm = np.linalg.norm(seg)
+    norm = math.sqrt(seg @ seg)
     if norm == 0:
         return 0.0
-    cosv = np.clip(np.dot(seg, np.array([0.0, 1.0, 0.0])) / norm, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
+    cosv = min(max(seg[1] / norm, -1.0), 1.0) # seg . UP_AXIS is just the Y component
+    return math.degrees(math.acos(cosv))
+
+@njit(cache=True)
+def _norm3(v):
+    """Length of a 3-vector."""
+    return math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
+@njit(cache=True, error_model='numpy')
+def _normalize3(v):
+    """Unit vector along a 3-vector (new array)."""
+    inv = 1.0 / _norm3(v)
+    out = np.empty(3)
+    out[0] = v[0] * inv
+    out[1] = v[1] * inv
+    out[2] = v[2] * inv
+    return out
+
+@njit(cache=True)
+def _cross3(a, b):
+    """Cross product of two 3-vectors."""
+    out = np.empty(3)
+    out[0] = a[1] * b[2] - a[2] * b[1]
+    out[1] = a[2] * b[0] - a[0] * b[2]
+    out[2] = a[0] * b[1] - a[1] * b[0]
+    return out
+
+@njit(cache=True)
+def _set_columns3(x_axis, y_axis, z_axis, R):
+    """Writes three axes as the columns of the C-contiguous (3, 3) matrix R (np.vstack([...]).T)."""
+    for i in range(3):
+        R[i, 0] = x_axis[i]
+        R[i, 1] = y_axis[i]
+        R[i, 2] = z_axis[i]
+
+@njit(cache=True)
+def _set_identity3(R):
+    """Overwrites the (3, 3) matrix R with the identity."""
+    for i in range(3):
+        for j in range(3):
+            R[i, j] = 1.0 if i == j else 0.0
 
+@njit(cache=True)
+def _matmul_t3(A, B, out):
+    """Writes A @ B.T for (3, 3) matrices into out (27 multiply-adds, no BLAS call)."""
+    for i in range(3):
+        for j in range(3):
+            out[i, j] = A[i, 0] * B[j, 0] + A[i, 1] * B[j, 1] + A[i, 2] * B[j, 2]
+
+@njit(cache=True, error_model='numpy')
 def compute_rotation_matrix(proximal_vec, distal_vec, invert_z=False):
     """
     Computes a rotation matrix (local coordinate system) based on two segment vectors.
     Distal vector defines the Y-axis (length of the bone/segment).
     If invert_z is True, the resulting Z-axis is flipped, ensuring mirrored symmetry.
     """
-    if np.linalg.norm(proximal_vec) < 1e-9 or np.linalg.norm(distal_vec) < 1e-9:
-        return np.eye(3)
+    R = np.empty((3, 3))
+    _rotation_matrix_into(proximal_vec, distal_vec, invert_z, R)
+    return R
+
+@njit(cache=True, error_model='numpy')
+def _rotation_matrix_into(proximal_vec, distal_vec, invert_z, R, p_norm=-1.0):
+    """compute_rotation_matrix writing into a caller-owned (3, 3) buffer.
+    A p_norm >= 0 means proximal_vec is already unit and p_norm is its original length.
+    """
+    if p_norm < 0:
+        p_norm = _norm3(proximal_vec)
+        p = proximal_vec / p_norm
+    else:
+        p = proximal_vec
+    d_norm = _norm3(distal_vec)
+    if p_norm < 1e-9 or d_norm < 1e-9:
+        _set_identity3(R)
+        return
     
-    p = proximal_vec / np.linalg.norm(proximal_vec)
-    d = distal_vec / np.linalg.norm(distal_vec)
+    d = distal_vec / d_norm
     
     y_axis = d
-    x_temp = np.cross(p, d)
+    x_temp = _cross3(p, d)
     
-    if np.linalg.norm(x_temp) < 1e-6:
+    x_norm = _norm3(x_temp)
+    
+    if x_norm < 1e-6:
         # Fallback for near-collinear vectors: use a world axis for x-temp
-        if np.abs(np.dot(d, np.array([1.0, 0.0, 0.0]))) < 0.8:
-            x_temp = np.cross(np.array([1.0, 0.0, 0.0]), d)
+        if abs(d[0]) < 0.8: # |d . X|
+            x_temp = _cross3(np.array([1.0, 0.0, 0.0]), d)
         else:
-            x_temp = np.cross(np.cross(d, np.array([0.0, 0.0, 1.0])), d)
-            
-        if np.linalg.norm(x_temp) < 1e-6:
-             return np.eye(3)
+            x_temp = _cross3(_cross3(d, np.array([0.0, 0.0, 1.0])), d)
+        
+        x_norm = _norm3(x_temp)
+        if x_norm < 1e-6:
+             _set_identity3(R)
+             return
         
-    z_axis = x_temp / np.linalg.norm(x_temp)
+    z_axis = x_temp / x_norm
     
     # --- Symmetry Fix ---
     if invert_z:
         z_axis *= -1
     # --------------------
     
-    x_axis = np.cross(y_axis, z_axis)
-    x_axis /= np.linalg.norm(x_axis) 
+    # y and z are orthonormal, so their cross product is already unit length
+    x_axis = _cross3(y_axis, z_axis)
     
-    return np.vstack([x_axis, y_axis, z_axis]).T
+    _set_columns3(x_axis, y_axis, z_axis, R)
 
+@njit(cache=True)
 def rotation_matrix_to_euler_angles(R):
     """Converts a rotation matrix to ZYX (Tait-Bryan) Euler angles (in degrees).
     The return order is (Rx, Ry, Rz).
     """
-    r_x = np.arcsin(np.clip(R[2, 0], -1.0, 1.0))
-    cos_rx = np.cos(r_x)
+    s_x = min(max(R[2, 0], -1.0), 1.0)
+    r_x = np.arcsin(s_x)
     
-    if abs(cos_rx) < 1e-6:
+    # cos(asin(s)) = sqrt(1 - s^2) >= 0, and atan2 is invariant to positive scaling,
+    # so the former division of both arguments by cos(r_x) is dropped
+    if 1.0 - s_x * s_x < 1e-12: # Gimbal lock: |cos(r_x)| < 1e-6
         r_y = 0.0
         r_z = np.arctan2(R[1, 1], R[0, 1])
     else:
-        r_y = np.arctan2(R[1, 0] / cos_rx, R[0, 0] / cos_rx)
-        r_z = np.arctan2(R[2, 1] / cos_rx, R[2, 2] / cos_rx)
+        r_y = np.arctan2(R[1, 0], R[0, 0])
+        r_z = np.arctan2(R[2, 1], R[2, 2])
         
     return np.degrees(r_x), np.degrees(r_y), np.degrees(r_z)
 
 
-def calculate_anatomical_angles(kp):
-    """
-    Calculates 3D Euler angles for all ball-and-socket and axial joints.
-    The order corresponds to (X-Axis, Y-Axis, Z-Axis) rotation.
-    """
-    angles = {}
+# Output layout of _anatomical_core: 3 consecutive (X, Y, Z) slots per joint
+ANATOMICAL_JOINTS = ["Waist", "Neck", "R Shoulder", "L Shoulder", "R Hip", "L Hip"]
+# Minimum keypoint count required by each joint (mirrors the original kp.shape[0] checks)
+ANATOMICAL_MIN_JOINTS = [9, 10, 16, 13, 3, 6]
+ANATOMICAL_KEYS = [f"{joint} ({axis}-Axis Rotation)" for joint in ANATOMICAL_JOINTS for axis in "XYZ"]
+
+# Output layout of _all_angles_core and the keypoint count each entry needs
+ALL_ANGLE_NAMES = BEND_NAMES + ANATOMICAL_KEYS
+ALL_ANGLE_MIN_JOINTS = [int(t.max()) + 1 for t in BEND_TRIPLETS] + [m for m in ANATOMICAL_MIN_JOINTS for _ in range(3)]
+
+@njit(cache=True)
+def _store_euler(out, slot, R):
+    """Writes the (X, Y, Z) Euler angles of R into out[3 * slot : 3 * slot + 3]."""
+    rx, ry, rz = rotation_matrix_to_euler_angles(R)
+    out[3 * slot] = rx
+    out[3 * slot + 1] = ry
+    out[3 * slot + 2] = rz
+
+@njit(cache=True, error_model='numpy')
+def _anatomical_core(kp):
+    """Compiled numeric core of calculate_anatomical_angles; returns 18 angles (NaN if skipped)."""
+    n = kp.shape[0]
+    out = np.full(18, np.nan)
+    
+    # Rotation matrix scratch buffers, reused by every joint below
+    R_a = np.empty((3, 3))
+    R_b = np.empty((3, 3))
+    R_c = np.empty((3, 3))
     
     # --- WAIST/TORSO ROTATION (Joint Center: Torso 7) ---
-    if kp.shape[0] > 8:
+    if n > 8:
         # Define Pelvis Local Frame (R_local)
-        proximal_y = kp[7] - kp[0] # Y-axis: Pelvis -> Torso
-        proximal_y /= np.linalg.norm(proximal_y)
-        x_axis_ref = kp[4] - kp[1] # X-axis (Lateral): L_Hip (4) -> R_Hip (1)
-        x_axis_ref /= np.linalg.norm(x_axis_ref)
-        z_axis = np.cross(proximal_y, x_axis_ref)
-        z_axis /= np.linalg.norm(z_axis)
-        x_axis = np.cross(proximal_y, z_axis)
-        x_axis /= np.linalg.norm(x_axis)
-        R_local = np.vstack([x_axis, proximal_y, z_axis]).T 
+        proximal_y = _normalize3(kp[7] - kp[0]) # Y-axis: Pelvis -> Torso
+        x_axis_ref = _normalize3(kp[4] - kp[1]) # X-axis (Lateral): L_Hip (4) -> R_Hip (1)
+        z_axis = _normalize3(_cross3(proximal_y, x_axis_ref))
+        x_axis = _cross3(proximal_y, z_axis) # Unit: cross of orthonormal vectors
+        R_local = R_a
+        _set_columns3(x_axis, proximal_y, z_axis, R_local)
         
         # Define Torso Segment Local Matrix (R_torso)
         distal_segment = kp[8] - kp[7] # Torso to Neck
-        torso_y = distal_segment / np.linalg.norm(distal_segment)
-        torso_x_temp = np.cross(x_axis_ref, torso_y)
-        torso_z = torso_x_temp / np.linalg.norm(torso_x_temp)
-        torso_x = np.cross(torso_y, torso_z)
-        torso_x /= np.linalg.norm(torso_x)
-        R_torso = np.vstack([torso_x, torso_y, torso_z]).T 
+        torso_y = _normalize3(distal_segment)
+        torso_z = _normalize3(_cross3(x_axis_ref, torso_y))
+        torso_x = _cross3(torso_y, torso_z) # Unit: cross of orthonormal vectors
+        R_torso = R_b
+        _set_columns3(torso_x, torso_y, torso_z, R_torso)
         
         # Rotation Matrix R_torso_relative_pelvis = R_torso @ R_local.T
-        R_relative = R_torso @ R_local.T
-        
-        rx, ry, rz = rotation_matrix_to_euler_angles(R_relative)
-        
-        angles["Waist (X-Axis Rotation)"] = round(rx, 1)
-        angles["Waist (Y-Axis Rotation)"] = round(ry, 1)
-        angles["Waist (Z-Axis Rotation)"] = round(rz, 1)
+        _matmul_t3(R_torso, R_local, R_c)
+        _store_euler(out, 0, R_c)
 
     # --- NECK ROTATION (Joint Center: Neck 8) ---
-    if kp.shape[0] > 9:
-        # Proximal vector: Torso (7) -> Neck (8)
+    if n > 9:
+        # Vertical spine segment (Torso 7 -> Neck 8): normalized once, it is the common
+        # proximal reference of the neck and both shoulders
+        torso_ref = kp[7] - kp[8]
+        torso_norm = _norm3(torso_ref)
+        torso_ref *= 1.0 / torso_norm
+        
         # Distal segment: Neck (8) -> Head (9)
-        Rm = compute_rotation_matrix(kp[7] - kp[8], kp[9] - kp[8])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["Neck (X-Axis Rotation)"] = round(rx, 1)
-        angles["Neck (Y-Axis Rotation)"] = round(ry, 1)
-        angles["Neck (Z-Axis Rotation)"] = round(rz, 1)
+        _rotation_matrix_into(torso_ref, kp[9] - kp[8], False, R_a, torso_norm)
+        _store_euler(out, 1, R_a)
 
-    # --- SHOULDER CALCULATION ---
-    
-    # Use the vertical spine segment as the common, stable proximal reference for both arms.
-    # Defines a vector pointing down the spine (Torso 7 -> Neck 8)
-    proximal_torso_ref = kp[7] - kp[8] 
-    proximal_torso_ref /= np.linalg.norm(proximal_torso_ref)
-    
-    # --- RIGHT SHOULDER (Joint Center: Shoulder 14) ---
-    if kp.shape[0] > 15:
-        # Proximal Reference (P): Vertical spine segment
-        # Distal Segment (D): Upper arm (Elbow 15 - Shoulder 14)
-        # No Z-inversion needed for the right side
-        Rm = compute_rotation_matrix(proximal_torso_ref, kp[15] - kp[14], invert_z=False)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Shoulder (X-Axis Rotation)"] = round(rx, 1)
-        angles["R Shoulder (Y-Axis Rotation)"] = round(ry, 1)
-        angles["R Shoulder (Z-Axis Rotation)"] = round(rz, 1)
-        
-    # --- LEFT SHOULDER (Joint Center: Shoulder 11) ---
-    if kp.shape[0] > 12:
-        # Proximal Reference (P): Vertical spine segment
-        # Distal Segment (D): Upper arm (Elbow 12 - Shoulder 11)
+    # --- SHOULDERS ---
+    if n > 12:
+        # --- RIGHT SHOULDER (Joint Center: Shoulder 14), no Z-inversion ---
+        if n > 15:
+            _rotation_matrix_into(torso_ref, kp[15] - kp[14], False, R_a, torso_norm)
+            _store_euler(out, 2, R_a)
         
-        # --- FIX: Invert the Z-axis of the local coordinate system 
-        # to ensure the left arm mirrors the right arm's rotation plane.
-        
-        # We use the ORIGINAL proximal_torso_ref (no * -1) but invert the Z axis 
-        # in the rotation matrix calculation.
-        Rm = compute_rotation_matrix(proximal_torso_ref, kp[12] - kp[11], invert_z=True)
-        
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["L Shoulder (X-Axis Rotation)"] = round(rx, 1)
-        angles["L Shoulder (Y-Axis Rotation)"] = round(ry, 1)
-        angles["L Shoulder (Z-Axis Rotation)"] = round(rz, 1)
+        # --- LEFT SHOULDER (Joint Center: Shoulder 11) ---
+        # Z-axis inverted so the left arm mirrors the right arm's rotation plane
+        _rotation_matrix_into(torso_ref, kp[12] - kp[11], True, R_a, torso_norm)
+        _store_euler(out, 3, R_a)
 
     # --- RIGHT HIP (Joint Center: Hip 1) ---
-    if kp.shape[0] > 2:
-        Rm = compute_rotation_matrix(kp[0] - kp[1], kp[2] - kp[1])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Hip (X-Axis Rotation)"] = round(rx, 1)
-        angles["R Hip (Y-Axis Rotation)"] = round(ry, 1)
-        angles["R Hip (Z-Axis Rotation)"] = round(rz, 1)
+    if n > 2:
+        _rotation_matrix_into(kp[0] - kp[1], kp[2] - kp[1], False, R_a)
+        _store_euler(out, 4, R_a)
 
     # --- LEFT HIP (Joint Center: Hip 4) ---
-    if kp.shape[0] > 5:
-        Rm = compute_rotation_matrix(kp[0] - kp[4], kp[5] - kp[4])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["L Hip (X-Axis Rotation)"] = round(rx, 1)
-        angles["L Hip (Y-Axis Rotation)"] = round(ry, 1)
-        angles["L Hip (Z-Axis Rotation)"] = round(rz, 1)
+    if n > 5:
+        _rotation_matrix_into(kp[0] - kp[4], kp[5] - kp[4], False, R_a)
+        _store_euler(out, 5, R_a)
         
+    return out
+
+
+@njit(cache=True, error_model='numpy')
+def _simple_angles(kp, triplets, offsets, out):
+    """Compiled calculate_3d_angle over (A, B, C) index triplets, with offsets added to C; NaN if out of range."""
+    n = kp.shape[0]
+    for t in range(triplets.shape[0]):
+        a, b, c = triplets[t, 0], triplets[t, 1], triplets[t, 2]
+        if a >= n or b >= n or c >= n:
+            out[t] = np.nan
+            continue
+        dot = 0.0
+        n1 = 0.0
+        n2 = 0.0
+        for k in range(3):
+            v1 = kp[a, k] - kp[b, k]
+            v2 = kp[c, k] + offsets[t, k] - kp[b, k]
+            dot += v1 * v2
+            n1 += v1 * v1
+            n2 += v2 * v2
+        denom = math.sqrt(n1) * math.sqrt(n2)
+        # Degenerate (zero-length) segments keep the scalar version's 0.0 result
+        cosv = dot / denom if denom > 0 else 1.0
+        out[t] = math.degrees(math.acos(min(max(cosv, -1.0), 1.0)))
+
+@njit(cache=True)
+def _all_angles_core(kp, triplets, offsets):
+    """Single compiled pass producing every angle: simple bends/vertical first, then the 18 Euler components."""
+    count = triplets.shape[0]
+    out = np.empty(count + 18)
+    _simple_angles(kp, triplets, offsets, out[:count])
+    out[count:] = _anatomical_core(kp)
+    return out
+
+
+def calculate_anatomical_angles(kp):
+    """
+    Calculates 3D Euler angles for all ball-and-socket and axial joints.
+    The order corresponds to (X-Axis, Y-Axis, Z-Axis) rotation.
+    """
+    kp = np.ascontiguousarray(kp, dtype=np.float64)
+    values = np.round(_anatomical_core(kp), 1).tolist()
+    
+    angles = {}
+    for slot, min_joints in enumerate(ANATOMICAL_MIN_JOINTS):
+        if kp.shape[0] >= min_joints:
+            for i in range(3 * slot, 3 * slot + 3):
+                angles[ANATOMICAL_KEYS[i]] = values[i]
     return angles
 
 def process_all_angles(kp, ANGLE_KEYS):
     """Calculates all 23 angles (simple bend + 3D Euler components)."""
-    all_angles = {}
+    kp = np.ascontiguousarray(kp, dtype=np.float64)
     
-    # 1. Simple Bend Angles (Knee and Elbows)
-    checks = [ 
-        (1,2,3,"R_Knee"), (4,5,6,"L_Knee"), 
-        (14,15,16,"R_Elbow"), 
-        (11,12,13,"L_Elbow") 
-    ]
-    for A,B,C,name in checks:
-        if C < kp.shape[0]:
-            all_angles[f"{name} (Bend)"] = round(calculate_3d_angle(kp[A], kp[B], kp[C]), 1)
-            
-    # 2. Simple Vertical Angle (Torso)
-    if 8 < kp.shape[0]:
-        all_angles["Torso-Neck (Vertical)"] = round(calculate_vertical_angle(kp[7], kp[8]), 1)
-        
-    # 3. Complex 3D Euler Angles (Hip, Shoulder, Waist, Neck)
-    all_angles.update(calculate_anatomical_angles(kp))
+    # 1. Simple Bend/Vertical Angles and Complex 3D Euler Angles in one compiled call
+    values = np.round(_all_angles_core(kp, BEND_TRIPLETS, BEND_OFFSETS), 1).tolist()
     
-    return all_angles
+    # 2. Keep only the angles whose joints are present
+    n = kp.shape[0]
+    return {name: value for name, value, need in zip(ALL_ANGLE_NAMES, values, ALL_ANGLE_MIN_JOINTS) if n >= need}
+
+def _json_default(obj):
+    """json.dump fallback: converts NumPy arrays/scalars once, at save time."""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def save_pose_arrays(keypoints, scores, final_output_path):
+    """Saves the recorded (N, 17, 3) keypoints and (N, 17) scores as a compressed .npz."""
+    if len(keypoints):
+        try:
+            np.savez_compressed(final_output_path, keypoints=keypoints, scores=scores,
+                                frame_ids=np.arange(len(keypoints)))
+            print(f"[KINEMATICS] Saved {len(keypoints)} frames to {final_output_path}")
+            return f"Saved {len(keypoints)} frames to NPZ."
+        except Exception as e:
+            print(f"[KINEMATICS] Failed to save NPZ: {e}")
+            return f"Failed to save NPZ: ERROR ({e})"
+    else:
+        print("[KINEMATICS] No frames to save.")
+        return "No frames to save."
+
+class PoseRecording:
+    """Replay source over compact (N, 17, 3) keypoints / (N, 17) scores; per-frame dicts are built on demand."""
+
+    def __init__(self, keypoints, scores):
+        self.keypoints = keypoints
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.keypoints)
+
+    def __getitem__(self, index):
+        kp = self.keypoints[index]
+        # Frames with no detection were recorded as all-NaN rows
+        if np.isnan(kp).all():
+            return {'frame_id': index, 'predictions': []}
+        return {'frame_id': index,
+                'predictions': [{'keypoints': kp, 'keypoint_scores': self.scores[index]}]}
+
+def load_pose_recording(file_path, num_joints=17):
+    """Loads a .npz recording (or a legacy JSON one) into a PoseRecording."""
+    if file_path.endswith('.npz'):
+        with np.load(file_path) as data:
+            return PoseRecording(data['keypoints'], data['scores'])
+
+    # Legacy JSON: parse once, then keep only the compact arrays
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, list) or not data or 'predictions' not in data[0]:
+        raise ValueError("JSON file structure is invalid or empty.")
+
+    keypoints = np.full((len(data), num_joints, 3), np.nan, dtype=np.float32)
+    scores = np.full((len(data), num_joints), np.nan, dtype=np.float32)
+    for i, frame in enumerate(data):
+        preds = frame.get('predictions')
+        if not preds or not preds[0] or preds[0].get('keypoints') is None:
+            continue
+        kpts = np.asarray(preds[0]['keypoints'], dtype=np.float32)[:num_joints, :3]
+        keypoints[i, :kpts.shape[0], :kpts.shape[1]] = kpts
+        if preds[0].get('keypoint_scores') is not None:
+            s = np.asarray(preds[0]['keypoint_scores'], dtype=np.float32).reshape(-1)[:num_joints]
+            scores[i, :s.shape[0]] = s
+    return PoseRecording(keypoints, scores)
 
 def save_predictions_to_json(all_predictions, final_output_path):
     """Saves collected prediction data to a JSON file."""
     if all_predictions:
         try:
             with open(final_output_path, 'w') as f:
-                json.dump(all_predictions, f, indent=4)
+                json.dump(all_predictions, f, indent=4, default=_json_default)
             print(f"[KINEMATICS] Saved {len(all_predictions)} frames to {final_output_path}")
             return f"Saved {len(all_predictions)} frames to JSON."
         except Exception as e:
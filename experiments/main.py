@@ -6,18 +6,24 @@ for Live Analysis, Video Processing, and JSON Replay modes.
 """
 import numpy as np
 import cv2
+import torch
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 from mmpose.apis import MMPoseInferencer
 import datetime
 import json
 import warnings
 import sys
+import os
 import math
+import threading
+import tkinter
+import queue
+import time
 
 # Local Imports
 import kinematics
 from dashboard import DashboardManager
+from frame_viewer import FrameViewer
 
 # --- WARNING FILTER FIX ---
 warnings.filterwarnings(
@@ -31,10 +37,28 @@ warnings.filterwarnings(
 OUTPUT_JSON_PATH = "rom5.json" # Base filename for timestamping
 DEVICE = "cuda:0"  # change to 'cpu' if you don't have CUDA
 TARGET_VIDEO_FPS = 10 # Target processing FPS for video files
+VIDEO_READ_AHEAD = 16 # Decoded video frames buffered ahead of inference
+POSE3D_MODEL = 'human3d' # MMPoseInferencer pose3d alias
+USE_FP16 = True # Run the pose models under CUDA fp16 autocast (ignored on CPU)
+USE_TORCH_COMPILE = True # torch.compile the pose backbones once per process
+USE_PINNED_MEMORY = True # Stage input batches in pinned host memory for async H2D copies (CUDA only)
+USE_FRAME_VIEWER = False # Show live/video frames in a separate OpenCV process instead of the Matplotlib panel (leaves that panel blank)
+DETECT_INTERVAL = 1 # Run the person detector every N frames; in between, reuse the last boxes (1 = every frame; >1 not yet validated against per-frame detection)
+BBOX_EXPAND = 0.10 # Reused boxes are grown by this fraction so a moving subject stays inside
+CHUNK_FRAMES = 30 * 60 # Recording buffers grow one chunk (1 min at 30 FPS) at a time
+NUM_JOINTS = 17
 # ------------------------------------------------
 
+# Shape-stable workload (fixed 640x480 frames, fixed-size top-down crops): let cuDNN
+# autotune and cache the fastest conv kernels, and allow TF32 for fp32 matmuls/convs
+torch.backends.cudnn.benchmark = True
+torch.backends.cuda.matmul.allow_tf32 = True
+torch.backends.cudnn.allow_tf32 = True
+torch.set_float32_matmul_precision('high')
+
 # ---------------- GLOBAL STATE ----------------
 manager = None 
+frame_viewer = None # FrameViewer display process (USE_FRAME_VIEWER)
 inferencer = None
 results_gen = None
 frame_gen = None 
@@ -47,18 +71,44 @@ REPLAY_MODE = False      # True if currently playing back JSON or VIDEO
 VIDEO_MODE = False       # True if currently processing a video file
 stop_requested = False
 
+# Inference worker (producer thread feeding the dashboard)
+inference_thread = None
+worker_stop = None      # threading.Event that tells the current worker to exit
+stream_status = None    # Worker state: 'loading' while the model builds, then 'ended' or the raised Exception
+
 # Data Storage
 all_predictions = [] # Data collected in LIVE mode
+predictions_lock = threading.Lock() # all_predictions is appended by the worker, read by the UI
 frame_id = 0 
+# Columnar copy of the first person's pose per frame (NaN = no detection), saved as .npz
+KPTS_CHUNKS = []   # List of (CHUNK_FRAMES, 17, 3) float32 blocks
+SCORES_CHUNKS = [] # List of (CHUNK_FRAMES, 17) float32 blocks
 LOADED_FRAMES = []
 REPLAY_INDEX = 0
+
+# Event-driven redraw: the worker posts <<NewFrame>> when a result lands; replay is paced by a timer
+REPLAY_INTERVAL_MS = 50
+replay_timer = None
+redraw_pending = threading.Event() # Coalesces worker posts until the main loop has redrawn
+redraw_count = 0
 # ----------------------------------------------
 
 
+_END_OF_STREAM = object() # Capture-queue sentinel
+
+# Constant display placeholders, allocated once and read-only (never written by consumers)
+_REPLAY_PLACEHOLDER = np.full((480, 640, 3), 50, dtype=np.uint8) # Dark gray
+_REPLAY_PLACEHOLDER.setflags(write=False)
+_BLANK_FRAME = np.zeros((480, 640, 3), dtype=np.uint8)
+_BLANK_FRAME.setflags(write=False)
+
+
 # --- Custom Frame Generator for Camera or Video File ---
 class WebcamFrameGenerator:
     """Manages cv2.VideoCapture for live camera (index) or video file (path), 
-    with frame skipping enabled for video files to speed up processing."""
+    with frame skipping enabled for video files to speed up processing.
+    After start_capture(), frames are read on a background thread: a camera keeps only
+    the newest frame (older ones are dropped), a video file is read ahead in order."""
     def __init__(self, source):
         self.is_video_file = isinstance(source, str)
         self.cap = cv2.VideoCapture(source)
@@ -66,11 +116,27 @@ class WebcamFrameGenerator:
         if not self.cap.isOpened():
             raise IOError(f"ERROR: Could not open source: {source}.")
             
+        if not self.is_video_file:
+            # Ask for compressed MJPG over USB (set before the resolution so the driver
+            # negotiates the mode once); cuts bus bandwidth and driver-side latency
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        
         # Set resolution for camera (does nothing for video file)
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
         
-        self.current_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        # Keep only the newest frame in the driver queue (default V4L2 buffer is ~4 frames,
+        # which shows up as 100-200 ms of display lag). Video files are read sequentially.
+        if not self.is_video_file and not self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1):
+            print("[CAMERA] Warning: backend ignored CAP_PROP_BUFFERSIZE=1; live frames may lag.")
+        
+        self.current_frame = _BLANK_FRAME
+        
+        # Background capture (see start_capture); None means frames are read on demand
+        self.frame_queue = None
+        self.capture_stop = threading.Event()
+        self.capture_thread = None
+        self.dropped_frames = 0 # Camera frames overwritten before inference could take them
 
         # --- VIDEO FRAME SKIPPING LOGIC ---
         self.skip_frames = 0
@@ -87,47 +153,404 @@ class WebcamFrameGenerator:
         return self
 
     def __next__(self):
+        frame = None
+        if self.frame_queue is None:
+            frame = self._read_frame()
+            if frame is None:
+                self.cap.release() # On-demand reads: this thread owns the capture
+        else:
+            # Poll so a stop request ends the stream even if no end marker arrives
+            while not self.capture_stop.is_set():
+                try:
+                    frame = self.frame_queue.get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    continue
+        if frame is None or frame is _END_OF_STREAM:
+            raise StopIteration("End of stream reached.")
+        self.current_frame = frame
+        return frame
+
+    def _read_frame(self):
+        """Reads the next frame to process (applying video frame skipping); None at end of stream."""
         # --- VIDEO FRAME SKIPPING EXECUTION ---
         if self.is_video_file and self.skip_frames > 0:
             for _ in range(self.skip_frames):
-                # Read and discard frames to skip ahead, checking for end of stream
-                if not self.cap.read()[0]:
-                    self.cap.release()
-                    raise StopIteration("End of stream reached.")
+                # grab() advances past the frame without decoding/converting it
+                if not self.cap.grab():
+                    return None
         # --------------------------------------
 
-        ret, frame = self.cap.read()
-        if not ret:
+        # Only the frame we keep is decoded (grab + retrieve)
+        if not self.cap.grab():
+            return None
+        ret, frame = self.cap.retrieve()
+        return frame if ret else None
+
+    def start_capture(self):
+        """Moves cap.read() onto a background thread feeding a bounded queue."""
+        self.frame_queue = queue.Queue(maxsize=VIDEO_READ_AHEAD if self.is_video_file else 1)
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+
+    def _capture_loop(self):
+        """Capture thread: camera frames overwrite the 1-slot queue, video frames block until consumed."""
+        ended = False
+        try:
+            ended = self._capture_frames()
+        finally:
+            # VideoCapture is not thread-safe: once capture runs here, only this thread may release it
             self.cap.release()
-            raise StopIteration("End of stream reached.")
-        self.current_frame = frame
-        return frame
-
-    def get_rgb_frame(self):
-        # Convert BGR (OpenCV) to RGB (Matplotlib)
-        if self.current_frame.size > 0:
-            return cv2.cvtColor(self.current_frame, cv2.COLOR_BGR2RGB)
-        return np.zeros((480, 640, 3), dtype=np.uint8)
+            if not ended:
+                self._post_end_of_stream() # Stopped or failed early: wake a consumer waiting in __next__
+
+    def _capture_frames(self):
+        """Reads frames into the queue; True once the end marker was queued, False if stopped first."""
+        while not self.capture_stop.is_set():
+            frame = self._read_frame()
+            item = _END_OF_STREAM if frame is None else frame
+            if self.is_video_file or item is _END_OF_STREAM:
+                # Never drop video frames or the end marker; recheck stop while waiting
+                while not self.capture_stop.is_set():
+                    try:
+                        self.frame_queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+            else:
+                # Drop-oldest: the consumer always sees the newest camera frame
+                try:
+                    self.frame_queue.put_nowait(item)
+                except queue.Full:
+                    try:
+                        self.frame_queue.get_nowait()
+                        self.dropped_frames += 1
+                    except queue.Empty:
+                        pass
+                    self.frame_queue.put_nowait(item)
+            if item is _END_OF_STREAM:
+                return True
+        return False
+
+    def _post_end_of_stream(self):
+        """Posts the end marker without blocking, dropping queued frames to make room (used after a stop)."""
+        while True:
+            try:
+                self.frame_queue.put_nowait(_END_OF_STREAM)
+                return
+            except queue.Full:
+                try:
+                    self.frame_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get_rgb_frame(self, frame=None):
+        # BGR (OpenCV) -> RGB (Matplotlib) as a reversed-channel view: no copy here;
+        # imshow's set_data makes the one copy it needs when the frame is actually displayed.
+        # Defaults to the most recently read frame.
+        if frame is None:
+            frame = self.current_frame
+        if frame.size > 0:
+            return frame[..., ::-1]
+        return _BLANK_FRAME
 
     def release(self):
-        self.cap.release()
+        self.capture_stop.set()
+        if self.capture_thread is not None:
+            self.capture_thread.join(timeout=1.0) # The capture thread releases cap on its way out
+        else:
+            self.cap.release()
         
+
+# ---------------- INFERENCER SETUP ----------------
+
+def enable_fp16_autocast(pose_inferencer):
+    """Wraps test_step of the 2D and 3D pose models in CUDA fp16 autocast."""
+    # fp16 rather than bf16: MMPose decodes head outputs through NumPy, which has no bfloat16
+    impl = pose_inferencer.inferencer
+    pose2d = getattr(impl, 'pose2d_model', None)
+    models = [getattr(impl, 'model', None), getattr(pose2d, 'model', None)]
+    for model in models:
+        if model is None:
+            continue
+        def autocast_test_step(data, _test_step=model.test_step):
+            with torch.autocast(device_type='cuda', dtype=torch.float16):
+                return _test_step(data)
+        model.test_step = autocast_test_step
+
+
+def compile_backbones(pose_inferencer):
+    """Replaces the 2D/3D pose backbones with torch.compile'd modules (kernels are built on first use)."""
+    impl = pose_inferencer.inferencer
+    pose2d = getattr(impl, 'pose2d_model', None)
+    for model in (getattr(impl, 'model', None), getattr(pose2d, 'model', None)):
+        if model is not None and getattr(model, 'backbone', None) is not None:
+            # Default mode: the 2D model's batch is one crop per detected person, so its size
+            # varies per frame, which rules out the CUDA-graph based 'reduce-overhead' mode
+            model.backbone = torch.compile(model.backbone)
+
+
+def enable_pinned_transfers(pose_inferencer):
+    """Makes the 2D/3D data preprocessors copy input images from pinned memory with non_blocking H2D transfers."""
+    impl = pose_inferencer.inferencer
+    pose2d = getattr(impl, 'pose2d_model', None)
+    for model in (getattr(impl, 'model', None), getattr(pose2d, 'model', None)):
+        preprocessor = getattr(model, 'data_preprocessor', None)
+        if preprocessor is None or not hasattr(preprocessor, 'cast_data'):
+            continue
+        def pinned_cast_data(data, _cast_data=preprocessor.cast_data):
+            # Pageable tensors force a synchronous copy; pinned ones let the copy run async on the stream
+            if isinstance(data, dict) and isinstance(data.get('inputs'), list):
+                data = dict(data, inputs=[t.pin_memory() if isinstance(t, torch.Tensor) and not t.is_cuda else t
+                                          for t in data['inputs']])
+            return _cast_data(data)
+        preprocessor._non_blocking = True
+        preprocessor.cast_data = pinned_cast_data
+
+
+class TrackedDetector:
+    """Wraps the 2D stage's person detector: detects every DETECT_INTERVAL frames and reuses expanded boxes in between."""
+
+    def __init__(self, detector, interval=DETECT_INTERVAL, expand=BBOX_EXPAND):
+        self.detector = detector
+        self.interval = interval
+        self.expand = expand
+        self.reset()
+
+    def reset(self):
+        self._reused = None
+        self._age = 0
+
+    def __call__(self, inputs, *args, **kwargs):
+        if self._reused is not None and self._age < self.interval:
+            self._age += 1
+            return self._reused
+        results = self.detector(inputs, *args, **kwargs)
+        self._reused = self._expanded(results)
+        self._age = 1
+        return results
+
+    def _expanded(self, results):
+        """Copy of the detector output with every box grown about its centre (None if nobody was found)."""
+        preds = results.get('predictions') if isinstance(results, dict) else None
+        if not preds or len(preds[0].pred_instances) == 0:
+            return None # Nobody found: keep detecting every frame until someone appears
+        sample = preds[0].clone()
+        bboxes = sample.pred_instances.bboxes
+        half = (bboxes[:, 2:] - bboxes[:, :2]) * (0.5 * self.expand)
+        expanded = torch.cat([bboxes[:, :2] - half, bboxes[:, 2:] + half], dim=1)
+        # Keep the grown boxes inside the image, as the detector's own boxes are
+        height, width = sample.metainfo['ori_shape'][:2]
+        expanded[:, 0::2] = expanded[:, 0::2].clamp(0, width)
+        expanded[:, 1::2] = expanded[:, 1::2].clamp(0, height)
+        sample.pred_instances.bboxes = expanded
+        return dict(results, predictions=[sample])
+
+
+def disable_test_time_augmentation(pose_inferencer):
+    """Turns off flip-test and refined/unbiased decoding on the 2D and 3D pose models (one forward per frame)."""
+    impl = pose_inferencer.inferencer
+    pose2d = getattr(impl, 'pose2d_model', None)
+    for model in (getattr(impl, 'model', None), getattr(pose2d, 'model', None)):
+        test_cfg = getattr(model, 'test_cfg', None)
+        if not test_cfg:
+            continue
+        test_cfg['flip_test'] = False
+        if 'post_process' in test_cfg:
+            test_cfg['post_process'] = 'default'
+        if 'refine' in test_cfg:
+            test_cfg['refine'] = False
+
+
+def fold_channel_conversion(pose_inferencer):
+    """Folds the preprocessors' BGR->RGB swap into the first conv's weights (and mean/std), saving a full pass per image."""
+    impl = pose_inferencer.inferencer
+    pose2d = getattr(impl, 'pose2d_model', None)
+    detector = getattr(pose2d, 'detector', None)
+    detector = getattr(detector, 'detector', detector) # Unwrap TrackedDetector
+    for model in (getattr(impl, 'model', None), getattr(pose2d, 'model', None), getattr(detector, 'model', None)):
+        preprocessor = getattr(model, 'data_preprocessor', None)
+        if not getattr(preprocessor, '_channel_conversion', False) or getattr(model, 'backbone', None) is None:
+            continue
+        first_conv = next((m for m in model.backbone.modules() if isinstance(m, torch.nn.Conv2d)), None)
+        if first_conv is None or first_conv.in_channels != 3:
+            continue # Stem does not read the raw image directly (e.g. Focus slicing): leave as is
+        with torch.no_grad():
+            # conv(x[[2, 1, 0]], W) == conv(x, W[:, [2, 1, 0]]); normalisation constants follow the channels
+            first_conv.weight.copy_(first_conv.weight[:, [2, 1, 0]].clone())
+            if getattr(preprocessor, '_enable_normalize', False):
+                preprocessor.mean = preprocessor.mean[[2, 1, 0]].clone()
+                preprocessor.std = preprocessor.std[[2, 1, 0]].clone()
+        preprocessor._channel_conversion = False
+
+
+# Built inferencers, keyed by (pose3d, device): weights, CUDA context and compiled kernels
+# survive mode switches instead of being rebuilt on every Start/Process click
+_INFERENCER_CACHE = {}
+
+def build_inferencer():
+    """Returns the (cached) 3D pose inferencer with the configured precision and compilation."""
+    key = (POSE3D_MODEL, DEVICE)
+    if key not in _INFERENCER_CACHE:
+        pose_inferencer = MMPoseInferencer(pose3d=POSE3D_MODEL, device=DEVICE)
+        disable_test_time_augmentation(pose_inferencer)
+        if USE_FP16 and DEVICE.startswith('cuda'):
+            enable_fp16_autocast(pose_inferencer)
+        fold_channel_conversion(pose_inferencer)
+        if USE_PINNED_MEMORY and DEVICE.startswith('cuda'):
+            enable_pinned_transfers(pose_inferencer)
+        if USE_TORCH_COMPILE:
+            compile_backbones(pose_inferencer)
+        pose2d = getattr(pose_inferencer.inferencer, 'pose2d_model', None)
+        if DETECT_INTERVAL > 1 and getattr(pose2d, 'detector', None) is not None:
+            pose2d.detector = TrackedDetector(pose2d.detector)
+        # Warm up with one blank frame so CUDA init / compilation is paid here, not on the first real frame
+        for _ in pose_inferencer(inputs=np.zeros((480, 640, 3), dtype=np.uint8), return_vis=False):
+            pass
+        _INFERENCER_CACHE[key] = pose_inferencer
+    pose_inferencer = _INFERENCER_CACHE[key]
+    # The 3D lifter keeps a per-session history of past 2D poses; start every session from an empty one
+    buffer = getattr(pose_inferencer.inferencer, '_buffer', None)
+    if buffer is not None:
+        buffer.clear()
+    detector = getattr(getattr(pose_inferencer.inferencer, 'pose2d_model', None), 'detector', None)
+    if isinstance(detector, TrackedDetector):
+        detector.reset()
+    return pose_inferencer
+
+
+# ---------------- INFERENCE WORKER ----------------
+
+# Prediction fields kept per frame (stored raw; NumPy values are converted once, at save time)
+_PREDICTION_KEYS = ('keypoints', 'keypoint_scores', 'keypoints_3d', 'bbox', 'bbox_score', 'bbox_scores', 'track_id')
+
+def inference_worker(frames, stop_event):
+    """Producer: builds the inferencer, then pulls MMPose results off the UI thread, stores them and publishes them to the dashboard."""
+    global frame_id, stream_status, inferencer, results_gen
+    try:
+        # Model construction takes seconds (weights, CUDA context); keep it off the GUI thread
+        pose_inferencer = build_inferencer()
+        if stop_event.is_set():
+            return
+        results = pose_inferencer(inputs=frames, return_vis=False)
+        inferencer, results_gen = pose_inferencer, results
+        stream_status = None
+        request_redraw()
+
+        for result in results:
+            if stop_event.is_set():
+                return
+            # MMPose yields one result per input frame, right after reading that frame
+            frame = frames.current_frame
+            if frame_viewer is not None:
+                # Image goes to the viewer process; the dashboard only draws skeleton/angles
+                frame_viewer.publish(frame)
+                vis_frame = None
+            else:
+                vis_frame = frames.get_rgb_frame(frame)
+            
+            # Extract and store predictions (first detected person); values are kept as-is,
+            # NumPy -> list conversion is deferred to save time
+            preds = []
+            p_dict = None
+            for p_list in result.get('predictions', []):
+                if p_list and isinstance(p_list, list) and len(p_list) > 0:
+                    p_dict = p_list[0]
+                    preds.append({k: p_dict[k] for k in _PREDICTION_KEYS if k in p_dict})
+            
+            # A stop may have arrived while this result was inferred; reset_state() may already
+            # have started a new session, so never record into (or draw on) its buffers
+            if stop_event.is_set():
+                return
+            with predictions_lock:
+                all_predictions.append({'frame_id': frame_id, 'predictions': preds})
+                record_pose(frame_id, p_dict)
+                frame_id += 1
+            
+            # Angles are computed here; the main-loop redraw only renders the latest snapshot
+            if stop_event.is_set():
+                return
+            manager.submit({'predictions': preds}, vis_frame)
+            request_redraw()
+            
+            # Honour Pause: stop pulling frames until resumed or stopped
+            while not running and not stop_event.is_set():
+                time.sleep(0.05)
+        # release() also ends the stream: only a worker that was not stopped may report the end
+        if not stop_event.is_set():
+            stream_status = 'ended'
+            request_redraw()
+    except Exception as e:
+        if not stop_event.is_set():
+            stream_status = e
+            request_redraw()
+
+
+def record_pose(index, p_dict):
+    """Writes one frame's keypoints/scores into the chunked recording buffers (caller holds predictions_lock)."""
+    chunk, row = divmod(index, CHUNK_FRAMES)
+    if chunk == len(KPTS_CHUNKS):
+        # Current chunk is full: append a fresh one (existing data is never copied)
+        KPTS_CHUNKS.append(np.full((CHUNK_FRAMES, NUM_JOINTS, 3), np.nan, dtype=np.float32))
+        SCORES_CHUNKS.append(np.full((CHUNK_FRAMES, NUM_JOINTS), np.nan, dtype=np.float32))
+    if p_dict is None:
+        return
+    kpts = np.asarray(p_dict.get('keypoints', ()), dtype=np.float32)
+    if kpts.ndim == 2:
+        kpts = kpts[:NUM_JOINTS, :3]
+        KPTS_CHUNKS[chunk][row, :kpts.shape[0], :kpts.shape[1]] = kpts
+    scores = p_dict.get('keypoint_scores')
+    if scores is not None:
+        scores = np.asarray(scores, dtype=np.float32).reshape(-1)[:NUM_JOINTS]
+        SCORES_CHUNKS[chunk][row, :scores.shape[0]] = scores
+
+
+def recorded_pose_arrays(count):
+    """Joins the recording chunks into contiguous (count, 17, 3) keypoints and (count, 17) scores."""
+    if not KPTS_CHUNKS:
+        return (np.empty((0, NUM_JOINTS, 3), dtype=np.float32),
+                np.empty((0, NUM_JOINTS), dtype=np.float32))
+    return np.concatenate(KPTS_CHUNKS)[:count], np.concatenate(SCORES_CHUNKS)[:count]
+
+
+def start_inference_worker():
+    """Starts the producer thread for the current frame_gen; it reports 'loading' until the model is ready."""
+    global inference_thread, worker_stop, stream_status
+    worker_stop = threading.Event()
+    stream_status = 'loading'
+    inference_thread = threading.Thread(target=inference_worker, args=(frame_gen, worker_stop), daemon=True)
+    inference_thread.start()
+
 # ---------------- MODE TRANSITIONS ----------------
 
 def reset_state():
     """Resets all global variables for a clean start."""
-    global running, live_mode_active, REPLAY_MODE, VIDEO_MODE, stop_requested, all_predictions, frame_id, LOADED_FRAMES, REPLAY_INDEX, inferencer, results_gen, frame_gen
+    global running, live_mode_active, REPLAY_MODE, VIDEO_MODE, stop_requested, all_predictions, frame_id, LOADED_FRAMES, REPLAY_INDEX, inferencer, results_gen, frame_gen, stream_status, KPTS_CHUNKS, SCORES_CHUNKS, inference_thread
     
-    # 1. Stop animation and clean up I/O
+    # 1. Stop animation, the inference worker, and clean up I/O
     running = False
     stop_requested = False
+    stream_status = None
+    if worker_stop:
+        worker_stop.set()
+    if replay_timer:
+        replay_timer.stop()
     if frame_gen:
         frame_gen.release()
-    inferencer = None
+    if inference_thread is not None:
+        # The next session reuses the cached inferencer (and its detector/_buffer state):
+        # wait for the old worker to leave it before a new one can start
+        inference_thread.join(timeout=2.0)
+        if inference_thread.is_alive():
+            print("[MAIN] Warning: previous inference worker did not exit within 2 s.")
+        inference_thread = None
+    # The inferencer itself stays loaded (see _INFERENCER_CACHE); only its input stream is dropped
     results_gen = None
 
     # 2. Reset data
     all_predictions = []
+    KPTS_CHUNKS = []
+    SCORES_CHUNKS = []
     LOADED_FRAMES = []
     frame_id = 0
     REPLAY_INDEX = 0
@@ -158,12 +581,12 @@ def start_live_mode():
 
         # Setup inferencer using camera index (0)
         frame_gen = WebcamFrameGenerator(source=0)
-        inferencer = MMPoseInferencer(pose3d='human3d', device=DEVICE)
-        results_gen = inferencer(inputs=frame_gen, return_vis=False) 
+        frame_gen.start_capture()
         
         # Set state flags
         live_mode_active = True
         running = True
+        start_inference_worker()
         manager.text_artist.set_text(f"LIVE: Started. Data saving to {FINAL_OUTPUT_PATH}")
         print(f"[MAIN] Live Stream Started. Output: {FINAL_OUTPUT_PATH}")
         
@@ -189,12 +612,12 @@ def start_video_mode(file_path):
 
         # Setup inferencer using video file path
         frame_gen = WebcamFrameGenerator(source=file_path)
-        inferencer = MMPoseInferencer(pose3d='human3d', device=DEVICE)
-        results_gen = inferencer(inputs=frame_gen, return_vis=False) 
+        frame_gen.start_capture()
         
         # Set state flags
         VIDEO_MODE = True
         running = True
+        start_inference_worker()
         manager.text_artist.set_text(f"VIDEO: Processing {file_path}. Data saving to {FINAL_OUTPUT_PATH}")
         print(f"[MAIN] Video Processing Started: {file_path}. Output: {FINAL_OUTPUT_PATH}")
         
@@ -208,22 +631,23 @@ def start_video_mode(file_path):
 
 
 def load_json_file(file_path):
-    """Loads saved JSON data into the global replay state."""
+    """Loads a saved recording into the global replay state (prefers the .npz saved next to the JSON)."""
     global LOADED_FRAMES, REPLAY_MODE, REPLAY_INDEX, running
 
     reset_state() # Always reset state before loading a new file
 
     try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        if not isinstance(data, list) or not data or 'predictions' not in data[0]:
-            raise ValueError("JSON file structure is invalid or empty.")
-            
-        LOADED_FRAMES = data
+        npz_path = file_path.replace(".json", ".npz")
+        if npz_path != file_path and os.path.exists(npz_path):
+            file_path = npz_path
+        # Compact arrays; per-frame result dicts are rebuilt on demand during playback
+        LOADED_FRAMES = kinematics.load_pose_recording(file_path, NUM_JOINTS)
+        if len(LOADED_FRAMES) == 0:
+            raise ValueError("Recording is empty.")
         REPLAY_INDEX = 0
         REPLAY_MODE = True
         running = True # Start replay playback immediately
+        replay_timer.start()
         
         manager.text_artist.set_text(f"REPLAY: Loaded {len(LOADED_FRAMES)} frames. Playing...")
         print(f"[REPLAY] Started playback of {len(LOADED_FRAMES)} frames from {file_path}.")
@@ -274,8 +698,16 @@ def stop_reset_callback(event):
             mode_tag = "LIVE"
         else:
             mode_tag = "VIDEO"
-            
-        status_msg = kinematics.save_predictions_to_json(all_predictions, FINAL_OUTPUT_PATH)
+        
+        # Stop the producer before saving so the snapshot below is final
+        if worker_stop:
+            worker_stop.set()
+        with predictions_lock:
+            frames_to_save = list(all_predictions)
+            saved_kpts, saved_scores = recorded_pose_arrays(frame_id)
+        # Compact columnar recording first; the JSON file is kept for replay compatibility
+        status_msg = kinematics.save_pose_arrays(saved_kpts, saved_scores, FINAL_OUTPUT_PATH.replace(".json", ".npz"))
+        status_msg += " " + kinematics.save_predictions_to_json(frames_to_save, FINAL_OUTPUT_PATH)
         
         stop_requested = True # Signal the animation loop to close Matplotlib
         manager.text_artist.set_text(f"{mode_tag}: Stopping & Saving... {status_msg}")
@@ -331,68 +763,76 @@ def update(frame):
         if REPLAY_INDEX >= len(LOADED_FRAMES):
             running = False
             manager.text_artist.set_text("Replay finished. Click Stop/Reset to clear.")
+            replay_timer.stop()
             return manager.get_artists()
 
         result = LOADED_FRAMES[REPLAY_INDEX]
-        # Dark gray placeholder for webcam image in replay mode
-        vis_frame = np.full((480, 640, 3), 50, dtype=np.uint8) 
+        # Dark gray placeholder for webcam image in replay mode (shared constant)
+        vis_frame = _REPLAY_PLACEHOLDER
         
         manager.update_dashboard(result, vis_frame, kinematics.ANGLE_KEYS)
         
         REPLAY_INDEX += 1
         if running:
-             manager.text_artist.set_text(
+             manager.set_status(
                 f"REPLAY: Frame {REPLAY_INDEX}/{len(LOADED_FRAMES)} (Playing)"
             )
         return manager.get_artists()
 
     # --- LIVE/VIDEO PROCESSING LOGIC ---
+    # Inference runs on the worker thread; this callback only renders its latest snapshot
     elif live_mode_active or VIDEO_MODE:
-        try:
-            # 1. Get raw MMPose result
-            result = next(results_gen)
-            
-            # 2. Get RGB frame from our generator for display
-            vis_frame = frame_gen.get_rgb_frame()
-
-        except StopIteration:
+        if stream_status == 'ended':
             # End of stream (Video finished or camera closed)
             print(f"[{'VIDEO' if VIDEO_MODE else 'LIVE'}] Stream ended. Saving data.")
             stop_reset_callback(None)
+            request_redraw() # Next pass closes the window (stop_requested)
             return []
-        except Exception as e:
-            print(f"Error during processing: {e}")
-            manager.text_artist.set_text(f"Error: Stream Failure ({e})")
+        if isinstance(stream_status, Exception):
+            print(f"Error during processing: {stream_status}")
+            manager.text_artist.set_text(f"Error: Stream Failure ({stream_status})")
             stop_reset_callback(None) # Attempt to save what we have
+            request_redraw()
             return []
+        mode_tag = "VIDEO" if VIDEO_MODE else "LIVE"
+        if stream_status == 'loading':
+            # Model is still being built on the worker thread; keep the GUI responsive
+            manager.text_artist.set_text(f"{mode_tag}: Loading model...")
+            return manager.get_artists()
 
-        # 3. Extract and store predictions
-        preds = []
-        if 'predictions' in result:
-            for p_list in result['predictions']:
-                if p_list and isinstance(p_list, list) and len(p_list) > 0:
-                    p_dict = p_list[0]
-                    safe_dict = {k: (v.tolist() if hasattr(v, 'tolist') else v) for k, v in p_dict.items()}
-                    preds.append(safe_dict)
-
-        all_predictions.append({'frame_id': frame_id, 'predictions': preds})
-        frame_id += 1
-
-        # 4. Update Dashboard
-        dashboard_result = {'predictions': preds}
-        manager.update_dashboard(dashboard_result, vis_frame, kinematics.ANGLE_KEYS)
+        # 1. Update Dashboard from the newest published result (no-op if none arrived)
+        new_pose = manager.render()
 
-        # 5. Update text box
-        mode_tag = "VIDEO" if VIDEO_MODE else "LIVE"
-        if running:
-             manager.text_artist.set_text(
-                f"{mode_tag}: Running. Frames processed: {len(all_predictions)}"
+        # 2. Update text box (only when a new frame was rendered)
+        if running and new_pose:
+            dropped = "" if VIDEO_MODE else f" (dropped: {frame_gen.dropped_frames})"
+            manager.set_status(
+                f"{mode_tag}: Running. Frames processed: {len(all_predictions)}{dropped}"
             )
         return manager.get_artists()
     
+def redraw(event=None):
+    """Main-loop handler: runs one update() step and blits the changed artists."""
+    global redraw_count
+    redraw_pending.clear()
+    update(redraw_count)
+    redraw_count += 1
+    manager.blit()
+
+
+def request_redraw():
+    """Thread-safe: asks the Tk main loop for one redraw(); repeated posts before it runs are coalesced."""
+    if redraw_pending.is_set():
+        return
+    redraw_pending.set()
+    try:
+        manager.fig.canvas.get_tk_widget().event_generate('<<NewFrame>>', when='tail')
+    except (RuntimeError, tkinter.TclError):
+        pass # Window closed or main loop not running yet
+
 # ---------------- APPLICATION START ----------------
 def main():
-    global manager, anim
+    global manager, replay_timer, frame_viewer
 
     # 1. Setup Dashboard UI (Using constants from kinematics)
     manager = DashboardManager(kinematics.ANGLE_KEYS, kinematics.SKELETON_SEGMENTS)
@@ -402,15 +842,25 @@ def main():
     manager.btn_stop.on_clicked(stop_reset_callback)
     manager.btn_replay.on_clicked(replay_callback)
     manager.btn_video.on_clicked(video_callback) # NEW VIDEO BUTTON
+    for btn in (manager.btn_start, manager.btn_stop, manager.btn_replay, manager.btn_video):
+        btn.on_clicked(redraw) # Show the callback's state change right away
+
+    # 3. Event-driven redraw instead of a fixed-interval animation loop (no work while idle)
+    manager.fig.canvas.get_tk_widget().bind('<<NewFrame>>', redraw)
+    replay_timer = manager.fig.canvas.new_timer(interval=REPLAY_INTERVAL_MS)
+    replay_timer.add_callback(redraw)
 
-    # 3. Create animation loop
-    anim = FuncAnimation(manager.fig, update, interval=50, blit=False)
+    if USE_FRAME_VIEWER:
+        frame_viewer = FrameViewer()
 
     # 4. Start the UI
     try:
         manager.plt.show()
     except Exception as e:
         print(f"Matplotlib Show Error: {e}")
+    finally:
+        if frame_viewer:
+            frame_viewer.close()
 
 if __name__ == "__main__":
     main()
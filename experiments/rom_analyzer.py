@@ -12,8 +12,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 import warnings
 
-# --- KINEMATICS CONSTANTS & FUNCTIONS ---
-# (Copied from kinematics.py for standalone use to avoid import issues)
+# --- KINEMATICS ---
+# Batched (all frames at once) kinematics shared with the static dashboard (same joint mapping)
+from static_kinematics_dashboard import ANGLE_KEYS, stack_keypoints, batched_all_angles
 
 warnings.filterwarnings(
     "ignore",
@@ -21,117 +22,6 @@ warnings.filterwarnings(
     category=FutureWarning
 )
 
-ANGLE_KEYS = [
-    "Neck (X-Axis Rotation)", "Neck (Y-Axis Rotation)", "Neck (Z-Axis Rotation)",
-    "Torso-Neck (Vertical)", "Waist (X-Axis Rotation)", "Waist (Y-Axis Rotation)",
-    "Waist (Z-Axis Rotation)", "R Shoulder (X-Axis Rotation)", "L Shoulder (X-Axis Rotation)",
-    "R Shoulder (Y-Axis Rotation)", "L Shoulder (Y-Axis Rotation)", "R Shoulder (Z-Axis Rotation)",
-    "L Shoulder (Z-Axis Rotation)", "R_Elbow (Bend)", "L_Elbow (Bend)",
-    "R Hip (X-Axis Rotation)", "L Hip (X-Axis Rotation)", "R Hip (Y-Axis Rotation)",
-    "L Hip (Y-Axis Rotation)", "R Hip (Z-Axis Rotation)", "L Hip (Z-Axis Rotation)",
-    "R_Knee (Bend)", "L_Knee (Bend)",
-]
-
-def calculate_3d_angle(A, B, C):
-    """Calculates the 3D angle at joint B defined by segments BA and BC."""
-    v1 = A - B
-    v2 = C - B
-    denom = np.linalg.norm(v1) * np.linalg.norm(v2)
-    if denom == 0: return 0.0
-    cosv = np.clip(np.dot(v1, v2) / denom, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
-
-def calculate_vertical_angle(Start, End):
-    """Calculates the angle of a segment relative to the vertical axis (Y-up)."""
-    seg = End - Start
-    norm = np.linalg.norm(seg)
-    if norm == 0: return 0.0
-    cosv = np.clip(np.dot(seg, np.array([0.0, 1.0, 0.0])) / norm, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
-
-def compute_rotation_matrix(proximal_vec, distal_vec, invert_z=False):
-    """Computes a local coordinate system based on two segment vectors."""
-    if np.linalg.norm(proximal_vec) < 1e-9 or np.linalg.norm(distal_vec) < 1e-9: return np.eye(3)
-    p = proximal_vec / np.linalg.norm(proximal_vec)
-    d = distal_vec / np.linalg.norm(distal_vec)
-    y_axis = d
-    x_temp = np.cross(p, d)
-    if np.linalg.norm(x_temp) < 1e-6:
-        if np.abs(np.dot(d, np.array([1.0, 0.0, 0.0]))) < 0.8:
-            x_temp = np.cross(np.array([1.0, 0.0, 0.0]), d)
-        else:
-            x_temp = np.cross(np.cross(d, np.array([0.0, 0.0, 1.0])), d)
-        if np.linalg.norm(x_temp) < 1e-6: return np.eye(3)
-    z_axis = x_temp / np.linalg.norm(x_temp)
-    if invert_z: z_axis *= -1
-    x_axis = np.cross(y_axis, z_axis)
-    x_axis /= np.linalg.norm(x_axis)
-    return np.vstack([x_axis, y_axis, z_axis]).T
-
-def rotation_matrix_to_euler_angles(R):
-    """Converts a rotation matrix to ZYX Euler angles (in degrees)."""
-    r_x = np.arcsin(np.clip(R[2, 0], -1.0, 1.0))
-    cos_rx = np.cos(r_x)
-    if abs(cos_rx) < 1e-6:
-        r_y = 0.0
-        r_z = np.arctan2(R[1, 1], R[0, 1])
-    else:
-        r_y = np.arctan2(R[1, 0] / cos_rx, R[0, 0] / cos_rx)
-        r_z = np.arctan2(R[2, 1] / cos_rx, R[2, 2] / cos_rx)
-    return np.degrees(r_x), np.degrees(r_y), np.degrees(r_z)
-
-def calculate_anatomical_angles(kp):
-    """Calculates all 3D Euler angles for ball-and-socket joints."""
-    angles = {}
-    if kp.shape[0] > 8:
-        proximal_y = kp[7] - kp[0]; proximal_y /= np.linalg.norm(proximal_y)
-        x_axis_ref = kp[4] - kp[1]; x_axis_ref /= np.linalg.norm(x_axis_ref)
-        z_axis = np.cross(proximal_y, x_axis_ref); z_axis /= np.linalg.norm(z_axis)
-        x_axis = np.cross(proximal_y, z_axis); x_axis /= np.linalg.norm(x_axis)
-        R_local = np.vstack([x_axis, proximal_y, z_axis]).T
-        distal_segment = kp[8] - kp[7]
-        torso_y = distal_segment / np.linalg.norm(distal_segment)
-        torso_x_temp = np.cross(x_axis_ref, torso_y)
-        torso_z = torso_x_temp / np.linalg.norm(torso_x_temp)
-        torso_x = np.cross(torso_y, torso_z); torso_x /= np.linalg.norm(torso_x)
-        R_torso = np.vstack([torso_x, torso_y, torso_z]).T
-        R_relative = R_torso @ R_local.T
-        rx, ry, rz = rotation_matrix_to_euler_angles(R_relative)
-        angles["Waist (X-Axis Rotation)"] = rx; angles["Waist (Y-Axis Rotation)"] = ry; angles["Waist (Z-Axis Rotation)"] = rz
-    if kp.shape[0] > 9:
-        Rm = compute_rotation_matrix(kp[7] - kp[8], kp[9] - kp[8])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["Neck (X-Axis Rotation)"] = rx; angles["Neck (Y-Axis Rotation)"] = ry; angles["Neck (Z-Axis Rotation)"] = rz
-    proximal_torso_ref = kp[7] - kp[8]; proximal_torso_ref /= np.linalg.norm(proximal_torso_ref)
-    if kp.shape[0] > 15:
-        Rm = compute_rotation_matrix(proximal_torso_ref, kp[15] - kp[14], invert_z=False)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Shoulder (X-Axis Rotation)"] = rx; angles["R Shoulder (Y-Axis Rotation)"] = ry; angles["R Shoulder (Z-Axis Rotation)"] = rz
-    if kp.shape[0] > 12:
-        Rm = compute_rotation_matrix(proximal_torso_ref, kp[12] - kp[11], invert_z=True)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["L Shoulder (X-Axis Rotation)"] = rx; angles["L Shoulder (Y-Axis Rotation)"] = ry; angles["L Shoulder (Z-Axis Rotation)"] = rz
-    if kp.shape[0] > 2:
-        Rm = compute_rotation_matrix(kp[0] - kp[1], kp[2] - kp[1])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Hip (X-Axis Rotation)"] = rx; angles["R Hip (Y-Axis Rotation)"] = ry; angles["R Hip (Z-Axis Rotation)"] = rz
-    if kp.shape[0] > 5:
-        Rm = compute_rotation_matrix(kp[0] - kp[4], kp[5] - kp[4])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["L Hip (X-Axis Rotation)"] = rx; angles["L Hip (Y-Axis Rotation)"] = ry; angles["L Hip (Z-Axis Rotation)"] = rz
-    return angles
-
-def process_all_angles(kp):
-    """Calculates all 23 angles from a single keypoint array."""
-    all_angles = {}
-    checks = [(1,2,3,"R_Knee"), (4,5,6,"L_Knee"), (14,15,16,"R_Elbow"), (11,12,13,"L_Elbow")]
-    for A,B,C,name in checks:
-        if C < kp.shape[0]: all_angles[f"{name} (Bend)"] = calculate_3d_angle(kp[A], kp[B], kp[C])
-    if 8 < kp.shape[0]: all_angles["Torso-Neck (Vertical)"] = calculate_vertical_angle(kp[7], kp[8])
-    all_angles.update(calculate_anatomical_angles(kp))
-    return all_angles
-# --- END OF KINEMATICS FUNCTIONS ---
-
 def analyze_rom_from_file(file_path):
     """
     Loads a JSON file, calculates all angles for each frame, and
@@ -145,36 +35,18 @@ def analyze_rom_from_file(file_path):
         print(f"Error: Could not read or parse the file. {e}")
         return None
 
-    # Initialize a dictionary to store lists of angle values over time
-    angle_data = {key: [] for key in ANGLE_KEYS}
-
-    # Process every frame in the loaded data
-    for frame_info in data:
-        predictions = frame_info.get('predictions', [])
-        if not predictions:
-            continue # Skip frames with no detected people
-
-        # Assuming the first person's keypoints
-        keypoints_list = predictions[0].get('keypoints')
-        if keypoints_list:
-            kp = np.array(keypoints_list)
-            
-            # Flip Y axis to match visualization convention
-            kp[:, 1] = -kp[:, 1]
-            
-            # Calculate all angles for the current frame
-            current_angles = process_all_angles(kp)
-            
-            # Append each angle to its corresponding list
-            for key, value in current_angles.items():
-                if key in angle_data:
-                    angle_data[key].append(value)
-
-    # Calculate min and max for each angle
+    # All frames as one (N, 17, 3) tensor (first person, Y flipped; NaN = no detection),
+    # then every angle time-series in one batched pass: (N, 23), NaN where an angle is missing
+    _, kp_all = stack_keypoints(data)
+    angle_table = batched_all_angles(kp_all, ANGLE_KEYS)
+
+    # Calculate min and max for each angle (column-wise, ignoring missing frames)
+    present = ~np.isnan(angle_table)
     rom_ranges = {}
-    for key, values in angle_data.items():
-        if values:
-            rom_ranges[key] = (min(values), max(values))
+    for i, key in enumerate(ANGLE_KEYS):
+        column = angle_table[present[:, i], i]
+        if column.size:
+            rom_ranges[key] = (float(column.min()), float(column.max()))
         else:
             rom_ranges[key] = (0, 0) # Default if no data was found for an angle
 
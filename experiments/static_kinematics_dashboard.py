@@ -4,9 +4,11 @@ calculate all 23 kinematic angles, save the angles to a highly compressed, index
 and generate a single, static figure containing all kinematic angle plots.
 """
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
 import numpy as np
-import json
-import math
+from numba import njit
+import orjson
+import os
 import sys
 import warnings
 
@@ -47,124 +49,129 @@ ANGLE_KEYS = [
     "R_Knee (Bend)", "L_Knee (Bend)",
 ]
 
-# ------------------- KINEMATIC MATH FUNCTIONS -------------------
-def calculate_3d_angle(A, B, C):
+# Frames whose joints all moved less than this (keypoint units) since the last computed
+# frame reuse that frame's angles instead of being recomputed
+MOTION_EPS = 1e-3
+
+# ------------------- BATCHED (ALL FRAMES) KINEMATICS -------------------
+# The kinematics.py angle math, evaluated over the leading frame axis of (N, 3) / (N, 17, 3)
+# arrays. Missing joints are NaN, so an angle is NaN exactly where the per-frame code would skip it.
+
+def _row_norm(v):
+    return np.sqrt(np.einsum('ij,ij->i', v, v))
+
+def _normalize_rows(v):
+    return v * (1.0 / _row_norm(v))[:, None]
+
+def _frames_from_axes(x_axis, y_axis, z_axis):
+    """(N, 3, 3) rotation stack with the axes as columns, written in place (no stack/transpose copies)."""
+    R = np.empty((x_axis.shape[0], 3, 3))
+    R[:, :, 0] = x_axis; R[:, :, 1] = y_axis; R[:, :, 2] = z_axis
+    return R
+
+def batched_3d_angle(A, B, C):
     v1 = A - B
     v2 = C - B
-    denom = np.linalg.norm(v1) * np.linalg.norm(v2)
-    if denom == 0: return 0.0
-    cosv = np.clip(np.dot(v1, v2) / denom, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
+    denom = _row_norm(v1) * _row_norm(v2)
+    cosv = np.clip(np.einsum('ij,ij->i', v1, v2) / denom, -1.0, 1.0)
+    return np.where(denom == 0, 0.0, np.degrees(np.arccos(cosv)))
 
-def calculate_vertical_angle(Start, End):
+def batched_vertical_angle(Start, End):
     seg = End - Start
-    norm = np.linalg.norm(seg)
-    if norm == 0: return 0.0
-    cosv = np.clip(np.dot(seg, np.array([0.0, 1.0, 0.0])) / norm, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
-
-def compute_rotation_matrix(proximal_vec, distal_vec, invert_z=False):
-    if np.linalg.norm(proximal_vec) < 1e-9 or np.linalg.norm(distal_vec) < 1e-9: return np.eye(3)
-    p, d = proximal_vec / np.linalg.norm(proximal_vec), distal_vec / np.linalg.norm(distal_vec)
+    norm = _row_norm(seg)
+    cosv = np.clip(seg[:, 1] / norm, -1.0, 1.0)
+    return np.where(norm == 0, 0.0, np.degrees(np.arccos(cosv)))
+
+def batched_rotation_matrix(proximal_vec, distal_vec, invert_z=False, p_norm=None):
+    # With p_norm given, proximal_vec rows are already unit and p_norm holds their original lengths
+    if p_norm is None:
+        p_norm = _row_norm(proximal_vec)
+        p = proximal_vec * (1.0 / p_norm)[:, None]
+    else:
+        p = proximal_vec
+    d_norm = _row_norm(distal_vec)
+    d = distal_vec * (1.0 / d_norm)[:, None]
     y_axis = d
     x_temp = np.cross(p, d)
-    if np.linalg.norm(x_temp) < 1e-6:
-        if np.abs(np.dot(d, np.array([1.0, 0.0, 0.0]))) < 0.8:
-            x_temp = np.cross(np.array([1.0, 0.0, 0.0]), d)
-        else:
-            x_temp = np.cross(np.cross(d, np.array([0.0, 0.0, 1.0])), d)
-        if np.linalg.norm(x_temp) < 1e-6: return np.eye(3)
-        
-    z_axis = x_temp / np.linalg.norm(x_temp)
-    if invert_z: z_axis *= -1
-    x_axis = np.cross(y_axis, z_axis)
-    x_axis /= np.linalg.norm(x_axis) 
-    return np.vstack([x_axis, y_axis, z_axis]).T
-
-def rotation_matrix_to_euler_angles(R):
-    r_x = np.arcsin(np.clip(R[2, 0], -1.0, 1.0))
-    cos_rx = np.cos(r_x)
-    if abs(cos_rx) < 1e-6:
-        r_y = 0.0
-        r_z = np.arctan2(R[1, 1], R[0, 1])
-    else:
-        r_y = np.arctan2(R[1, 0] / cos_rx, R[0, 0] / cos_rx)
-        r_z = np.arctan2(R[2, 1] / cos_rx, R[2, 2] / cos_rx)
+    
+    # Near-parallel segments: same fallback reference axes as kinematics.compute_rotation_matrix
+    parallel = _row_norm(x_temp) < 1e-6
+    if parallel.any():
+        fallback = np.where((np.abs(d[:, 0]) < 0.8)[:, None],
+                            np.cross(np.array([1.0, 0.0, 0.0]), d),
+                            np.cross(np.cross(d, np.array([0.0, 0.0, 1.0])), d))
+        x_temp = np.where(parallel[:, None], fallback, x_temp)
+    
+    x_norm = _row_norm(x_temp)
+    z_axis = x_temp * (1.0 / x_norm)[:, None]
+    if invert_z: z_axis = -z_axis
+    x_axis = np.cross(y_axis, z_axis) # y and z are orthonormal: already unit length
+    R = _frames_from_axes(x_axis, y_axis, z_axis)
+    R[(p_norm < 1e-9) | (d_norm < 1e-9) | (x_norm < 1e-6)] = np.eye(3)
+    return R
+
+def batched_euler_angles(R):
+    """Vectorized kinematics.rotation_matrix_to_euler_angles over (..., 3, 3), e.g. (N, 3, 3); returns three arrays of the leading shape in degrees."""
+    s = np.clip(R[..., 2, 0], -1.0, 1.0)
+    r_x = np.arcsin(s)
+    gimbal = 1.0 - s * s < 1e-12 # cos(asin(s)) < 1e-6
+    r_y = np.where(gimbal, 0.0, np.arctan2(R[..., 1, 0], R[..., 0, 0]))
+    r_z = np.where(gimbal, np.arctan2(R[..., 1, 1], R[..., 0, 1]), np.arctan2(R[..., 2, 1], R[..., 2, 2]))
     return np.degrees(r_x), np.degrees(r_y), np.degrees(r_z)
 
-def calculate_anatomical_angles(kp):
+def batched_anatomical_angles(kp):
+    """kinematics.calculate_anatomical_angles for all frames of kp (N, 17, 3); returns {name: (N,) array}."""
     angles = {}
     
+    def store(prefix, R):
+        rx, ry, rz = batched_euler_angles(R)
+        angles[f"{prefix} (X-Axis Rotation)"] = rx
+        angles[f"{prefix} (Y-Axis Rotation)"] = ry
+        angles[f"{prefix} (Z-Axis Rotation)"] = rz
+    
     # WAIST/TORSO
-    if kp.shape[0] > 8:
-        proximal_y = kp[7] - kp[0]; proximal_y /= np.linalg.norm(proximal_y)
-        x_axis_ref = kp[4] - kp[1]; x_axis_ref /= np.linalg.norm(x_axis_ref)
-        z_axis = np.cross(proximal_y, x_axis_ref); z_axis /= np.linalg.norm(z_axis)
-        x_axis = np.cross(proximal_y, z_axis); x_axis /= np.linalg.norm(x_axis)
-        R_local = np.vstack([x_axis, proximal_y, z_axis]).T 
-        distal_segment = kp[8] - kp[7]; torso_y = distal_segment / np.linalg.norm(distal_segment)
-        torso_x_temp = np.cross(x_axis_ref, torso_y); torso_z = torso_x_temp / np.linalg.norm(torso_x_temp)
-        torso_x = np.cross(torso_y, torso_z); torso_x /= np.linalg.norm(torso_x)
-        R_torso = np.vstack([torso_x, torso_y, torso_z]).T 
-        R_relative = R_torso @ R_local.T
-        rx, ry, rz = rotation_matrix_to_euler_angles(R_relative)
-        angles["Waist (X-Axis Rotation)"] = round(rx, 1); angles["Waist (Y-Axis Rotation)"] = round(ry, 1); angles["Waist (Z-Axis Rotation)"] = round(rz, 1)
-
-    # NECK
-    if kp.shape[0] > 9:
-        Rm = compute_rotation_matrix(kp[7] - kp[8], kp[9] - kp[8])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["Neck (X-Axis Rotation)"] = round(rx, 1); angles["Neck (Y-Axis Rotation)"] = round(ry, 1); angles["Neck (Z-Axis Rotation)"] = round(rz, 1)
-
-    # RIGHT SHOULDER (R_Shoulder: 14 in the script's H36M_JOINT_NAMES)
-    if kp.shape[0] > 15:
-        proximal_torso_ref = kp[7] - kp[8]; proximal_torso_ref /= np.linalg.norm(proximal_torso_ref)
-        # Note: Indexing must be based on the provided H36M_JOINT_NAMES which uses 14/15/16 for R_Arm
-        Rm = compute_rotation_matrix(proximal_torso_ref, kp[15] - kp[14], invert_z=False)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Shoulder (X-Axis Rotation)"] = round(rx, 1); angles["R Shoulder (Y-Axis Rotation)"] = round(ry, 1); angles["R Shoulder (Z-Axis Rotation)"] = round(rz, 1)
-        
-    # LEFT SHOULDER (L_Shoulder: 11 in the script's H36M_JOINT_NAMES)
-    if kp.shape[0] > 12:
-        proximal_torso_ref = kp[7] - kp[8]; proximal_torso_ref /= np.linalg.norm(proximal_torso_ref)
-        # Note: Indexing must be based on the provided H36M_JOINT_NAMES which uses 11/12/13 for L_Arm
-        Rm = compute_rotation_matrix(proximal_torso_ref, kp[12] - kp[11], invert_z=True)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["L Shoulder (X-Axis Rotation)"] = round(rx, 1); angles["L Shoulder (Y-Axis Rotation)"] = round(ry, 1); angles["L Shoulder (Z-Axis Rotation)"] = round(rz, 1)
-
-    # RIGHT HIP
-    if kp.shape[0] > 2:
-        Rm = compute_rotation_matrix(kp[0] - kp[1], kp[2] - kp[1])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Hip (X-Axis Rotation)"] = round(rx, 1); angles["R Hip (Y-Axis Rotation)"] = round(ry, 1); angles["R Hip (Z-Axis Rotation)"] = round(rz, 1)
-
-    # LEFT HIP
-    if kp.shape[0] > 5:
-        Rm = compute_rotation_matrix(kp[0] - kp[4], kp[5] - kp[4])
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["L Hip (X-Axis Rotation)"] = round(rx, 1); angles["L Hip (Y-Axis Rotation)"] = round(ry, 1); angles["L Hip (Z-Axis Rotation)"] = round(rz, 1)
-        
+    proximal_y = _normalize_rows(kp[:, 7] - kp[:, 0])
+    x_axis_ref = _normalize_rows(kp[:, 4] - kp[:, 1])
+    z_axis = _normalize_rows(np.cross(proximal_y, x_axis_ref))
+    x_axis = np.cross(proximal_y, z_axis) # Already unit
+    R_local = _frames_from_axes(x_axis, proximal_y, z_axis)
+    torso_y = _normalize_rows(kp[:, 8] - kp[:, 7])
+    torso_z = _normalize_rows(np.cross(x_axis_ref, torso_y))
+    torso_x = np.cross(torso_y, torso_z) # Already unit
+    R_torso = _frames_from_axes(torso_x, torso_y, torso_z)
+    # One batched matmul over all frames: R_torso @ R_local.T per frame
+    store("Waist", np.matmul(R_torso, R_local.swapaxes(-1, -2)))
+    
+    # NECK (Torso -> Neck reference, normalized once for the neck and both shoulders)
+    torso_ref = kp[:, 7] - kp[:, 8]
+    torso_norm = _row_norm(torso_ref)
+    torso_ref = torso_ref * (1.0 / torso_norm)[:, None]
+    store("Neck", batched_rotation_matrix(torso_ref, kp[:, 9] - kp[:, 8], p_norm=torso_norm))
+    
+    # SHOULDERS (R: 14/15/16, L: 11/12/13 in this script's H36M_JOINT_NAMES)
+    store("R Shoulder", batched_rotation_matrix(torso_ref, kp[:, 15] - kp[:, 14], invert_z=False, p_norm=torso_norm))
+    store("L Shoulder", batched_rotation_matrix(torso_ref, kp[:, 12] - kp[:, 11], invert_z=True, p_norm=torso_norm))
+    
+    # HIPS
+    store("R Hip", batched_rotation_matrix(kp[:, 0] - kp[:, 1], kp[:, 2] - kp[:, 1]))
+    store("L Hip", batched_rotation_matrix(kp[:, 0] - kp[:, 4], kp[:, 5] - kp[:, 4]))
     return angles
 
-def process_all_angles(kp, angle_keys):
-    all_angles = {}
-    
-    # 1. Simple Bend Angles (Knee and Elbows)
-    # R_Knee: (R_Hip=1, R_Knee=2, R_Ankle=3)
-    # L_Knee: (L_Hip=4, L_Knee=5, L_Ankle=6)
-    # R_Elbow: (R_Shoulder=14, R_Elbow=15, R_Wrist=16) -- using script's H36M_JOINT_NAMES
-    # L_Elbow: (L_Shoulder=11, L_Elbow=12, L_Wrist=13) -- using script's H36M_JOINT_NAMES
-    checks = [(1,2,3,"R_Knee"), (4,5,6,"L_Knee"), (14,15,16,"R_Elbow"), (11,12,13,"L_Elbow")]
-    for A,B,C,name in checks:
-        if C < kp.shape[0]: all_angles[f"{name} (Bend)"] = round(calculate_3d_angle(kp[A], kp[B], kp[C]), 1)
-            
-    # 2. Simple Vertical Angle (Torso)
-    if 8 < kp.shape[0]: all_angles["Torso-Neck (Vertical)"] = round(calculate_vertical_angle(kp[7], kp[8]), 1)
-        
-    # 3. Complex 3D Euler Angles
-    all_angles.update(calculate_anatomical_angles(kp))
+def batched_all_angles(kp, angle_keys):
+    """kinematics.process_all_angles for all frames at once: (N, 17, 3) keypoints -> (N, len(angle_keys)) array, NaN = missing."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        series = {}
+        checks = [(1,2,3,"R_Knee"), (4,5,6,"L_Knee"), (14,15,16,"R_Elbow"), (11,12,13,"L_Elbow")]
+        for A,B,C,name in checks:
+            series[f"{name} (Bend)"] = batched_3d_angle(kp[:, A], kp[:, B], kp[:, C])
+        series["Torso-Neck (Vertical)"] = batched_vertical_angle(kp[:, 7], kp[:, 8])
+        series.update(batched_anatomical_angles(kp))
     
-    return all_angles
+    out = np.full((kp.shape[0], len(angle_keys)), np.nan)
+    for i, key in enumerate(angle_keys):
+        if key in series:
+            out[:, i] = series[key]
+    return np.round(out, 1, out=out)
 # ----------------------------------------------------------------------------------
 
 
@@ -172,45 +179,70 @@ def process_all_angles(kp, angle_keys):
 # 2. SAVING AND PLOTTING IMPLEMENTATION (INDEXED & COMPRESSED)
 # -------------------------------------------------
 
+def stack_keypoints(all_frame_data):
+    """Stacks every frame's first-person keypoints into one (N, 17, 3) tensor (NaN = missing), Y flipped."""
+    num_joints = len(H36M_JOINT_NAMES)
+    kp_all = np.full((len(all_frame_data), num_joints, 3), np.nan)
+    frame_ids = []
+    for n, frame_data in enumerate(all_frame_data):
+        frame_ids.append(frame_data.get('frame_id', -1))
+        preds = frame_data.get('predictions', [])
+        if preds and preds[0] and 'keypoints' in preds[0] and preds[0]['keypoints'] is not None:
+            kp = np.asarray(preds[0]['keypoints'], dtype=np.float64)[:num_joints, :3]
+            kp_all[n, :kp.shape[0], :kp.shape[1]] = kp
+    
+    # Flip Y axis once for all frames (consistent with processing in live mode)
+    kp_all[..., 1] *= -1
+    return frame_ids, kp_all
+
+@njit(cache=True)
+def keyframe_mask(kp_all, eps):
+    """True for frames that moved by >= eps (any joint/axis) since the previous keyframe; frame 0 always is one."""
+    n = kp_all.shape[0]
+    mask = np.zeros(n, dtype=np.bool_)
+    if n == 0:
+        return mask
+    mask[0] = True
+    last = 0
+    for i in range(1, n):
+        for j in range(kp_all.shape[1]):
+            for k in range(kp_all.shape[2]):
+                # Written as "not <" so NaN (missing joints) always counts as motion
+                if not abs(kp_all[i, j, k] - kp_all[last, j, k]) < eps:
+                    mask[i] = True
+                    break
+            if mask[i]:
+                break
+        if mask[i]:
+            last = i
+    return mask
+
 def process_and_save_angles_indexed(all_frame_data, output_filepath, angle_keys):
     """
     Processes all frames, calculates all angles, and saves the results to a 
     new JSON file using only numerical indices for angles and no indentation.
+    The same table is also written next to it as a binary .npz
+    (frame_ids int32[N], angles float32[N, 23], angle_map str[23]).
     """
     if not all_frame_data:
         print("Error: No data loaded to process.")
         return None
 
-    angle_history = []
-    
     print(f"Processing {len(all_frame_data)} frames...")
     
-    for frame_data in all_frame_data:
-        frame_id = frame_data.get('frame_id', -1)
-        
-        preds = frame_data.get('predictions', [])
-        
-        # Initialize a list of 23 None values for the angles
-        indexed_angles = [None] * len(angle_keys)
-
-        if preds and preds[0] and 'keypoints' in preds[0] and preds[0]['keypoints'] is not None:
-            kp = np.array(preds[0]['keypoints'])
-            
-            # Flip Y axis (consistent with processing in live mode)
-            if kp.shape[1] >= 2:
-                kp[:, 1] = -kp[:, 1]
-
-            # Process angles
-            current_angles_named = process_all_angles(kp, angle_keys)
-            
-            # Map the named angles to the numerical index list using ANGLE_KEYS order
-            for i, key_name in enumerate(angle_keys):
-                value = current_angles_named.get(key_name)
-                indexed_angles[i] = value
-                
-        # Prepare data structure for saving: [frame_id, [angle_0, angle_1, ..., angle_22]]
-        frame_output = [frame_id, indexed_angles]
-        angle_history.append(frame_output)
+    # 1. One (N, 17, 3) keypoint tensor for the whole recording
+    frame_ids, kp_all = stack_keypoints(all_frame_data)
+    
+    # 2. All angle time-series in one vectorized pass, in angle_keys index order.
+    # Only keyframes are computed; near-static frames take their last keyframe's row
+    keyframes = keyframe_mask(kp_all, MOTION_EPS)
+    angle_table = batched_all_angles(kp_all[keyframes], angle_keys)[np.cumsum(keyframes) - 1]
+    print(f"Computed angles for {int(keyframes.sum())} keyframes; {len(keyframes) - int(keyframes.sum())} low-motion frames reused.")
+    
+    # Prepare data structure for saving: [frame_id, [angle_0, angle_1, ..., angle_22]]
+    # Rows stay float32 NumPy views; orjson encodes them natively and writes NaN (missing) as null
+    angle_table = angle_table.astype(np.float32)
+    angle_history = [[frame_id, row] for frame_id, row in zip(frame_ids, angle_table)]
 
     # --- FINAL JSON STRUCTURE ---
     final_output = {
@@ -221,11 +253,17 @@ def process_and_save_angles_indexed(all_frame_data, output_filepath, angle_keys)
     
     # Save the processed data to the new JSON file
     try:
-        # Use separators=(',', ':') to eliminate all unnecessary spaces for compression
-        with open(output_filepath, 'w') as f:
-            json.dump(final_output, f, separators=(',', ':'))
+        # orjson output is already compact (no spaces/indentation)
+        with open(output_filepath, 'wb') as f:
+            f.write(orjson.dumps(final_output, option=orjson.OPT_SERIALIZE_NUMPY))
         print(f"✅ Successfully saved {len(angle_history)} frames of **indexed** angle data to: {output_filepath}")
         print("NOTE: The file is compressed (no extra spaces/indentation) for space efficiency.")
+        
+        # Binary copy for fast reloads: no float text encoding or parsing; the JSON keeps the schema
+        npz_filepath = os.path.splitext(output_filepath)[0] + '.npz'
+        np.savez_compressed(npz_filepath, frame_ids=np.asarray(frame_ids, dtype=np.int32),
+                            angles=angle_table, angle_map=np.array(angle_keys))
+        print(f"✅ Binary angle table saved to: {npz_filepath}")
     except Exception as e:
         print(f"❌ Error saving data to file: {e}")
         
@@ -250,39 +288,34 @@ def plot_indexed_angles_dashboard(processed_data, source_filepath):
         print("No angle data to plot.")
         return
         
-    # 1. Reformat the indexed list data for plotting
-    history = {key: [] for key in ANGLE_KEYS}
+    # 1. One (N, 23) array for all series; a float dtype turns None (missing data) into NaN
+    y_all = np.array([angle_list for _, angle_list in frame_data], dtype=np.float32)
     frame_count = len(frame_data)
     num_angles = len(ANGLE_KEYS)
-    
-    for _, angle_list in frame_data:
-        for i, key_name in enumerate(ANGLE_KEYS):
-            # Use np.nan if the value is None (for missing data)
-            value = angle_list[i] if i < len(angle_list) else None
-            history[key_name].append(value if value is not None else np.nan)
+    x_data = np.arange(frame_count)
             
     # 2. Setup the Static Figure
     FIGSIZE_H = 18 
     FIGSIZE_W = 22
     
-    fig = plt.figure(figsize=(FIGSIZE_W, FIGSIZE_H))
-    
-    # 12 rows needed for 23 plots (12 * 2 = 24 slots)
-    gs = fig.add_gridspec(12, 2, wspace=0.3, hspace=0.4) 
+    # 12 rows needed for 23 plots (12 * 2 = 24 slots); one shared X axis for all of them
+    fig, axes = plt.subplots(12, 2, sharex=True, figsize=(FIGSIZE_W, FIGSIZE_H),
+                             gridspec_kw={'wspace': 0.3, 'hspace': 0.4})
     plt.subplots_adjust(left=0.04, right=0.98, top=0.95, bottom=0.05) 
+    for ax in axes.flat[num_angles:]:
+        ax.set_visible(False)
+    # Fixed limits: lines are added without triggering autoscale
+    axes[0, 0].set_xlim(0, max(frame_count - 1, 1))
 
     # 3. Plotting Loop
     for i, key in enumerate(ANGLE_KEYS):
         if i >= num_angles: break 
         
         row, col = i // 2, i % 2 
-        ax = fig.add_subplot(gs[row, col])
+        ax = axes[row, col]
         
         plot_color = get_plot_color(key)
-        y_data = np.array(history[key])
-        x_data = np.arange(frame_count)
-
-        ax.plot(x_data, y_data, lw=1.5, color=plot_color)
+        ax.add_line(Line2D(x_data, y_all[:, i], lw=1.5, color=plot_color))
         
         # Set Title
         title_color = plot_color
@@ -300,7 +333,8 @@ def plot_indexed_angles_dashboard(processed_data, source_filepath):
         if row == 11:
             ax.set_xlabel("Frame ID", fontsize=9)
         else:
-            ax.set_xticks([])
+            # set_xticks([]) would clear the shared locator for every subplot
+            ax.tick_params(axis='x', bottom=False, labelbottom=False)
             
         # Add a light horizontal line at 0 for rotation plots
         if not ('Bend' in key or 'Vertical' in key):
@@ -333,8 +367,9 @@ def main_static():
     print(f"Attempting to load data from: {JSON_FILE_TO_LOAD}")
 
     try:
-        with open(JSON_FILE_TO_LOAD, 'r') as f:
-            all_frame_data = json.load(f)
+        # orjson parses straight from bytes; stack_keypoints then fills one (N, 17, 3) tensor
+        with open(JSON_FILE_TO_LOAD, 'rb') as f:
+            all_frame_data = orjson.loads(f.read())
 
         if not isinstance(all_frame_data, list) or not all_frame_data:
             raise ValueError("Loaded data is empty or malformed.")
@@ -351,7 +386,7 @@ def main_static():
     except FileNotFoundError:
         print(f"ERROR: File not found at {JSON_FILE_TO_LOAD}")
         print("Please check the JSON_FILE_TO_LOAD path in the script.")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print("ERROR: Invalid JSON format. Data corruption possible.")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
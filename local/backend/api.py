@@ -1,24 +1,26 @@
 import uvicorn
 import io
+import asyncio
 import traceback
 import numpy as np
 import pandas as pd
 import torch
-import torch.nn as nn
 import joblib
 import sys
 
 # --- Import Plotly ---
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import plotly.io as pio
 # ---------------------
 
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from scipy.signal import find_peaks
+from fastapi.responses import ORJSONResponse
 from collections import Counter
 
+from models import MovementClassifierLSTM, RepetitionDetector, trace_model
+
 # --- FastAPI App Setup ---
 app = FastAPI()
 app.add_middleware(
@@ -35,32 +37,6 @@ REP_DETECTOR_MODEL_PATH = 'rep_detector_model.pth'
 SCALER_PATH = 'angle_scaler.joblib'
 FPS = 100
 
-# --- (Model class definitions) ---
-class MovementClassifierLSTM(nn.Module):
-    def __init__(self, input_size, hidden_size1, hidden_size2, num_classes, dropout_prob=0.5):
-        super(MovementClassifierLSTM, self).__init__()
-        self.lstm1 = nn.LSTM(input_size, hidden_size1, batch_first=True)
-        self.dropout1 = nn.Dropout(dropout_prob)
-        self.lstm2 = nn.LSTM(hidden_size1, hidden_size2, batch_first=True)
-        self.dropout2 = nn.Dropout(dropout_prob)
-        self.fc1 = nn.Linear(hidden_size2, 50)
-        self.relu = nn.ReLU()
-        self.fc2 = nn.Linear(50, num_classes)
-    def forward(self, x):
-        out, _ = self.lstm1(x); out = self.dropout1(out)
-        out, (hidden, _) = self.lstm2(out); out = self.dropout2(hidden.squeeze(0))
-        out = self.fc1(out); out = self.relu(out); out = self.fc2(out)
-        return out
-
-class RepetitionDetector(nn.Module):
-    def __init__(self, input_size=48, hidden_size=64, num_layers=2):
-        super(RepetitionDetector, self).__init__()
-        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True, bidirectional=True)
-        self.fc = nn.Linear(hidden_size * 2, 1)
-    def forward(self, x):
-        lstm_out, _ = self.lstm(x); out = self.fc(lstm_out)
-        return out.squeeze(-1)
-
 # --- (Constants) ---
 CLASS_NAMES = [
     "Deep squat",                                  # m01
@@ -91,23 +67,99 @@ N_OUTPUTS = 10
 WINDOW_SIZE = 60
 STEP_CLS = 20
 STEP_REP = 15
+CLS_REUSE_EPS = 1e-4 # Windows this close to their predecessor reuse its classification
+PEAK_HEIGHT = 0.78
+PEAK_DISTANCE = 90
 
 # --- (Helper function) ---
 def calculate_rep_delays(peak_indices, fps=100):
     if len(peak_indices) < 2: return np.array([])
     return np.diff(peak_indices) / fps
 
+def build_windows(frames, step):
+    """Returns (n_windows, WINDOW_SIZE, n_features) windows unfolded from a (frames, features) tensor."""
+    return frames.unfold(0, WINDOW_SIZE, step).transpose(1, 2).contiguous()
+
+# Page-locked host buffer reused across requests so H2D copies can run asynchronously
+pinned_frames = None
+
+def upload_frames(frames):
+    """Copies a (frames, features) array to the device as float32, via pinned memory on CUDA."""
+    global pinned_frames
+    if device.type != 'cuda':
+        return torch.from_numpy(np.ascontiguousarray(frames, dtype=np.float32)).to(device)
+    n = frames.shape[0]
+    if pinned_frames is None or pinned_frames.shape[0] < n:
+        pinned_frames = torch.empty((n, frames.shape[1]), dtype=torch.float32, pin_memory=True)
+    staging = pinned_frames[:n]
+    staging.copy_(torch.from_numpy(frames))
+    return staging.to(device, non_blocking=True)
+
+# --- (Report builders, run concurrently on worker threads) ---
+def build_classification_figure_json(x_frames_cls, pred_cls_names, x_frames_rep, final_rep_signal, peaks):
+    """FIG 1: Classification & Reps, serialized to Plotly JSON."""
+    fig1 = make_subplots(rows=2, cols=1, shared_xaxes=True, subplot_titles=('Exercise Classification', 'Repetition Peak Signal'))
+    fig1.add_trace(go.Scatter(x=x_frames_cls, y=pred_cls_names, mode='lines', line=dict(shape='hv'), name='Predicted Exercise'), row=1, col=1)
+    fig1.add_trace(go.Scatter(x=x_frames_rep, y=final_rep_signal, mode='lines', line=dict(color='green'), name='"Peak Hold" Probability'), row=2, col=1)
+    fig1.add_trace(go.Scatter(x=peaks, y=final_rep_signal[peaks], mode='markers', marker=dict(color='red', size=10, symbol='x'), name=f'Detected Reps ({len(peaks)})'), row=2, col=1)
+    fig1.update_layout(xaxis2_title='Frame Number', yaxis_title='Exercise', yaxis2_title='Probability', height=600, hovermode='x unified', margin=dict(t=40, b=40))
+    return fig1.to_json()
+
+def build_timing_figure_json(pred_delays):
+    """FIG 2: Rep Timing, serialized to Plotly JSON."""
+    fig2 = go.Figure()
+    if pred_delays.size > 0:
+        rep_intervals = [f"Rep {i}-{i+1}" for i in range(1, len(pred_delays) + 1)]
+        fig2.add_trace(go.Scatter(
+            name='Predicted Rep Delay',
+            x=rep_intervals, 
+            y=pred_delays, 
+            mode='lines+markers',
+            line=dict(color='red', dash='dash')
+        ))
+    fig2.update_layout(title_text="Repetition Timing: Time Between Reps", xaxis_title="Repetition Interval", yaxis_title="Time (seconds)", height=400, margin=dict(t=40, b=40))
+    return fig2.to_json()
+
+def build_summary(peaks, x_frames_cls, pred_cls_names, pred_delays):
+    """Builds the per-exercise rep count / timing summary lines."""
+    summary_lines = []
+    if len(peaks) == 0:
+        summary_lines.append("No repetitions were detected.")
+    else:
+        # Bucket every peak into its classifier window in one searchsorted call
+        chunk_indices = np.searchsorted(x_frames_cls, peaks, side='right') - 1
+        peak_exercises = np.asarray(pred_cls_names)[chunk_indices[chunk_indices >= 0]]
+        rep_counts = Counter(peak_exercises.tolist())
+        for exercise, count in rep_counts.items():
+            summary_lines.append(f"{exercise}: {count} reps")
+        summary_lines.append(f"Total Reps Detected: {len(peaks)}")
+        if pred_delays.size > 0:
+            summary_lines.append(f"Average Time Between Reps: {np.mean(pred_delays):.2f} seconds")
+    return summary_lines
+
 # --- 2: Load Models and Scaler (On Startup) ---
 try:
     print(f"Loading models and scaler... Expecting {N_FEATURES} features.")
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    # Mixed precision on GPU: bf16 on Ampere+, fp16 on older cards
+    amp_dtype = torch.bfloat16 if device.type == 'cuda' and torch.cuda.is_bf16_supported() else torch.float16
     model_cls = MovementClassifierLSTM(N_FEATURES, 80, 40, N_OUTPUTS)
     model_cls.load_state_dict(torch.load(CLASSIFIER_MODEL_PATH, map_location=device))
     model_cls.to(device); model_cls.eval()
     model_rep = RepetitionDetector(N_FEATURES, 64, 2)
     model_rep.load_state_dict(torch.load(REP_DETECTOR_MODEL_PATH, map_location=device))
     model_rep.to(device); model_rep.eval()
+    # TorchScript lets the LSTM graphs run without per-call Python dispatch; each traced graph is
+    # checked against its eager model under the request-time autocast (falls back to eager otherwise)
+    example = torch.randn(1, WINDOW_SIZE, N_FEATURES, device=device)
+    check_input = torch.randn(4, WINDOW_SIZE, N_FEATURES, device=device)
+    check_amp_dtype = amp_dtype if device.type == 'cuda' else None
+    model_cls = trace_model(model_cls, example, check_input, check_amp_dtype)
+    model_rep = trace_model(model_rep, example, check_input, check_amp_dtype)
     scaler = joblib.load(SCALER_PATH)
+    # StandardScaler parameters cached as float32 so scaling is a single in-place pass
+    scale_mean32 = scaler.mean_.astype(np.float32)
+    scale_inv32 = (1.0 / scaler.scale_).astype(np.float32)
     print("✅ All assets loaded.")
 except FileNotFoundError as e:
     print(f"--- FATAL ERROR: FILE NOT FOUND: {e.filename} ---")
@@ -121,114 +173,80 @@ except Exception as e:
 @app.post("/analyze-session/")
 async def analyze_session(file: UploadFile = File(...)):
     """
-    Analyzes an 'angles.txt' file and returns Plotly graphs as HTML
-    and a summary.
+    Analyzes an 'angles.txt' file and returns Plotly figure JSON
+    (rendered client-side) and a summary.
     """
     try:
         print(f"Received file: {file.filename}")
         contents = await file.read()
         
         # --- 4: Load and Preprocess Data ---
-        try:
-            new_data_full = np.loadtxt(io.BytesIO(contents), delimiter=",")
-        except Exception:
-            new_data_full = np.loadtxt(io.BytesIO(contents))
-        if new_data_full.ndim == 1: new_data_full = new_data_full.reshape(1, -1)
+        # Sniff the delimiter (comma or whitespace) and parse with pandas' C tokenizer
+        sep = ',' if b',' in contents[:256] else r'\s+'
+        new_data_full = pd.read_csv(io.BytesIO(contents), header=None, sep=sep, dtype=np.float32).to_numpy()
         
         if new_data_full.shape[1] < max(ANGLE_INDICES):
              raise HTTPException(status_code=400, detail=f"File has only {new_data_full.shape[1]} columns, but model needs index {max(ANGLE_INDICES)}.")
         
         new_data = new_data_full[:, ANGLE_INDICES]
-        scaled_data = scaler.transform(new_data)
+        scaled_data = np.subtract(new_data, scale_mean32, dtype=np.float32)
+        np.multiply(scaled_data, scale_inv32, out=scaled_data)
         num_total_frames = len(scaled_data)
         print(f"Data ready: {num_total_frames} frames.")
 
-        # --- 5: Run Classifier Pipeline ---
-        print("Running exercise classification...")
-        windows_cls = [scaled_data[i : i + WINDOW_SIZE] for i in range(0, num_total_frames - WINDOW_SIZE + 1, STEP_CLS)]
-        if not windows_cls:
+        # --- 5: Upload Frames Once and Run Both Models ---
+        if num_total_frames < WINDOW_SIZE:
             raise HTTPException(status_code=400, detail="Data is too short to create any windows.")
-        X_cls_tensor = torch.tensor(np.array(windows_cls), dtype=torch.float32).to(device)
-        with torch.no_grad():
-            out_cls = model_cls(X_cls_tensor); prob_cls = torch.softmax(out_cls, dim=1).cpu().numpy()
+        # Both window sets are unfolded on-device from a single upload of the scaled frames
+        X_frames = upload_frames(scaled_data)
+        X_cls_tensor = build_windows(X_frames, STEP_CLS)
+        X_rep_tensor = build_windows(X_frames, STEP_REP)
+        # Quasi-static stretches produce near-identical windows; only classify the ones that changed
+        cls_reuse = np.zeros(len(X_cls_tensor), dtype=bool)
+        cls_reuse[1:] = (torch.linalg.vector_norm(X_cls_tensor[1:] - X_cls_tensor[:-1], dim=(1, 2)) < CLS_REUSE_EPS).cpu().numpy()
+        cls_keep = torch.from_numpy(np.flatnonzero(~cls_reuse)).to(device)
+        cls_source = np.cumsum(~cls_reuse) - 1 # Row of the last classified window for each window
+        print("Running exercise classification and repetition detection...")
+        with torch.inference_mode(), torch.autocast(device_type=device.type, dtype=amp_dtype, enabled=device.type == 'cuda'):
+            out_cls = model_cls(X_cls_tensor[cls_keep]); prob_cls = torch.softmax(out_cls.float(), dim=1).cpu().numpy()[cls_source]
+            out_rep_seqs = model_rep(X_rep_tensor); prob_rep_seqs = torch.sigmoid(out_rep_seqs.float()).cpu().numpy()
+
+        # --- 6: Post-process Classifier and Repetition Outputs ---
         pred_cls_indices = np.argmax(prob_cls, axis=1)
         pred_cls_names = [CLASS_NAMES[idx] for idx in pred_cls_indices]
-        x_frames_cls = (np.arange(0, len(windows_cls)) * STEP_CLS)
-
-        # --- 6: Run Repetition Detector Pipeline ---
-        print("Running repetition detection...")
-        windows_rep = [scaled_data[i : i + WINDOW_SIZE] for i in range(0, num_total_frames - WINDOW_SIZE + 1, STEP_REP)]
-        X_rep_tensor = torch.tensor(np.array(windows_rep), dtype=torch.float32).to(device)
-        with torch.no_grad():
-            out_rep_seqs = model_rep(X_rep_tensor); prob_rep_seqs = torch.sigmoid(out_rep_seqs).cpu().numpy()
-        full_rep_signal = np.zeros(num_total_frames, dtype=float)
-        count_signal = np.zeros(num_total_frames, dtype=float)
-        for i, seq in enumerate(prob_rep_seqs):
-            start = i * STEP_REP; end = start + WINDOW_SIZE
-            full_rep_signal[start:end] += seq
-            count_signal[start:end] += 1
+        x_frames_cls = (np.arange(0, len(prob_cls)) * STEP_CLS)
+
+        # Overlap-add every window back onto the frame axis in one pass
+        flat_idx = (np.arange(len(prob_rep_seqs))[:, None] * STEP_REP + np.arange(WINDOW_SIZE)[None, :]).ravel()
+        full_rep_signal = np.bincount(flat_idx, weights=prob_rep_seqs.ravel(), minlength=num_total_frames)
+        count_signal = np.bincount(flat_idx, minlength=num_total_frames).astype(float)
         final_rep_signal = np.divide(full_rep_signal, count_signal, out=np.zeros_like(full_rep_signal), where=count_signal!=0)
         x_frames_rep = np.arange(num_total_frames)
-        peaks, _ = find_peaks(final_rep_signal, height=0.78, distance=90)
-        
-        # --- 7: Generate Plotly Figures (Your Python Code) ---
-        print("Generating Plotly graphs...")
+        peaks, _ = find_peaks(final_rep_signal, height=PEAK_HEIGHT, distance=PEAK_DISTANCE)
         
-        # --- FIG 1: Classification & Reps ---
-        fig1 = make_subplots(rows=2, cols=1, shared_xaxes=True, subplot_titles=('Exercise Classification', 'Repetition Peak Signal'))
-        fig1.add_trace(go.Scatter(x=x_frames_cls, y=pred_cls_names, mode='lines', line=dict(shape='hv'), name='Predicted Exercise'), row=1, col=1)
-        fig1.add_trace(go.Scatter(x=x_frames_rep, y=final_rep_signal, mode='lines', line=dict(color='green'), name='"Peak Hold" Probability'), row=2, col=1)
-        fig1.add_trace(go.Scatter(x=peaks, y=final_rep_signal[peaks], mode='markers', marker=dict(color='red', size=10, symbol='x'), name=f'Detected Reps ({len(peaks)})'), row=2, col=1)
-        fig1.update_layout(xaxis2_title='Frame Number', yaxis_title='Exercise', yaxis2_title='Probability', height=600, hovermode='x unified', margin=dict(t=40, b=40))
-        
-        # --- FIG 2: Rep Timing ---
         pred_delays = calculate_rep_delays(peaks, fps=FPS)
-        fig2 = go.Figure()
-        if pred_delays.size > 0:
-            rep_intervals = [f"Rep {i}-{i+1}" for i in range(1, len(pred_delays) + 1)]
-            fig2.add_trace(go.Scatter(
-                name='Predicted Rep Delay',
-                x=rep_intervals, 
-                y=pred_delays, 
-                mode='lines+markers',
-                line=dict(color='red', dash='dash')
-            ))
-        fig2.update_layout(title_text="Repetition Timing: Time Between Reps", xaxis_title="Repetition Interval", yaxis_title="Time (seconds)", height=400, margin=dict(t=40, b=40))
-
-        # --- Convert figures to HTML strings ---
-        # THIS IS THE FIX: Set full_html=True and include_plotlyjs='cdn'
-        # This creates a complete, standalone HTML document.
-        html_fig1 = pio.to_html(fig1, full_html=True, include_plotlyjs='cdn')
-        html_fig2 = pio.to_html(fig2, full_html=True, include_plotlyjs='cdn')
-
-        # --- 8: Generate Summary ---
-        print("Generating summary...")
-        summary_lines = []
-        if len(peaks) == 0:
-            summary_lines.append("No repetitions were detected.")
-        else:
-            peak_exercises = []
-            for peak_frame in peaks:
-                chunk_index = np.searchsorted(x_frames_cls, peak_frame, side='right') - 1
-                if chunk_index >= 0:
-                    exercise_name = pred_cls_names[chunk_index]
-                    peak_exercises.append(exercise_name)
-            rep_counts = Counter(peak_exercises)
-            for exercise, count in rep_counts.items():
-                summary_lines.append(f"{exercise}: {count} reps")
-            summary_lines.append(f"Total Reps Detected: {len(peaks)}")
-            if pred_delays.size > 0:
-                summary_lines.append(f"Average Time Between Reps: {np.mean(pred_delays):.2f} seconds")
+        
+        # --- 7 & 8: Generate Plotly Figures and Summary ---
+        # Figure serialization is the heavy part; build both figures and the summary on worker
+        # threads so they overlap each other and the event loop stays free for other requests.
+        # The frontend renders the figure JSON directly with Plotly, so no HTML/CDN boilerplate is sent.
+        print("Generating Plotly graphs and summary...")
+        json_fig1, json_fig2, summary_lines = await asyncio.gather(
+            asyncio.to_thread(build_classification_figure_json, x_frames_cls, pred_cls_names, x_frames_rep, final_rep_signal, peaks),
+            asyncio.to_thread(build_timing_figure_json, pred_delays),
+            asyncio.to_thread(build_summary, peaks, x_frames_cls, pred_cls_names, pred_delays),
+        )
         
         print("✅ Analysis complete.")
 
-        # --- 9: Return JSON response with HTML and summary ---
-        return {
+        # --- 9: Return JSON response with figure JSON and summary ---
+        # Returned as a ready Response so FastAPI skips its jsonable_encoder walk; orjson encodes it directly
+        return ORJSONResponse({
             "fileName": file.filename,
-            "plot_html_1": html_fig1, # Classification + Reps
-            "plot_html_2": html_fig2, # Rep Timing
+            "plot_json_1": json_fig1, # Classification + Reps
+            "plot_json_2": json_fig2, # Rep Timing
             "summary": summary_lines
-        }
+        })
 
     except Exception as e:
         print(f"--- ERROR during analysis ---")
@@ -1,4 +1,6 @@
+import math
 import numpy as np
+from numba import njit
 import json
 import datetime
 import warnings
@@ -55,62 +57,117 @@ ANGLE_KEYS = [
 ]
 
 # ---------------- KINEMATIC HELPERS ----------------
+# Numba-compiled: 3-vectors are float 3-tuples (or rows of a float64 kp array) and all the
+# math is scalar, so a frame costs a few microseconds instead of hundreds of Python calls.
+_IDENTITY3 = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+_ZERO3 = (0.0, 0.0, 0.0)
+
+@njit(cache=True)
+def _sub3(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+@njit(cache=True)
+def _scale3(v, s):
+    return (v[0] * s, v[1] * s, v[2] * s)
+
+@njit(cache=True)
+def _dot3(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+@njit(cache=True)
+def _norm3(v):
+    return math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
+@njit(cache=True)
+def _cross3(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+@njit(cache=True)
+def _columns3(x_axis, y_axis, z_axis):
+    """3x3 matrix (tuple of rows) with the three axes as its columns."""
+    return ((x_axis[0], y_axis[0], z_axis[0]),
+            (x_axis[1], y_axis[1], z_axis[1]),
+            (x_axis[2], y_axis[2], z_axis[2]))
+
+@njit(cache=True)
+def _compose_row(a_x, a_y, a_z, i, b_x, b_y, b_z):
+    """Row i of A @ B.T, for A and B given by their axes (columns)."""
+    return (a_x[i] * b_x[0] + a_y[i] * b_y[0] + a_z[i] * b_z[0],
+            a_x[i] * b_x[1] + a_y[i] * b_y[1] + a_z[i] * b_z[1],
+            a_x[i] * b_x[2] + a_y[i] * b_y[2] + a_z[i] * b_z[2])
+
+@njit(cache=True)
 def calculate_3d_angle(A, B, C):
     """Calculates the 3D angle at joint B defined by segments BA and BC."""
-    v1 = A - B
-    v2 = C - B
-    denom = np.linalg.norm(v1) * np.linalg.norm(v2)
+    v1 = _sub3(A, B)
+    v2 = _sub3(C, B)
+    denom = _norm3(v1) * _norm3(v2)
     if denom < 1e-9: # Prevent division by zero
         return 0.0
-    cosv = np.clip(np.dot(v1, v2) / denom, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
+    cosv = min(max(_dot3(v1, v2) / denom, -1.0), 1.0)
+    return math.degrees(math.acos(cosv))
 
+@njit(cache=True)
 def calculate_vertical_angle(Start, End):
     """Calculates the angle of a segment (Start->End) relative to the vertical axis (Y-up)."""
-    seg = End - Start
-    norm = np.linalg.norm(seg)
+    seg = _sub3(End, Start)
+    norm = _norm3(seg)
     if norm < 1e-9: # Prevent division by zero
         return 0.0
-    # Assumes Y is UP
-    cosv = np.clip(np.dot(seg, np.array([0.0, 1.0, 0.0])) / norm, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
+    # Assumes Y is UP: seg . (0, 1, 0) is just the Y component
+    cosv = min(max(seg[1] / norm, -1.0), 1.0)
+    return math.degrees(math.acos(cosv))
 
-def compute_rotation_matrix(proximal_vec, distal_vec):
+@njit(cache=True)
+def _segment_axes(proximal_vec, distal_vec):
     """
-    Computes a rotation matrix (local coordinate system) based on two segment vectors.
-    Distal vector defines the Y-axis (length of the bone/segment).
-    This implementation mirrors the THREE.js lookAt logic.
+    (ok, X, Y, Z): local axes (unit 3-tuples) of the frame built by compute_rotation_matrix;
+    ok is False where it falls back to the identity.
     """
-    if np.linalg.norm(proximal_vec) < 1e-9 or np.linalg.norm(distal_vec) < 1e-9:
-        return np.eye(3)
+    # Each norm is computed once; normalizing multiplies by the reciprocal
+    d_norm = _norm3(distal_vec)
+    if _norm3(proximal_vec) < 1e-9 or d_norm < 1e-9:
+        return False, _ZERO3, _ZERO3, _ZERO3
     
     # Y-axis is the distal segment (bone direction)
-    y_axis = distal_vec / np.linalg.norm(distal_vec)
+    y_axis = _scale3(distal_vec, 1.0 / d_norm)
     
     # Z-axis is perpendicular to distal and proximal vectors
-    z_axis = np.cross(y_axis, proximal_vec)
-    if np.linalg.norm(z_axis) < 1e-9:
+    z_axis = _cross3(y_axis, proximal_vec)
+    z_norm = _norm3(z_axis)
+    if z_norm < 1e-9:
         # Fallback for collinear vectors
         if abs(y_axis[0]) > 0.8: # If y_axis is close to x-axis
-            z_axis = np.cross(y_axis, np.array([0, 1, 0]))
+            z_axis = _cross3(y_axis, (0.0, 1.0, 0.0))
         else:
-            z_axis = np.cross(y_axis, np.array([1, 0, 0]))
+            z_axis = _cross3(y_axis, (1.0, 0.0, 0.0))
+        z_norm = _norm3(z_axis)
     
-    z_axis /= np.linalg.norm(z_axis)
+    z_axis = _scale3(z_axis, 1.0 / z_norm)
     
-    # X-axis is perpendicular to Y and Z
-    x_axis = np.cross(y_axis, z_axis)
-    x_axis /= np.linalg.norm(x_axis)
+    # X-axis is perpendicular to Y and Z (both unit and orthogonal, so already unit length)
+    x_axis = _cross3(y_axis, z_axis)
     
-    # Return the basis matrix [X, Y, Z]
-    return np.vstack([x_axis, y_axis, z_axis]).T
-
+    return True, x_axis, y_axis, z_axis
 
-def rotation_matrix_to_euler_angles(R):
+@njit(cache=True)
+def compute_rotation_matrix(proximal_vec, distal_vec):
     """
-    Converts a rotation matrix to Euler angles (YXZ order) in degrees.
-    This order matches the THREE.js 'YXZ' implementation.
+    Computes a rotation matrix (local coordinate system) based on two segment vectors.
+    Distal vector defines the Y-axis (length of the bone/segment).
+    This implementation mirrors the THREE.js lookAt logic.
+    Returns the matrix as a tuple of rows (index it as R[i][j]).
     """
+    ok, x_axis, y_axis, z_axis = _segment_axes(proximal_vec, distal_vec)
+    if not ok:
+        return _IDENTITY3
+    # Return the basis matrix [X, Y, Z]
+    return _columns3(x_axis, y_axis, z_axis)
+
+
+@njit(cache=True)
+def _euler_yxz(r10, r00, r20, r11, r12, r02, r22):
+    """YXZ Euler angles (degrees) from the only seven matrix entries the extraction reads."""
     # YXZ intrinsic rotation
     # R[1,0] = sin(x)
     # R[1,2] = -cos(x)sin(z)
@@ -118,148 +175,163 @@ def rotation_matrix_to_euler_angles(R):
     # R[0,0] = cos(y)cos(z) + sin(y)sin(x)sin(z)
     # R[2,0] = -sin(y)cos(z) + cos(y)sin(x)sin(z)
 
-    r_x = np.arcsin(np.clip(R[1, 0], -1.0, 1.0))
-    cos_rx = np.cos(r_x)
-
-    if abs(cos_rx) > 1e-6:
-        r_y = np.arctan2(-R[2, 0], R[0, 0])
-        r_z = np.arctan2(-R[1, 2], R[1, 1])
-    else:
-        # Gimbal lock
-        r_y = np.arctan2(R[0, 2], R[2, 2])
-        r_z = 0.0
+    s = min(max(r10, -1.0), 1.0)
+    r_x = math.degrees(math.asin(s))
 
-    return np.degrees(r_x), np.degrees(r_y), np.degrees(r_z)
+    # cos(asin(s))^2 = 1 - s^2 (= r00^2 + r20^2), so cos_rx > 1e-6 needs no sqrt.
+    # The regular case is by far the common one and comes first
+    if 1.0 - s * s > 1e-12:
+        return r_x, math.degrees(math.atan2(-r20, r00)), math.degrees(math.atan2(-r12, r11))
+    # Gimbal lock
+    return r_x, math.degrees(math.atan2(r02, r22)), 0.0
 
+@njit(cache=True)
+def rotation_matrix_to_euler_angles(R):
+    """
+    Converts a rotation matrix to Euler angles (YXZ order) in degrees.
+    This order matches the THREE.js 'YXZ' implementation.
+    """
+    return _euler_yxz(R[1][0], R[0][0], R[2][0], R[1][1], R[1][2], R[0][2], R[2][2])
 
-def calculate_anatomical_angles(kp):
+@njit(cache=True)
+def segment_euler_angles(proximal_vec, distal_vec):
     """
-    Calculates 3D Euler angles for all ball-and-socket and axial joints.
-    The order corresponds to (X-Axis, Y-Axis, Z-Axis) rotation.
+    rotation_matrix_to_euler_angles(compute_rotation_matrix(proximal_vec, distal_vec)), fused:
+    the frame's axes are its columns, so the needed entries are read straight off them
+    and the 3x3 matrix is never assembled.
     """
-    angles = {}
-    
-    if kp.shape[0] < 17:
-        return {key: 0.0 for key in ANGLE_KEYS if 'Bend' not in key and 'Vertical' not in key}
+    ok, x_axis, y_axis, z_axis = _segment_axes(proximal_vec, distal_vec)
+    if not ok:
+        return rotation_matrix_to_euler_angles(_IDENTITY3)
+    return _euler_yxz(x_axis[1], x_axis[0], x_axis[2], y_axis[1], z_axis[1], z_axis[0], z_axis[2])
+
+
+# Output layout of _anatomical_core: (X, Y, Z) per joint, in this order
+ANATOMICAL_JOINTS = ["Waist", "Neck", "R Shoulder", "L Shoulder", "R Hip", "L Hip"]
+ANATOMICAL_KEYS = [f"{joint} ({axis}-Axis Rotation)" for joint in ANATOMICAL_JOINTS for axis in "XYZ"]
 
+@njit(cache=True)
+def _store_euler(out, slot, angles):
+    out[3 * slot] = angles[0]
+    out[3 * slot + 1] = angles[1]
+    out[3 * slot + 2] = angles[2]
+
+@njit(cache=True)
+def _anatomical_core(kp, out):
+    """
+    Compiled body of calculate_anatomical_angles for a float64 (>= 17, 3) kp: writes the
+    18 angles into out in ANATOMICAL_KEYS order. Returns False if the waist could not be
+    computed (its slots are then left untouched).
+    """
     # --- WAIST/TORSO ROTATION (Joint Center: Torso 7) ---
-    if kp.shape[0] > 8:
-        try:
-            proximal_y = kp[7] - kp[0] # Y-axis: Pelvis -> Torso
-            x_axis_ref = kp[1] - kp[4] # X-axis (Lateral): R_Hip (1) -> L_Hip (4)
+    waist_ok = False
+    proximal_y = _sub3(kp[7], kp[0]) # Y-axis: Pelvis -> Torso
+    x_axis_ref = _sub3(kp[1], kp[4]) # X-axis (Lateral): R_Hip (1) -> L_Hip (4)
+    torso_y = _sub3(kp[8], kp[7])    # Torso to Neck
+    
+    py_norm = _norm3(proximal_y)
+    ref_norm = _norm3(x_axis_ref)
+    torso_norm = _norm3(torso_y)
+    if py_norm > 1e-6 and ref_norm > 1e-6 and torso_norm > 1e-6:
+        proximal_y = _scale3(proximal_y, 1.0 / py_norm)
+        x_axis_ref = _scale3(x_axis_ref, 1.0 / ref_norm)
+        torso_y = _scale3(torso_y, 1.0 / torso_norm)
+        
+        z_axis_local = _cross3(proximal_y, x_axis_ref)
+        z_local_norm = _norm3(z_axis_local)
+        z_axis_torso = _cross3(torso_y, x_axis_ref)
+        z_torso_norm = _norm3(z_axis_torso)
+        # Zero-length cross products leave the waist uncomputed
+        if z_local_norm > 0.0 and z_torso_norm > 0.0:
+            z_axis_local = _scale3(z_axis_local, 1.0 / z_local_norm)
+            # Cross of two orthogonal unit vectors: already unit length
+            x_axis_local = _cross3(proximal_y, z_axis_local)
+            z_axis_torso = _scale3(z_axis_torso, 1.0 / z_torso_norm)
+            x_axis_torso = _cross3(torso_y, z_axis_torso)
             
-            if np.linalg.norm(proximal_y) > 1e-6 and np.linalg.norm(x_axis_ref) > 1e-6:
-                proximal_y /= np.linalg.norm(proximal_y)
-                x_axis_ref /= np.linalg.norm(x_axis_ref)
-                
-                z_axis_local = np.cross(proximal_y, x_axis_ref)
-                z_axis_local /= np.linalg.norm(z_axis_local)
-                x_axis_local = np.cross(proximal_y, z_axis_local)
-                x_axis_local /= np.linalg.norm(x_axis_local)
-                R_local = np.vstack([x_axis_local, proximal_y, z_axis_local]).T 
-                
-                torso_y = kp[8] - kp[7] # Torso to Neck
-                if np.linalg.norm(torso_y) > 1e-6:
-                    torso_y /= np.linalg.norm(torso_y)
-                    z_axis_torso = np.cross(torso_y, x_axis_ref)
-                    z_axis_torso /= np.linalg.norm(z_axis_torso)
-                    x_axis_torso = np.cross(torso_y, z_axis_torso)
-                    x_axis_torso /= np.linalg.norm(x_axis_torso)
-                    R_torso = np.vstack([x_axis_torso, torso_y, z_axis_torso]).T 
-                    
-                    R_relative = R_torso @ np.linalg.inv(R_local)
-                    rx, ry, rz = rotation_matrix_to_euler_angles(R_relative)
-                    
-                    angles["Waist (X-Axis Rotation)"] = round(rx, 1)
-                    angles["Waist (Y-Axis Rotation)"] = round(ry, 1)
-                    angles["Waist (Z-Axis Rotation)"] = round(rz, 1)
-        except Exception as e:
-            print(f"Error calculating waist: {e}")
-
+            # R_torso @ R_local.T (both frames have their axes as columns; R_local is
+            # orthonormal, so its transpose is its inverse)
+            R_relative = (_compose_row(x_axis_torso, torso_y, z_axis_torso, 0, x_axis_local, proximal_y, z_axis_local),
+                          _compose_row(x_axis_torso, torso_y, z_axis_torso, 1, x_axis_local, proximal_y, z_axis_local),
+                          _compose_row(x_axis_torso, torso_y, z_axis_torso, 2, x_axis_local, proximal_y, z_axis_local))
+            _store_euler(out, 0, rotation_matrix_to_euler_angles(R_relative))
+            waist_ok = True
 
     # --- NECK ROTATION (Joint Center: Neck 8) ---
-    if kp.shape[0] > 9:
-        proximal = kp[7] - kp[8] # Torso -> Neck
-        distal = kp[9] - kp[8]   # Neck -> Head
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["Neck (X-Axis Rotation)"] = round(rx, 1)
-        angles["Neck (Y-Axis Rotation)"] = round(ry, 1)
-        angles["Neck (Z-Axis Rotation)"] = round(rz, 1)
+    # Torso -> Neck, Neck -> Head
+    _store_euler(out, 1, segment_euler_angles(_sub3(kp[7], kp[8]), _sub3(kp[9], kp[8])))
 
     # --- RIGHT SHOULDER (Joint Center: Shoulder 11) ---
-    if kp.shape[0] > 12:
-        proximal = kp[8] - kp[11] # Neck -> R_Shoulder
-        distal = kp[12] - kp[11]  # R_Shoulder -> R_Elbow
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Shoulder (X-Axis Rotation)"] = round(rx, 1)
-        angles["R Shoulder (Y-Axis Rotation)"] = round(ry, 1)
-        angles["R Shoulder (Z-Axis Rotation)"] = round(rz, 1)
+    # Neck -> R_Shoulder, R_Shoulder -> R_Elbow
+    _store_euler(out, 2, segment_euler_angles(_sub3(kp[8], kp[11]), _sub3(kp[12], kp[11])))
         
     # --- LEFT SHOULDER (Joint Center: Shoulder 14) ---
-    if kp.shape[0] > 15:
-        proximal = kp[8] - kp[14] # Neck -> L_Shoulder
-        distal = kp[15] - kp[14]  # L_Shoulder -> L_Elbow
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        
-        # --- FIX: Negate Y and Z angles for left side ---
-        # This mirrors the logic in kinematics.js
-        angles["L Shoulder (X-Axis Rotation)"] = round(rx, 1)
-        angles["L Shoulder (Y-Axis Rotation)"] = round(-ry, 1)
-        angles["L Shoulder (Z-Axis Rotation)"] = round(-rz, 1)
-        # -------------------------------------------------
+    # Neck -> L_Shoulder, L_Shoulder -> L_Elbow
+    _store_euler(out, 3, segment_euler_angles(_sub3(kp[8], kp[14]), _sub3(kp[15], kp[14])))
 
     # --- RIGHT HIP (Joint Center: Hip 1) ---
-    if kp.shape[0] > 2:
-        proximal = kp[0] - kp[1] # Pelvis -> R_Hip
-        distal = kp[2] - kp[1]   # R_Hip -> R_Knee
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Hip (X-Axis Rotation)"] = round(rx, 1)
-        angles["R Hip (Y-Axis Rotation)"] = round(ry, 1)
-        angles["R Hip (Z-Axis Rotation)"] = round(rz, 1)
+    # Pelvis -> R_Hip, R_Hip -> R_Knee
+    _store_euler(out, 4, segment_euler_angles(_sub3(kp[0], kp[1]), _sub3(kp[2], kp[1])))
 
     # --- LEFT HIP (Joint Center: Hip 4) ---
-    if kp.shape[0] > 5:
-        proximal = kp[0] - kp[4] # Pelvis -> L_Hip
-        distal = kp[5] - kp[4]   # L_Hip -> L_Knee
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-
-        # --- FIX: Negate Y and Z angles for left side ---
-        # This mirrors the logic in kinematics.js
-        angles["L Hip (X-Axis Rotation)"] = round(rx, 1)
-        angles["L Hip (Y-Axis Rotation)"] = round(-ry, 1)
-        angles["L Hip (Z-Axis Rotation)"] = round(-rz, 1)
-        # -------------------------------------------------
-        
+    # Pelvis -> L_Hip, L_Hip -> L_Knee
+    _store_euler(out, 5, segment_euler_angles(_sub3(kp[0], kp[4]), _sub3(kp[5], kp[4])))
+
+    # --- FIX: Negate Y and Z angles for left side ---
+    # This mirrors the logic in kinematics.js
+    for slot in (3, 5):
+        out[3 * slot + 1] = -out[3 * slot + 1]
+        out[3 * slot + 2] = -out[3 * slot + 2]
+    # -------------------------------------------------
+    return waist_ok
+
+
+def calculate_anatomical_angles(kp):
+    """
+    Calculates 3D Euler angles for all ball-and-socket and axial joints.
+    The order corresponds to (X-Axis, Y-Axis, Z-Axis) rotation.
+    """
+    if len(kp) < 17:
+        return {key: 0.0 for key in ANGLE_KEYS if 'Bend' not in key and 'Vertical' not in key}
+    out = np.zeros(len(ANATOMICAL_KEYS))
+    waist_ok = _anatomical_core(np.ascontiguousarray(kp, dtype=np.float64), out)
+    angles = dict(zip(ANATOMICAL_KEYS, np.round(out, 1).tolist()))
+    if not waist_ok:
+        for key in ANATOMICAL_KEYS[:3]:
+            del angles[key]
     return angles
 
-def process_all_angles(kp, ANGLE_KEYS):
-    """Calculates all 23 angles (simple bend + 3D Euler components)."""
-    all_angles = {}
-    
-    if kp.shape[0] < 17:
-        return {key: 0.0 for key in ANGLE_KEYS}
+# Output layout of _all_angles_core: bends, vertical, then the 18 anatomical angles
+BEND_CHECKS = [(1, 2, 3, "R_Knee"), (4, 5, 6, "L_Knee"), (11, 12, 13, "R_Elbow"), (14, 15, 16, "L_Elbow")]
+CORE_ANGLE_KEYS = [f"{name} (Bend)" for _, _, _, name in BEND_CHECKS] + ["Torso-Neck (Vertical)"] + ANATOMICAL_KEYS
 
+@njit(cache=True)
+def _all_angles_core(kp, out):
+    """Compiled process_all_angles for a float64 (>= 17, 3) kp: fills out (23,) in CORE_ANGLE_KEYS order."""
     # 1. Simple Bend Angles (Knee and Elbows)
-    checks = [ 
-        (1,2,3,"R_Knee"), (4,5,6,"L_Knee"), 
-        (11,12,13,"R_Elbow"),
-        (14,15,16,"L_Elbow")
-    ]
-    for A,B,C,name in checks:
-        if C < kp.shape[0]:
-            all_angles[f"{name} (Bend)"] = round(calculate_3d_angle(kp[A], kp[B], kp[C]), 1)
-            
+    out[0] = calculate_3d_angle(kp[1], kp[2], kp[3])
+    out[1] = calculate_3d_angle(kp[4], kp[5], kp[6])
+    out[2] = calculate_3d_angle(kp[11], kp[12], kp[13])
+    out[3] = calculate_3d_angle(kp[14], kp[15], kp[16])
     # 2. Simple Vertical Angle (Torso)
-    if 8 < kp.shape[0]:
-        all_angles["Torso-Neck (Vertical)"] = round(calculate_vertical_angle(kp[7], kp[8]), 1)
-        
-    # 3. Complex 3D Euler Angles (Hip, Shoulder, Waist, Neck)
-    all_angles.update(calculate_anatomical_angles(kp))
+    out[4] = calculate_vertical_angle(kp[7], kp[8])
+    # 3. Complex 3D Euler Angles (Hip, Shoulder, Waist, Neck); a failed waist stays 0.0
+    out[5:] = 0.0
+    _anatomical_core(kp, out[5:])
+
+@njit(cache=True)
+def _all_angles_frames(kp_all, out):
+    """_all_angles_core over every frame of a float64 (F, 17, 3) stack; out is (F, 23)."""
+    for f in range(kp_all.shape[0]):
+        _all_angles_core(kp_all[f], out[f])
+
+def process_all_angles(kp, ANGLE_KEYS):
+    """Calculates all 23 angles (simple bend + 3D Euler components)."""
+    if len(kp) < 17:
+        return {key: 0.0 for key in ANGLE_KEYS}
+    out = np.empty(len(CORE_ANGLE_KEYS))
+    _all_angles_core(np.ascontiguousarray(kp, dtype=np.float64), out)
+    all_angles = dict(zip(CORE_ANGLE_KEYS, np.round(out, 1).tolist()))
     
     # Ensure all keys are present, even if calculation failed
     for key in ANGLE_KEYS:
@@ -268,6 +340,15 @@ def process_all_angles(kp, ANGLE_KEYS):
             
     return all_angles
 
+def process_all_angles_batch(kp, angle_keys):
+    """process_all_angles for a (F, 17, 3) stack of frames (compiled per-frame loop); one angle dict per frame."""
+    out = np.empty((len(kp), len(CORE_ANGLE_KEYS)))
+    _all_angles_frames(np.ascontiguousarray(kp, dtype=np.float64), out)
+    rows = np.round(out, 1, out=out).tolist()
+    missing = [key for key in angle_keys if key not in CORE_ANGLE_KEYS]
+    return [dict(zip(CORE_ANGLE_KEYS, row), **dict.fromkeys(missing, 0.0)) for row in rows]
+
+
 def save_predictions_to_json(all_predictions, final_output_path):
     """Saves collected prediction data to a JSON file."""
     if all_predictions:
@@ -0,0 +1,52 @@
+import torch
+import torch.nn as nn
+
+# --- (Model class definitions) ---
+class MovementClassifierLSTM(nn.Module):
+    def __init__(self, input_size, hidden_size1, hidden_size2, num_classes, dropout_prob=0.5):
+        super(MovementClassifierLSTM, self).__init__()
+        self.lstm1 = nn.LSTM(input_size, hidden_size1, batch_first=True)
+        self.dropout1 = nn.Dropout(dropout_prob)
+        self.lstm2 = nn.LSTM(hidden_size1, hidden_size2, batch_first=True)
+        self.dropout2 = nn.Dropout(dropout_prob)
+        self.fc1 = nn.Linear(hidden_size2, 50)
+        self.relu = nn.ReLU()
+        self.fc2 = nn.Linear(50, num_classes)
+    def forward(self, x):
+        out, _ = self.lstm1(x); out = self.dropout1(out)
+        out, (hidden, _) = self.lstm2(out); out = self.dropout2(hidden.squeeze(0))
+        out = self.fc1(out); out = self.relu(out); out = self.fc2(out)
+        return out
+
+class RepetitionDetector(nn.Module):
+    def __init__(self, input_size=48, hidden_size=64, num_layers=2):
+        super(RepetitionDetector, self).__init__()
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True, bidirectional=True)
+        self.fc = nn.Linear(hidden_size * 2, 1)
+    def forward(self, x):
+        lstm_out, _ = self.lstm(x); out = self.fc(lstm_out)
+        return out.squeeze(-1)
+
+# --- (TorchScript) ---
+def trace_model(model, example, check_input, amp_dtype=None):
+    """
+    Traces and freezes an eval-mode model to TorchScript on example. The traced graph is only
+    used if it reproduces the eager outputs on check_input (under autocast to amp_dtype, when
+    given); if tracing fails or the outputs differ, the eager model is returned instead.
+    """
+    try:
+        with torch.no_grad():
+            traced = torch.jit.freeze(torch.jit.trace(model, example))
+        with torch.inference_mode(), torch.autocast(device_type=check_input.device.type,
+                                                    dtype=amp_dtype or torch.float16,
+                                                    enabled=amp_dtype is not None):
+            expected = model(check_input).float()
+            actual = traced(check_input).float()
+    except Exception as e:
+        print(f"TorchScript tracing failed for {type(model).__name__} ({e}); using the eager model.")
+        return model
+    tol = 1e-2 if amp_dtype is not None else 1e-4
+    if actual.shape != expected.shape or not torch.allclose(actual, expected, rtol=tol, atol=tol):
+        print(f"Traced {type(model).__name__} does not match the eager model; using the eager model.")
+        return model
+    return traced
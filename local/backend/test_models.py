@@ -0,0 +1,44 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from models import MovementClassifierLSTM, RepetitionDetector, trace_model
+
+WINDOW_SIZE = 60
+N_FEATURES = 48
+
+
+class SignBranch(torch.nn.Module):
+    """Data-dependent branch: tracing records only the path taken by the example."""
+    def forward(self, x):
+        return x if x.sum() > 0 else -x
+
+
+@pytest.mark.parametrize("model", [
+    MovementClassifierLSTM(N_FEATURES, 80, 40, 10),
+    RepetitionDetector(N_FEATURES, 64, 2),
+])
+def test_traced_model_matches_eager(model):
+    torch.manual_seed(0)
+    model.eval()
+    example = torch.randn(1, WINDOW_SIZE, N_FEATURES)
+    check_input = torch.randn(4, WINDOW_SIZE, N_FEATURES)
+    traced = trace_model(model, example, check_input)
+    assert isinstance(traced, torch.jit.ScriptModule)
+    sample = torch.randn(3, WINDOW_SIZE, N_FEATURES)
+    with torch.inference_mode():
+        torch.testing.assert_close(traced(sample), model(sample), rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="autocast check needs CUDA")
+def test_traced_model_matches_eager_under_autocast():
+    torch.manual_seed(0)
+    model = RepetitionDetector(N_FEATURES, 64, 2).cuda().eval()
+    example = torch.randn(1, WINDOW_SIZE, N_FEATURES, device='cuda')
+    check_input = torch.randn(4, WINDOW_SIZE, N_FEATURES, device='cuda')
+    assert isinstance(trace_model(model, example, check_input, torch.float16), torch.jit.ScriptModule)
+
+
+def test_falls_back_to_eager_when_trace_differs():
+    model = SignBranch().eval()
+    assert trace_model(model, torch.ones(1, 3), -torch.ones(2, 3)) is model
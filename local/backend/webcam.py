@@ -1,10 +1,25 @@
+import os
+
+DEVICE = "cpu"  # Use 'cpu' for stability
+if DEVICE.startswith("cuda"):
+    # On a GPU the CPU only does light pre/post-processing; one OpenMP thread keeps it from
+    # competing with the event loop. Must be set before torch and cv2 load their OpenMP runtimes
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+
 import uvicorn
 import cv2
 import asyncio
-import json
+import threading
+import struct
+import orjson
 import datetime
+from contextlib import asynccontextmanager
 import warnings
 import numpy as np
+import math
+from numba import njit
+import torch
+import torch.nn as nn
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from mmpose.apis import MMPoseInferencer
@@ -18,10 +33,22 @@ warnings.filterwarnings(
 # --------------------------
 
 # -------------------- CONFIG --------------------
-DEVICE = "cpu"  # Use 'cpu' for stability
-OUTPUT_JSON_PATH = "web_session_data.json" # Base filename for saved files
+# DEVICE is set at the top of the module: thread pinning needs it before torch/cv2 are imported
+OUTPUT_JSON_PATH = "web_session_data.jsonl" # Base filename for saved files (one JSON frame per line)
+RESULT_QUEUE_SIZE = 2 # Processed frames waiting to be sent; older ones are dropped
+QUANTIZE_CPU = False # Opt-in dynamic int8 Linear layers on the CPU; changes keypoints/angles, so validate before enabling
+HALF_PRECISION_GPU = True # fp16 autocast for the forward passes on a cuda DEVICE
 # ------------------------------------------------
 
+# Keep OpenCV from competing with torch for CPU cores. On the CPU, torch gets all but one
+# core for intra-op work; on a GPU it only runs light pre/post-processing on the CPU, so one
+# thread avoids jitter against the event loop and camera reads. A single inter-op thread
+# either way (one model call at a time)
+cv2.setNumThreads(1)
+torch.set_num_threads(1 if DEVICE.startswith("cuda") else max(1, (os.cpu_count() or 1) - 1))
+torch.set_num_interop_threads(1)
+_END_OF_STREAM = object()
+
 # ===================================================================
 # --- KINEMATICS LOGIC (MERGED FROM kinematics.py) ---
 # ===================================================================
@@ -59,207 +86,279 @@ ANGLE_KEYS = [
 ]
 
 # ---------------- KINEMATIC HELPERS ----------------
+# Numba-compiled: 3-vectors are float 3-tuples (or rows of a float64 kp array) and all the
+# math is scalar, so a frame costs a few microseconds instead of hundreds of Python calls.
+_IDENTITY3 = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+_ZERO3 = (0.0, 0.0, 0.0)
+
+@njit(cache=True)
+def _sub3(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+@njit(cache=True)
+def _scale3(v, s):
+    return (v[0] * s, v[1] * s, v[2] * s)
+
+@njit(cache=True)
+def _dot3(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+@njit(cache=True)
+def _norm3(v):
+    return math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
+@njit(cache=True)
+def _cross3(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+@njit(cache=True)
+def _columns3(x_axis, y_axis, z_axis):
+    """3x3 matrix (tuple of rows) with the three axes as its columns."""
+    return ((x_axis[0], y_axis[0], z_axis[0]),
+            (x_axis[1], y_axis[1], z_axis[1]),
+            (x_axis[2], y_axis[2], z_axis[2]))
+
+@njit(cache=True)
+def _compose_row(a_x, a_y, a_z, i, b_x, b_y, b_z):
+    """Row i of A @ B.T, for A and B given by their axes (columns)."""
+    return (a_x[i] * b_x[0] + a_y[i] * b_y[0] + a_z[i] * b_z[0],
+            a_x[i] * b_x[1] + a_y[i] * b_y[1] + a_z[i] * b_z[1],
+            a_x[i] * b_x[2] + a_y[i] * b_y[2] + a_z[i] * b_z[2])
+
+@njit(cache=True)
 def calculate_3d_angle(A, B, C):
     """Calculates the 3D angle at joint B defined by segments BA and BC."""
-    v1 = A - B
-    v2 = C - B
-    denom = np.linalg.norm(v1) * np.linalg.norm(v2)
+    v1 = _sub3(A, B)
+    v2 = _sub3(C, B)
+    denom = _norm3(v1) * _norm3(v2)
     if denom < 1e-9: # Prevent division by zero
         return 0.0
-    cosv = np.clip(np.dot(v1, v2) / denom, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
+    cosv = min(max(_dot3(v1, v2) / denom, -1.0), 1.0)
+    return math.degrees(math.acos(cosv))
 
+@njit(cache=True)
 def calculate_vertical_angle(Start, End):
     """Calculates the angle of a segment (Start->End) relative to the vertical axis (Y-up)."""
-    seg = End - Start
-    norm = np.linalg.norm(seg)
+    seg = _sub3(End, Start)
+    norm = _norm3(seg)
     if norm < 1e-9: # Prevent division by zero
         return 0.0
-    # Assumes Y is UP
-    cosv = np.clip(np.dot(seg, np.array([0.0, 1.0, 0.0])) / norm, -1.0, 1.0)
-    return np.degrees(np.arccos(cosv))
+    # Assumes Y is UP: seg . (0, 1, 0) is just the Y component
+    cosv = min(max(seg[1] / norm, -1.0), 1.0)
+    return math.degrees(math.acos(cosv))
 
-def compute_rotation_matrix(proximal_vec, distal_vec):
+@njit(cache=True)
+def _segment_axes(proximal_vec, distal_vec):
     """
-    Computes a rotation matrix (local coordinate system) based on two segment vectors.
-    Distal vector defines the Y-axis (length of the bone/segment).
-    This implementation mirrors the THREE.js lookAt logic.
+    (ok, X, Y, Z): local axes (unit 3-tuples) of the frame built by compute_rotation_matrix;
+    ok is False where it falls back to the identity.
     """
-    if np.linalg.norm(proximal_vec) < 1e-9 or np.linalg.norm(distal_vec) < 1e-9:
-        return np.eye(3)
+    # Each norm is computed once; normalizing multiplies by the reciprocal
+    d_norm = _norm3(distal_vec)
+    if _norm3(proximal_vec) < 1e-9 or d_norm < 1e-9:
+        return False, _ZERO3, _ZERO3, _ZERO3
     
     # Y-axis is the distal segment (bone direction)
-    y_axis = distal_vec / np.linalg.norm(distal_vec)
+    y_axis = _scale3(distal_vec, 1.0 / d_norm)
     
     # Z-axis is perpendicular to distal and proximal vectors
-    z_axis = np.cross(y_axis, proximal_vec)
-    if np.linalg.norm(z_axis) < 1e-9:
+    z_axis = _cross3(y_axis, proximal_vec)
+    z_norm = _norm3(z_axis)
+    if z_norm < 1e-9:
         # Fallback for collinear vectors
         if abs(y_axis[0]) > 0.8: # If y_axis is close to x-axis
-            z_axis = np.cross(y_axis, np.array([0, 1, 0]))
+            z_axis = _cross3(y_axis, (0.0, 1.0, 0.0))
         else:
-            z_axis = np.cross(y_axis, np.array([1, 0, 0]))
+            z_axis = _cross3(y_axis, (1.0, 0.0, 0.0))
+        z_norm = _norm3(z_axis)
     
-    if np.linalg.norm(z_axis) < 1e-9: # Second fallback
-        return np.eye(3)
-    z_axis /= np.linalg.norm(z_axis)
+    if z_norm < 1e-9: # Second fallback
+        return False, _ZERO3, _ZERO3, _ZERO3
+    z_axis = _scale3(z_axis, 1.0 / z_norm)
     
-    # X-axis is perpendicular to Y and Z
-    x_axis = np.cross(y_axis, z_axis)
-    x_axis /= np.linalg.norm(x_axis)
+    # X-axis is perpendicular to Y and Z (both unit and orthogonal, so already unit length)
+    x_axis = _cross3(y_axis, z_axis)
     
+    return True, x_axis, y_axis, z_axis
+
+@njit(cache=True)
+def compute_rotation_matrix(proximal_vec, distal_vec):
+    """
+    Computes a rotation matrix (local coordinate system) based on two segment vectors.
+    Distal vector defines the Y-axis (length of the bone/segment).
+    This implementation mirrors the THREE.js lookAt logic.
+    Returns the matrix as a tuple of rows (index it as R[i][j]).
+    """
+    ok, x_axis, y_axis, z_axis = _segment_axes(proximal_vec, distal_vec)
+    if not ok:
+        return _IDENTITY3
     # Return the basis matrix [X, Y, Z]
-    return np.vstack([x_axis, y_axis, z_axis]).T
+    return _columns3(x_axis, y_axis, z_axis)
+
+
+@njit(cache=True)
+def _euler_yxz(r10, r00, r20, r11, r12, r02, r22):
+    """YXZ Euler angles (degrees) from the only seven matrix entries the extraction reads."""
+    # YXZ intrinsic rotation
+    s = min(max(r10, -1.0), 1.0)
+    r_x = math.degrees(math.asin(s))
 
+    # cos(asin(s))^2 = 1 - s^2 (= r00^2 + r20^2), so cos_rx > 1e-6 needs no sqrt.
+    # The regular case is by far the common one and comes first
+    if 1.0 - s * s > 1e-12:
+        return r_x, math.degrees(math.atan2(-r20, r00)), math.degrees(math.atan2(-r12, r11))
+    # Gimbal lock
+    return r_x, math.degrees(math.atan2(r02, r22)), 0.0
 
+@njit(cache=True)
 def rotation_matrix_to_euler_angles(R):
     """
     Converts a rotation matrix to Euler angles (YXZ order) in degrees.
     This order matches the THREE.js 'YXZ' implementation.
     """
-    # YXZ intrinsic rotation
-    r_x = np.arcsin(np.clip(R[1, 0], -1.0, 1.0))
-    cos_rx = np.cos(r_x)
+    return _euler_yxz(R[1][0], R[0][0], R[2][0], R[1][1], R[1][2], R[0][2], R[2][2])
+
+@njit(cache=True)
+def segment_euler_angles(proximal_vec, distal_vec):
+    """
+    rotation_matrix_to_euler_angles(compute_rotation_matrix(proximal_vec, distal_vec)), fused:
+    the frame's axes are its columns, so the needed entries are read straight off them
+    and the 3x3 matrix is never assembled.
+    """
+    ok, x_axis, y_axis, z_axis = _segment_axes(proximal_vec, distal_vec)
+    if not ok:
+        return rotation_matrix_to_euler_angles(_IDENTITY3)
+    return _euler_yxz(x_axis[1], x_axis[0], x_axis[2], y_axis[1], z_axis[1], z_axis[0], z_axis[2])
 
-    if abs(cos_rx) > 1e-6:
-        r_y = np.arctan2(-R[2, 0], R[0, 0])
-        r_z = np.arctan2(-R[1, 2], R[1, 1])
-    else:
-        # Gimbal lock
-        r_y = np.arctan2(R[0, 2], R[2, 2])
-        r_z = 0.0
 
-    return np.degrees(r_x), np.degrees(r_y), np.degrees(r_z)
+# Output layout of _anatomical_core: (X, Y, Z) per joint, in this order
+ANATOMICAL_JOINTS = ["Waist", "Neck", "R Shoulder", "L Shoulder", "R Hip", "L Hip"]
+ANATOMICAL_KEYS = [f"{joint} ({axis}-Axis Rotation)" for joint in ANATOMICAL_JOINTS for axis in "XYZ"]
 
+@njit(cache=True)
+def _store_euler(out, slot, angles):
+    out[3 * slot] = angles[0]
+    out[3 * slot + 1] = angles[1]
+    out[3 * slot + 2] = angles[2]
 
-def calculate_anatomical_angles(kp):
+@njit(cache=True)
+def _anatomical_core(kp, out):
     """
-    Calculates 3D Euler angles for all ball-and-socket and axial joints.
+    Compiled body of calculate_anatomical_angles for a float64 (>= 17, 3) kp: writes the
+    18 angles into out in ANATOMICAL_KEYS order. Returns False if the waist could not be
+    computed (its slots are then left untouched).
     """
-    angles = {}
-    
-    if kp.shape[0] < 17:
-        return {key: 0.0 for key in ANGLE_KEYS if 'Bend' not in key and 'Vertical' not in key}
-
     # --- WAIST/TORSO ROTATION (Joint Center: Torso 7) ---
-    if kp.shape[0] > 8:
-        try:
-            proximal_y = kp[7] - kp[0] # Y-axis: Pelvis -> Torso
-            x_axis_ref = kp[1] - kp[4] # X-axis (Lateral): R_Hip (1) -> L_Hip (4)
+    waist_ok = False
+    proximal_y = _sub3(kp[7], kp[0]) # Y-axis: Pelvis -> Torso
+    x_axis_ref = _sub3(kp[1], kp[4]) # X-axis (Lateral): R_Hip (1) -> L_Hip (4)
+    torso_y = _sub3(kp[8], kp[7])    # Torso to Neck
+    
+    py_norm = _norm3(proximal_y)
+    ref_norm = _norm3(x_axis_ref)
+    torso_norm = _norm3(torso_y)
+    if py_norm > 1e-6 and ref_norm > 1e-6 and torso_norm > 1e-6:
+        proximal_y = _scale3(proximal_y, 1.0 / py_norm)
+        x_axis_ref = _scale3(x_axis_ref, 1.0 / ref_norm)
+        torso_y = _scale3(torso_y, 1.0 / torso_norm)
+        
+        z_axis_local = _cross3(proximal_y, x_axis_ref)
+        z_local_norm = _norm3(z_axis_local)
+        z_axis_torso = _cross3(torso_y, x_axis_ref)
+        z_torso_norm = _norm3(z_axis_torso)
+        if z_torso_norm < 1e-9: # Fallback
+            z_axis_torso = _cross3(torso_y, (0.0, 0.0, 1.0))
+            z_torso_norm = _norm3(z_axis_torso)
+        # Zero-length cross products leave the waist uncomputed
+        if z_local_norm > 0.0 and z_torso_norm > 0.0:
+            z_axis_local = _scale3(z_axis_local, 1.0 / z_local_norm)
+            # Cross of two orthogonal unit vectors: already unit length
+            x_axis_local = _cross3(proximal_y, z_axis_local)
+            z_axis_torso = _scale3(z_axis_torso, 1.0 / z_torso_norm)
+            x_axis_torso = _cross3(torso_y, z_axis_torso)
             
-            if np.linalg.norm(proximal_y) > 1e-6 and np.linalg.norm(x_axis_ref) > 1e-6:
-                proximal_y /= np.linalg.norm(proximal_y)
-                x_axis_ref /= np.linalg.norm(x_axis_ref)
-                
-                z_axis_local = np.cross(proximal_y, x_axis_ref)
-                z_axis_local /= np.linalg.norm(z_axis_local)
-                x_axis_local = np.cross(proximal_y, z_axis_local)
-                x_axis_local /= np.linalg.norm(x_axis_local)
-                R_local = np.vstack([x_axis_local, proximal_y, z_axis_local]).T 
-                
-                torso_y = kp[8] - kp[7] # Torso to Neck
-                if np.linalg.norm(torso_y) > 1e-6:
-                    torso_y /= np.linalg.norm(torso_y)
-                    z_axis_torso = np.cross(torso_y, x_axis_ref)
-                    if np.linalg.norm(z_axis_torso) < 1e-9: # Fallback
-                         z_axis_torso = np.cross(torso_y, np.array([0,0,1]))
-                    z_axis_torso /= np.linalg.norm(z_axis_torso)
-                    
-                    x_axis_torso = np.cross(torso_y, z_axis_torso)
-                    x_axis_torso /= np.linalg.norm(x_axis_torso)
-                    R_torso = np.vstack([x_axis_torso, torso_y, z_axis_torso]).T 
-                    
-                    R_relative = R_torso @ np.linalg.inv(R_local)
-                    rx, ry, rz = rotation_matrix_to_euler_angles(R_relative)
-                    
-                    angles["Waist (X-Axis Rotation)"] = round(rx, 1)
-                    angles["Waist (Y-Axis Rotation)"] = round(ry, 1)
-                    angles["Waist (Z-Axis Rotation)"] = round(rz, 1)
-        except Exception as e:
-            print(f"Error calculating waist: {e}")
-
+            # R_torso @ R_local.T (both frames have their axes as columns; R_local is
+            # orthonormal, so its transpose is its inverse)
+            R_relative = (_compose_row(x_axis_torso, torso_y, z_axis_torso, 0, x_axis_local, proximal_y, z_axis_local),
+                          _compose_row(x_axis_torso, torso_y, z_axis_torso, 1, x_axis_local, proximal_y, z_axis_local),
+                          _compose_row(x_axis_torso, torso_y, z_axis_torso, 2, x_axis_local, proximal_y, z_axis_local))
+            _store_euler(out, 0, rotation_matrix_to_euler_angles(R_relative))
+            waist_ok = True
 
     # --- NECK ROTATION (Joint Center: Neck 8) ---
-    if kp.shape[0] > 9:
-        proximal = kp[7] - kp[8] # Torso -> Neck
-        distal = kp[9] - kp[8]   # Neck -> Head
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["Neck (X-Axis Rotation)"] = round(rx, 1)
-        angles["Neck (Y-Axis Rotation)"] = round(ry, 1)
-        angles["Neck (Z-Axis Rotation)"] = round(rz, 1)
+    # Torso -> Neck, Neck -> Head
+    _store_euler(out, 1, segment_euler_angles(_sub3(kp[7], kp[8]), _sub3(kp[9], kp[8])))
 
     # --- RIGHT SHOULDER (Joint Center: Shoulder 11) ---
-    if kp.shape[0] > 12:
-        proximal = kp[8] - kp[11] # Neck -> R_Shoulder
-        distal = kp[12] - kp[11]  # R_Shoulder -> R_Elbow
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Shoulder (X-Axis Rotation)"] = round(rx, 1)
-        angles["R Shoulder (Y-Axis Rotation)"] = round(ry, 1)
-        angles["R Shoulder (Z-Axis Rotation)"] = round(rz, 1)
+    # Neck -> R_Shoulder, R_Shoulder -> R_Elbow
+    _store_euler(out, 2, segment_euler_angles(_sub3(kp[8], kp[11]), _sub3(kp[12], kp[11])))
         
     # --- LEFT SHOULDER (Joint Center: Shoulder 14) ---
-    if kp.shape[0] > 15:
-        proximal = kp[8] - kp[14] # Neck -> L_Shoulder
-        distal = kp[15] - kp[14]  # L_Shoulder -> L_Elbow
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        
-        # --- FIX: Negate Y and Z angles for left side ---
-        angles["L Shoulder (X-Axis Rotation)"] = round(rx, 1)
-        angles["L Shoulder (Y-Axis Rotation)"] = round(-ry, 1)
-        angles["L Shoulder (Z-Axis Rotation)"] = round(-rz, 1)
-        # -------------------------------------------------
+    # Neck -> L_Shoulder, L_Shoulder -> L_Elbow
+    _store_euler(out, 3, segment_euler_angles(_sub3(kp[8], kp[14]), _sub3(kp[15], kp[14])))
 
     # --- RIGHT HIP (Joint Center: Hip 1) ---
-    if kp.shape[0] > 2:
-        proximal = kp[0] - kp[1] # Pelvis -> R_Hip
-        distal = kp[2] - kp[1]   # R_Hip -> R_Knee
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-        angles["R Hip (X-Axis Rotation)"] = round(rx, 1)
-        angles["R Hip (Y-Axis Rotation)"] = round(ry, 1)
-        angles["R Hip (Z-Axis Rotation)"] = round(rz, 1)
+    # Pelvis -> R_Hip, R_Hip -> R_Knee
+    _store_euler(out, 4, segment_euler_angles(_sub3(kp[0], kp[1]), _sub3(kp[2], kp[1])))
 
     # --- LEFT HIP (Joint Center: Hip 4) ---
-    if kp.shape[0] > 5:
-        proximal = kp[0] - kp[4] # Pelvis -> L_Hip
-        distal = kp[5] - kp[4]   # L_Hip -> L_Knee
-        Rm = compute_rotation_matrix(proximal, distal)
-        rx, ry, rz = rotation_matrix_to_euler_angles(Rm)
-
-        # --- FIX: Negate Y and Z angles for left side ---
-        angles["L Hip (X-Axis Rotation)"] = round(rx, 1)
-        angles["L Hip (Y-Axis Rotation)"] = round(-ry, 1)
-        angles["L Hip (Z-Axis Rotation)"] = round(-rz, 1)
-        # -------------------------------------------------
-            
+    # Pelvis -> L_Hip, L_Hip -> L_Knee
+    _store_euler(out, 5, segment_euler_angles(_sub3(kp[0], kp[4]), _sub3(kp[5], kp[4])))
+
+    # --- FIX: Negate Y and Z angles for left side ---
+    for slot in (3, 5):
+        out[3 * slot + 1] = -out[3 * slot + 1]
+        out[3 * slot + 2] = -out[3 * slot + 2]
+    # -------------------------------------------------
+    return waist_ok
+
+
+def calculate_anatomical_angles(kp):
+    """
+    Calculates 3D Euler angles for all ball-and-socket and axial joints.
+    The order corresponds to (X-Axis, Y-Axis, Z-Axis) rotation.
+    """
+    if len(kp) < 17:
+        return {key: 0.0 for key in ANGLE_KEYS if 'Bend' not in key and 'Vertical' not in key}
+    out = np.zeros(len(ANATOMICAL_KEYS))
+    waist_ok = _anatomical_core(np.ascontiguousarray(kp, dtype=np.float64), out)
+    angles = dict(zip(ANATOMICAL_KEYS, np.round(out, 1).tolist()))
+    if not waist_ok:
+        for key in ANATOMICAL_KEYS[:3]:
+            del angles[key]
     return angles
 
-def process_all_angles(kp, ANGLE_KEYS):
-    """Calculates all 23 angles (simple bend + 3D Euler components)."""
-    all_angles = {}
-    
-    if kp.shape[0] < 17:
-        return {key: 0.0 for key in ANGLE_KEYS}
+# Output layout of _all_angles_core: bends, vertical, then the 18 anatomical angles
+BEND_CHECKS = [(1, 2, 3, "R_Knee"), (4, 5, 6, "L_Knee"), (11, 12, 13, "R_Elbow"), (14, 15, 16, "L_Elbow")]
+CORE_ANGLE_KEYS = [f"{name} (Bend)" for _, _, _, name in BEND_CHECKS] + ["Torso-Neck (Vertical)"] + ANATOMICAL_KEYS
 
+@njit(cache=True)
+def _all_angles_core(kp, out):
+    """Compiled process_all_angles for a float64 (>= 17, 3) kp: fills out (23,) in CORE_ANGLE_KEYS order."""
     # 1. Simple Bend Angles (Knee and Elbows)
-    checks = [ 
-        (1,2,3,"R_Knee"), (4,5,6,"L_Knee"), 
-        (11,12,13,"R_Elbow"),
-        (14,15,16,"L_Elbow")
-    ]
-    for A,B,C,name in checks:
-        if C < kp.shape[0]:
-            all_angles[f"{name} (Bend)"] = round(calculate_3d_angle(kp[A], kp[B], kp[C]), 1)
-            
+    out[0] = calculate_3d_angle(kp[1], kp[2], kp[3])
+    out[1] = calculate_3d_angle(kp[4], kp[5], kp[6])
+    out[2] = calculate_3d_angle(kp[11], kp[12], kp[13])
+    out[3] = calculate_3d_angle(kp[14], kp[15], kp[16])
     # 2. Simple Vertical Angle (Torso)
-    if 8 < kp.shape[0]:
-        all_angles["Torso-Neck (Vertical)"] = round(calculate_vertical_angle(kp[7], kp[8]), 1)
-            
-    # 3. Complex 3D Euler Angles (Hip, Shoulder, Waist, Neck)
-    all_angles.update(calculate_anatomical_angles(kp))
+    out[4] = calculate_vertical_angle(kp[7], kp[8])
+    # 3. Complex 3D Euler Angles (Hip, Shoulder, Waist, Neck); a failed waist stays 0.0
+    out[5:] = 0.0
+    _anatomical_core(kp, out[5:])
+
+@njit(cache=True)
+def _all_angles_frames(kp_all, out):
+    """_all_angles_core over every frame of a float64 (F, 17, 3) stack; out is (F, 23)."""
+    for f in range(kp_all.shape[0]):
+        _all_angles_core(kp_all[f], out[f])
+
+def process_all_angles(kp, ANGLE_KEYS):
+    """Calculates all 23 angles (simple bend + 3D Euler components)."""
+    if len(kp) < 17:
+        return {key: 0.0 for key in ANGLE_KEYS}
+    out = np.empty(len(CORE_ANGLE_KEYS))
+    _all_angles_core(np.ascontiguousarray(kp, dtype=np.float64), out)
+    all_angles = dict(zip(CORE_ANGLE_KEYS, np.round(out, 1).tolist()))
     
     # Ensure all keys are present, even if calculation failed
     for key in ANGLE_KEYS:
@@ -268,12 +367,53 @@ def process_all_angles(kp, ANGLE_KEYS):
             
     return all_angles
 
+_ANGLE_KEYS_TUPLE = tuple(ANGLE_KEYS)
+_CORE_COLUMNS = np.array([ANGLE_KEYS.index(key) for key in CORE_ANGLE_KEYS]) # ANGLE_KEYS column of each core angle
+
+def process_all_angles_batch(kp):
+    """
+    process_all_angles for a (F, 17, 3) stack of frames (compiled per-frame loop), kept as
+    an (F, len(ANGLE_KEYS)) array in ANGLE_KEYS order; dicts are only built to serialize.
+    """
+    core = np.empty((len(kp), len(CORE_ANGLE_KEYS)))
+    _all_angles_frames(np.ascontiguousarray(kp, dtype=np.float64), core)
+    out = np.zeros((len(kp), len(ANGLE_KEYS)))
+    out[:, _CORE_COLUMNS] = np.round(core, 1, out=core)
+    return out
+
+def angles_to_dict(angle_row):
+    """An ANGLE_KEYS-ordered row as the {key: value} mapping saved per frame ({} for no detection)."""
+    return {} if angle_row is None else dict(zip(_ANGLE_KEYS_TUPLE, angle_row.tolist()))
+
 # ===================================================================
 # --- END OF KINEMATICS LOGIC ---
 # ===================================================================
 
 
-app = FastAPI()
+def load_inferencer():
+    """Builds the shared MMPoseInferencer once (model load dominates a session's startup)."""
+    inferencer = MMPoseInferencer(pose3d='human3d', device=DEVICE)
+    if QUANTIZE_CPU and DEVICE == 'cpu':
+        quantize_for_cpu(inferencer)
+    return inferencer
+
+def reset_inferencer(inferencer):
+    """The 3D lifter keeps a history of past 2D poses; every session starts from an empty one."""
+    buffer = getattr(inferencer.inferencer, '_buffer', None)
+    if buffer is not None:
+        buffer.clear()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load the model once at startup; connections borrow the warm instance
+    print("[API] Initializing MMPoseInferencer...")
+    app.state.inferencer = await asyncio.to_thread(load_inferencer)
+    # One camera and one model: a single streaming session at a time
+    app.state.session_lock = asyncio.Lock()
+    print("[API] MMPoseInferencer initialized.")
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # --- Custom Frame Generator for Camera ---
 class WebcamStreamGenerator:
@@ -285,14 +425,24 @@ class WebcamStreamGenerator:
         if not self.cap.isOpened():
             raise IOError(f"ERROR: Could not open camera source: {source}.")
             
+        # Ask for compressed MJPG over USB (set before the resolution so the driver
+        # negotiates the mode once); cuts bus bandwidth and driver-side latency
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        self.cap.set(cv2.CAP_PROP_FPS, 30) # Pin a known rate instead of the driver default
+        # Keep only the newest frame in the driver queue, so inference never works on stale frames
+        if not self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1):
+            print("[API] Warning: backend ignored CAP_PROP_BUFFERSIZE=1; live frames may lag.")
+        self._stop = threading.Event()
         print("[API] WebcamStreamGenerator initialized.")
 
     def __iter__(self):
         return self
 
     def __next__(self):
+        if self._stop.is_set():
+            raise StopIteration("Stream stopped.")
         ret, frame = self.cap.read()
         if not ret:
             self.cap.release()
@@ -300,9 +450,133 @@ class WebcamStreamGenerator:
             raise StopIteration("End of stream reached.")
         return frame
 
+    def stop(self):
+        """Ends the stream at the next frame request (safe to call from another thread)."""
+        self._stop.set()
+
     def release(self):
         self.cap.release()
 
+# --- Inference Worker ---
+def quantize_for_cpu(pose_inferencer):
+    """Swaps the Linear layers of the 3D lifter and 2D pose model for dynamic int8 versions, in place."""
+    impl = pose_inferencer.inferencer
+    pose2d = getattr(impl, 'pose2d_model', None)
+    for model in (getattr(impl, 'model', None), getattr(pose2d, 'model', None)):
+        if model is not None:
+            torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def extract_predictions(p_list):
+    """Prediction of one frame's first instance (as a list), plus the raw keypoints used for angles (None if absent)."""
+    preds = []
+    keypoints_3d_raw = None # This is the raw data (list or ndarray)
+    
+    if p_list and isinstance(p_list, list) and len(p_list) > 0:
+        p_dict = p_list[0]
+        # Arrays stay as-is; orjson serializes them straight from their buffers
+        preds.append(p_dict)
+        
+        # Extract keypoints for angle calculation
+        if 'keypoints' in p_dict and p_dict['keypoints'] is not None:
+            keypoints_3d_raw = p_dict['keypoints']
+    return preds, keypoints_3d_raw
+
+_Y_FLIP = np.array([1.0, -1.0, 1.0]) # Model Y-down -> kinematics Y-up
+_ZERO_ANGLES = np.zeros(len(ANGLE_KEYS)) # Shared row for skeletons too short to measure (never written to)
+
+def compute_angles(keypoint_frames):
+    """
+    ANGLE_KEYS-ordered angle rows for a list of raw keypoint arrays (None = no detection),
+    in one batched pass over every frame that has the full 17-joint skeleton.
+    """
+    angles = [None] * len(keypoint_frames)
+    full = []
+    for i, kp in enumerate(keypoint_frames):
+        if kp is None or len(kp) == 0:
+            continue # angles remain None
+        if len(kp) < 17:
+            angles[i] = _ZERO_ANGLES
+        else:
+            full.append(i)
+    
+    if full:
+        try:
+            # COORDINATE TRANSFORM
+            # Model outputs [X, Y-down, Z-fwd]
+            # Kinematics logic expects [X, Y-up, Z-fwd]
+            # Cast, crop to 17 joints and flip Y in one pass into a contiguous float64 buffer
+            kp_all = np.empty((len(full), 17, 3))
+            for j, i in enumerate(full):
+                np.multiply(np.asarray(keypoint_frames[i])[:17, :3], _Y_FLIP, out=kp_all[j])
+            
+            for i, frame_angles in zip(full, process_all_angles_batch(kp_all)):
+                angles[i] = frame_angles
+        except Exception as e:
+            print(f"[API] Error during angle calculation: {e}")
+            # angles will remain None
+    return angles
+
+# Binary WebSocket frame layout (little-endian): uint32 frame_id, uint16 joint count J,
+# int16[J * 3] raw 3D keypoints in 1 / KEYPOINT_SCALE units (0.1 mm for metre outputs, +-3.2 m),
+# int16[len(ANGLE_KEYS)] angles in 1 / ANGLE_SCALE degrees, in ANGLE_KEYS order.
+# Angles are already rounded to 0.1 deg, so only the display keypoints lose precision;
+# the session file keeps the full-precision values
+KEYPOINT_SCALE = 10000.0
+ANGLE_SCALE = 10.0
+
+def encode_frame_packet(frame_id, preds, angle_row):
+    """Packs a frame into the quantized binary layout above; angle_row None sends zeros."""
+    keypoints = preds[0].get('keypoints') if preds else None
+    kp = np.asarray(keypoints if keypoints is not None else [], dtype=np.float64).reshape(-1, 3)
+    kp_q = np.clip(np.rint(kp * KEYPOINT_SCALE), -32768, 32767).astype('<i2')
+    angle_q = np.rint((_ZERO_ANGLES if angle_row is None else angle_row) * ANGLE_SCALE).astype('<i2')
+    return struct.pack('<IH', frame_id, kp.shape[0]) + kp_q.tobytes() + angle_q.tobytes()
+
+def offer_latest(queue, item):
+    """Puts item on a bounded asyncio.Queue, dropping the oldest entry when full (event loop thread only)."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+def _json_fallback(obj):
+    """orjson default hook: arrays it cannot read directly (non-contiguous, odd dtypes) go through tolist()."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError
+
+def pose_worker(inferencer, frame_gen, loop, results, out_f):
+    """
+    Runs capture, inference and angles on a dedicated thread so the blocking torch
+    calls never stall the event loop. Every frame is streamed to out_f as one NDJSON
+    line; only the newest ones are handed to the loop for sending (drop-oldest).
+    """
+    try:
+        # inference_mode and autocast are thread-local: entered here, they cover every model call of this worker.
+        # Autocast casts inputs and weights per op, so the FP32 preprocessors and postprocessing stay untouched
+        use_fp16 = HALF_PRECISION_GPU and DEVICE.startswith("cuda")
+        with torch.inference_mode(), torch.autocast(device_type="cuda", dtype=torch.float16, enabled=use_fp16):
+            # Create the processing pipeline generator
+            results_gen = inferencer(inputs=frame_gen, return_vis=False)
+            frame_id = 0
+            for result in results_gen:
+                # result['predictions'] holds one instance list per frame (MMPose yields one frame per result)
+                # A result without predictions still yields one "no person" frame (empty keypoints)
+                frames = [extract_predictions(p_list) for p_list in result.get('predictions') or [[]]]
+                batch_angles = compute_angles([keypoints for _, keypoints in frames])
+                for (preds, _), angles in zip(frames, batch_angles):
+                    frame_data = {
+                        'frame_id': frame_id,
+                        'predictions': preds, # This contains the raw 3D keypoints
+                        'angles': angles_to_dict(angles) # This contains the calculated angles
+                    }
+                    out_f.write(orjson.dumps(frame_data, default=_json_fallback, option=orjson.OPT_SERIALIZE_NUMPY) + b'\n')
+                    loop.call_soon_threadsafe(offer_latest, results, encode_frame_packet(frame_id, preds, angles))
+                    frame_id += 1
+    except Exception as e:
+        loop.call_soon_threadsafe(offer_latest, results, e)
+    finally:
+        loop.call_soon_threadsafe(offer_latest, results, _END_OF_STREAM)
+
 # --- WebSocket Endpoint ---
 @app.websocket("/ws/pose")
 async def websocket_pose_stream(websocket: WebSocket):
@@ -312,88 +586,42 @@ async def websocket_pose_stream(websocket: WebSocket):
     await websocket.accept()
     print("[API] WebSocket connection accepted.")
     
-    inferencer = None
+    session_lock = websocket.app.state.session_lock
+    if session_lock.locked():
+        await websocket.close(code=1013, reason="Another session is already streaming.")
+        return
+    await session_lock.acquire() # Uncontended: the check above and this run without yielding
+    
+    inferencer = websocket.app.state.inferencer
     frame_gen = None
-    all_predictions = []
-    frame_id = 0
+    worker = None
+    out_f = None
     
     # Generate timestamped filename for saving
     now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     final_output_path = OUTPUT_JSON_PATH.replace(".json", f"_{now}.json")
 
     try:
-        # 1. Initialize MMPose and Webcam
-        print("[API] Initializing MMPoseInferencer...")
-        inferencer = MMPoseInferencer(pose3d='human3d', device=DEVICE)
-        print("[API] MMPoseInferencer initialized.")
-        
+        # 1. Reset the shared MMPose inferencer and open the Webcam
+        reset_inferencer(inferencer)
+        out_f = open(final_output_path, 'wb', buffering=1 << 20)
         frame_gen = WebcamStreamGenerator(source=0)
         
-        # 2. Create the processing pipeline generator
-        results_gen = inferencer(inputs=frame_gen, return_vis=False)
-        print("[API] MMPose pipeline generator created. Starting stream...")
-
-        # 3. Stream processing loop
-        for result in results_gen:
-            
-            # --- Data Extraction ---
-            preds = []
-            keypoints_3d_raw = None # This is the raw data (list or ndarray)
-            
-            if 'predictions' in result:
-                for p_list in result['predictions']:
-                    if p_list and isinstance(p_list, list) and len(p_list) > 0:
-                        p_dict = p_list[0]
-                        # Convert numpy arrays to lists for JSON serialization
-                        safe_dict = {k: (v.tolist() if hasattr(v, 'tolist') else v) for k, v in p_dict.items()}
-                        preds.append(safe_dict)
-                        
-                        # Extract keypoints for angle calculation
-                        if 'keypoints' in p_dict and p_dict['keypoints'] is not None:
-                            keypoints_3d_raw = p_dict['keypoints']
-
-            # --- Angle Calculation ---
-            angles = {}
-            
-            # --- ROBUSTNESS & COORDINATE FIX ---
-            if keypoints_3d_raw is not None:
-                try:
-                    # 1. Ensure keypoints are a numpy array
-                    kp_array = np.array(keypoints_3d_raw)
-                    
-                    if kp_array.shape[0] > 0:
-                        
-                        # 2. COORDINATE TRANSFORM
-                        # Model outputs [X, Y-down, Z-fwd]
-                        # Kinematics logic expects [X, Y-up, Z-fwd]
-                        kp_for_angles = kp_array.copy()
-                        kp_for_angles[:, 1] = -kp_for_angles[:, 1] # Flip Y-axis to be "up"
-                        # ----------------------
-                        
-                        # 3. Call the local angle calculation function
-                        angles = process_all_angles(kp_for_angles, ANGLE_KEYS)
-                        
-                except Exception as e:
-                    print(f"[API] Error during angle calculation: {e}")
-                    # angles will remain {}
-            # --- END OF FIX ---
-
-            # --- Prepare JSON Payload ---
-            frame_data = {
-                'frame_id': frame_id,
-                'predictions': preds, # This contains the raw 3D keypoints
-                'angles': angles      # This contains the calculated angles
-            }
-            
-            # 4. Store for saving
-            all_predictions.append(frame_data)
-            frame_id += 1
-            
-            # 5. Send data to React client
-            await websocket.send_json(frame_data)
-            
-            # Yield control to allow other tasks to run
-            await asyncio.sleep(0.01) 
+        # 2. Start the inference worker; it feeds a small drop-oldest queue on this loop
+        results = asyncio.Queue(maxsize=RESULT_QUEUE_SIZE)
+        worker = threading.Thread(target=pose_worker, daemon=True,
+                                  args=(inferencer, frame_gen, asyncio.get_running_loop(), results, out_f))
+        worker.start()
+        print("[API] MMPose inference worker started. Starting stream...")
+
+        # 3. Stream loop: send the newest processed frames to the React client
+        while True:
+            item = await results.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, Exception):
+                raise item
+            await websocket.send_bytes(item)
 
     except WebSocketDisconnect:
         print("[API] WebSocket client disconnected.")
@@ -405,21 +633,26 @@ async def websocket_pose_stream(websocket: WebSocket):
     finally:
         # --- Cleanup and Save ---
         print("[API] Cleaning up resources...")
+        if frame_gen:
+            frame_gen.stop() # The worker's pipeline ends at its next frame
+        if worker:
+            await asyncio.to_thread(worker.join)
         if frame_gen:
             frame_gen.release()
-            
-        inferencer = None # Allow garbage collection
+        session_lock.release()
         
-        if all_predictions:
-            print(f"[API] Saving {len(all_predictions)} frames to {final_output_path}...")
+        if out_f:
+            # Frames were written as they were produced; only the buffer tail is flushed here
             try:
-                with open(final_output_path, 'w') as f:
-                    json.dump(all_predictions, f, indent=4)
-                print(f"[API] Successfully saved data.")
+                saved = out_f.tell() > 0
+                out_f.close()
+                if saved:
+                    print(f"[API] Successfully saved data to {final_output_path}.")
+                else:
+                    os.remove(final_output_path)
+                    print("[API] No data to save.")
             except Exception as e:
                 print(f"[API] Failed to save JSON file: {e}")
-        else:
-            print("[API] No data to save.")
 
 # --- Main entry point to run the server ---
 if __name__ == "__main__":
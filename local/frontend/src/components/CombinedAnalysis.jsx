@@ -160,7 +160,12 @@ function CombinedAnalysis() {
             }
 
             const data = await response.json();
-            setAnalysisResult(data);
+            // Figures arrive as Plotly JSON strings; parse once here instead of on every render
+            setAnalysisResult({
+                ...data,
+                plot_1: JSON.parse(data.plot_json_1),
+                plot_2: JSON.parse(data.plot_json_2),
+            });
         } catch (err) {
             console.error("Analysis Error:", err);
             setAnalysisError(`Analysis Failed: ${err.message}`);
@@ -249,18 +254,22 @@ function CombinedAnalysis() {
                     {analysisResult && (  
                     <>
                         <div className="card" style={{ width: 'calc(200% - 20px)', height: '600px', padding: 0, overflow: 'hidden', margin: '10px' }}>
-                            <iframe
-                                title="Analysis Plot 1"
-                                srcDoc={analysisResult.plot_html_1}
-                                style={{ width: '100%', height: '100%', border: 'none' }}
+                            <Plot
+                                data={analysisResult.plot_1.data}
+                                layout={{ ...analysisResult.plot_1.layout, autosize: true }}
+                                config={{ responsive: true }}
+                                useResizeHandler={true}
+                                style={{ width: '100%', height: '100%' }}
                             />
                         </div>
                         
                         <div className="card" style={{ width: 'calc(200% - 20px)', height: '600px', padding: 0, overflow: 'hidden', margin: '10px' }}>
-                            <iframe
-                                title="Analysis Plot 2"
-                                srcDoc={analysisResult.plot_html_2}
-                                style={{ width: '100%', height: '100%', border: 'none' }}
+                            <Plot
+                                data={analysisResult.plot_2.data}
+                                layout={{ ...analysisResult.plot_2.layout, autosize: true }}
+                                config={{ responsive: true }}
+                                useResizeHandler={true}
+                                style={{ width: '100%', height: '100%' }}
                             />
                         </div>
 
@@ -14,6 +14,29 @@ import './Dashboard.css';
 // WebSocket URL from your Python API
 const WEBSOCKET_URL = "ws://127.0.0.1:8000/ws/pose";
 
+// Binary frame layout sent by webcam.py (little-endian): uint32 frame_id, uint16 joint count J,
+// int16[J * 3] keypoints in 1 / KEYPOINT_SCALE units, int16[ANGLE_KEYS.length] angles in
+// 1 / ANGLE_SCALE degrees, in ANGLE_KEYS order
+const KEYPOINT_SCALE = 10000;
+const ANGLE_SCALE = 10;
+
+function decodeFramePacket(buffer) {
+  const view = new DataView(buffer);
+  const jointCount = view.getUint16(4, true);
+  let offset = 6;
+  const keypoints = [];
+  for (let j = 0; j < jointCount; j++, offset += 6) {
+    keypoints.push([
+      view.getInt16(offset, true) / KEYPOINT_SCALE,
+      view.getInt16(offset + 2, true) / KEYPOINT_SCALE,
+      view.getInt16(offset + 4, true) / KEYPOINT_SCALE,
+    ]);
+  }
+  const angles = {};
+  ANGLE_KEYS.forEach((key, i) => { angles[key] = view.getInt16(offset + 2 * i, true) / ANGLE_SCALE; });
+  return { frame_id: view.getUint32(0, true), predictions: [{ keypoints }], angles };
+}
+
 function TrackMe() {
   const [isConnected, setIsConnected] = useState(false);
   const [allFrames, setAllFrames] = useState([]); // Stores all received frame data
@@ -52,6 +75,7 @@ function TrackMe() {
 
       // Connect to WebSocket
       ws.current = new WebSocket(WEBSOCKET_URL);
+      ws.current.binaryType = 'arraybuffer';
 
       ws.current.onopen = () => {
         console.log("WebSocket connected");
@@ -69,7 +93,7 @@ function TrackMe() {
       };
 
       ws.current.onmessage = (event) => {
-        const frameData = JSON.parse(event.data);
+        const frameData = decodeFramePacket(event.data);
         console.log(frameData)
 
         // 1. Update live 3D skeleton